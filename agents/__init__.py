@@ -7,9 +7,13 @@ from .wikipedia_agent import WikipediaAgent
 from .duckduckgo_agent import DuckDuckGoAgent
 from .executor_agent import ExecutorAgent
 from .explanation_agent import ExplanationAgent
+from .fanout_agent import FanOutRetrievalAgent
+from .cache_agent import CacheLookupAgent
+from .cache_agent import CacheStoreAgent
 
 __all__ = [
     'MemoryAgent', 'PlannerAgent', 'LLMAgent', 
     'RetrieverAgent', 'WikipediaAgent', 'DuckDuckGoAgent',
-    'ExecutorAgent', 'ExplanationAgent'
+    'ExecutorAgent', 'ExplanationAgent', 'FanOutRetrievalAgent',
+    'CacheLookupAgent', 'CacheStoreAgent'
 ]
\ No newline at end of file
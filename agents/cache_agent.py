@@ -0,0 +1,97 @@
+# agents/cache_agent.py
+from core.instrumentation import record_exception
+from core.memory import doctor_turn
+from core.resources import aget_resource
+from core.resources import get_resource
+from core.state import AgentState
+from tools.semantic_cache import CACHEABLE_SOURCES
+from tools.semantic_cache import get_semantic_cache
+from tools.semantic_cache import is_context_dependent
+from tools.semantic_cache import normalize_question
+
+def _namespace(source: str) -> str:
+    # Answers are only replayed for the same model and source; answers grounded
+    # in retrieved documents also only for the same indexed corpus
+    from tools.llm_client import LLM_MODEL_NAME
+    if source != "retrieved_docs":
+        return f"{LLM_MODEL_NAME}|{source}"
+    from tools.vector_store import get_corpus_version
+    return f"{LLM_MODEL_NAME}|{source}|{get_corpus_version()}"
+
+def _namespaces() -> list:
+    return [_namespace(source) for source in sorted(CACHEABLE_SOURCES)]
+
+class CacheLookupAgent:
+    @staticmethod
+    def _cacheable(state: AgentState) -> bool:
+        # Decided once, before this turn adds to the history, and reused by CacheStoreAgent
+        eligible = not is_context_dependent(state["question"], state.get("conversation_history"))
+        if not eligible:
+            get_semantic_cache().record_skip()
+        return eligible
+
+    @staticmethod
+    def _record(eligible: bool, entry) -> dict:
+        update = {"cache_eligible": eligible, "cache_hit": entry is not None}
+        if entry is not None:
+            update.update(generation=entry.answer, source=entry.source, conversation_history=[doctor_turn(entry.answer)])
+        return update
+
+    @classmethod
+    def process(cls, state: AgentState) -> dict:
+        entry = None
+        eligible = cls._cacheable(state)
+        if eligible:
+            try:
+                vector = get_resource("embeddings").embed_query(normalize_question(state["question"]))
+                entry = get_semantic_cache().lookup(vector, *_namespaces())
+            except Exception as e:
+                record_exception(e)
+                entry = None
+        return cls._record(eligible, entry)
+
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> dict:
+        entry = None
+        eligible = cls._cacheable(state)
+        if eligible:
+            try:
+                embeddings = await aget_resource("embeddings")
+                vector = await embeddings.aembed_query(normalize_question(state["question"]))
+                entry = get_semantic_cache().lookup(vector, *_namespaces())
+            except Exception as e:
+                record_exception(e)
+                entry = None
+        return cls._record(eligible, entry)
+
+class CacheStoreAgent:
+    @staticmethod
+    def _should_store(state: AgentState) -> bool:
+        return (
+            state.get("cache_eligible", False)
+            and not state.get("cache_hit", False)
+            and state.get("source") in CACHEABLE_SOURCES
+            and bool(state.get("generation"))
+        )
+
+    @classmethod
+    def process(cls, state: AgentState) -> dict:
+        if cls._should_store(state):
+            try:
+                # Same text as the lookup, so the embedding cache answers this without a forward pass
+                vector = get_resource("embeddings").embed_query(normalize_question(state["question"]))
+                get_semantic_cache().store(vector, state["question"], state["generation"], state["source"], _namespace(state["source"]))
+            except Exception as e:
+                record_exception(e)
+        return {}
+
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> dict:
+        if cls._should_store(state):
+            try:
+                embeddings = await aget_resource("embeddings")
+                vector = await embeddings.aembed_query(normalize_question(state["question"]))
+                get_semantic_cache().store(vector, state["question"], state["generation"], state["source"], _namespace(state["source"]))
+            except Exception as e:
+                record_exception(e)
+        return {}
@@ -1,25 +1,76 @@
 # agents/duckduckgo_agent.py
-from langchain_community.tools.ddg_search.tool import DuckDuckGoSearchRun
+import asyncio
+import os
+from core.instrumentation import record_exception
+from core.resources import aget_resource
+from core.resources import get_resource
+from core.resources import register_resource
 from core.state import AgentState
+from core.state import document_refs
 from langchain.schema import Document
+from tools.search_cache import CachedSearch
+from tools.web_search import DuckDuckGoSearch
+
+DDG_TIMEOUT = float(os.getenv("MEDIGENIUS_DDG_TIMEOUT", "8"))
+
+def _build_ddg_search():
+    return DuckDuckGoSearch(timeout=DDG_TIMEOUT)
+
+register_resource("duckduckgo", _build_ddg_search, required=False)
+
+async def _asearch(query: str) -> str:
+    client = await aget_resource("duckduckgo")
+    return await client.arun(query)
+
+# Cached on disk, bounded by a timeout and short-circuited while DuckDuckGo keeps failing
+ddg_search = CachedSearch(
+    "duckduckgo",
+    lambda query: get_resource("duckduckgo").run(query),
+    timeout=DDG_TIMEOUT,
+    asearch=_asearch
+)
 
 class DuckDuckGoAgent:
-    ddg_search = DuckDuckGoSearchRun()
-    
+    @staticmethod
+    def search(question: str, timeout: float = None) -> str:
+        return ddg_search.run(question, timeout)
+
+    @classmethod
+    def fetch(cls, state: AgentState, timeout: float = None) -> list:
+        # Under overload only answers already cached are used; `timeout` caps the lookup
+        content = ddg_search.cached(state["question"]) if state.get("degraded") else cls.search(state["question"], timeout)
+        return cls._documents(content)
+
+    @staticmethod
+    def _documents(content: str) -> list:
+        return [Document(page_content=content, metadata={"source": "duckduckgo"})] if content else []
+
+    @classmethod
+    async def afetch(cls, state: AgentState) -> list:
+        # The lookup itself is async HTTP; only the local cache read goes to a thread
+        if state.get("degraded"):
+            content = await asyncio.to_thread(ddg_search.cached, state["question"])
+        else:
+            content = await ddg_search.arun(state["question"])
+        return cls._documents(content)
+
+    @staticmethod
+    def _record(state: AgentState, docs: list) -> dict:
+        # Appended, so weaker evidence found earlier (low-scoring local chunks) is not lost
+        return {"documents": state.get("documents", []) + document_refs(docs), "ddg_success": bool(docs)}
+
+    @classmethod
+    def process(cls, state: AgentState) -> dict:
+        try:
+            return cls._record(state, cls.fetch(state))
+        except Exception as e:
+            record_exception(e)
+            return {"ddg_success": False}
+
     @classmethod
-    def process(cls, state: AgentState) -> AgentState:
+    async def aprocess(cls, state: AgentState) -> dict:
         try:
-            content = cls.ddg_search.run(state["question"])
-            if content:
-                state["documents"] = [Document(page_content=content)]
-                state["ddg_success"] = True
-                state["conversation_history"].append("AI: Retrieved information from DuckDuckGo.")
-            else:
-                state["documents"] = []
-                state["ddg_success"] = False
-        except Exception:
-            state["documents"] = []
-            state["ddg_success"] = False
-
-        state["ddg_attempted"] = True
-        return state
\ No newline at end of file
+            return cls._record(state, await cls.afetch(state))
+        except Exception as e:
+            record_exception(e)
+            return {"ddg_success": False}
@@ -1,25 +1,31 @@
 # agents/executor_agent.py
-from tools.llm_client import get_llm
+import asyncio
+from core.context_builder import build_context
+from core.instrumentation import record_context
+from core.instrumentation import record_llm_usage
+from core.memory import doctor_turn
+from core.memory import render_history
+from core.resources import aget_resource
+from core.resources import get_resource
 from core.state import AgentState
+from core.state import load_documents
 
-class ExecutorAgent:
-    llm = get_llm()
-    
-    @classmethod
-    def process(cls, state: AgentState) -> AgentState:
-        context = state.get("conversation_history", [])
-        question = state["question"]
+FALLBACK_ANSWER = "I couldn't find enough information to answer your question right now. Please consult a licensed medical professional."
 
-        # Use docs if available
-        if state.get("documents") and len(state["documents"]) > 0:
-            content = "\n".join([doc.page_content for doc in state["documents"]])
-            prompt = f"""You are a kind, highly experienced professional medical doctor speaking directly with a patient. Be clear, supportive and concise like human response.
+class ExecutorAgent:
+    @staticmethod
+    def build_prompt(state: AgentState) -> str:
+        context = render_history(state.get("conversation_history", []), "executor", state["question"])
+        evidence = build_context(state["question"], load_documents(state.get("documents")))
+        record_context(evidence)
+        content = evidence["text"]
+        return f"""You are a kind, highly experienced professional medical doctor speaking directly with a patient. Be clear, supportive and concise like human response.
 
 Conversation Context:
-{"".join(context[-6:])}
+{context}
 
 Patient's Question:
-{question}
+{state["question"]}
 
 Relevant Medical Information:
 {content}
@@ -29,21 +35,44 @@ Guidelines:
 - Do not mention sources.
 - Speak like a caring human doctor."""
 
-            response = cls.llm.invoke(prompt)
-            answer = response.content.strip()
-            state["generation"] = answer
-            state["source"] = "retrieved_docs"
-            state["conversation_history"].append(f"Doctor: {answer}")
-            return state
+    @staticmethod
+    def _record_generation(answer: str) -> dict:
+        return {"generation": answer, "source": "retrieved_docs", "conversation_history": [doctor_turn(answer)]}
 
+    @staticmethod
+    def _finish_without_docs(state: AgentState) -> dict:
         # If no docs but LLM succeeded earlier, use that generation
         if state.get("llm_success", False) and state.get("generation"):
-            state["conversation_history"].append(f"Doctor: {state['generation']}")
-            state["source"] = "llm_knowledge"
-            return state
-
-        # Otherwise fallback response
-        state["generation"] = "I couldn't find enough information to answer your question right now. Please consult a licensed medical professional."
-        state["source"] = "none"
-        state["conversation_history"].append(state["generation"])
-        return state
\ No newline at end of file
+            answer, source = state["generation"], "llm_knowledge"
+        else:
+            # Otherwise fallback response
+            answer, source = FALLBACK_ANSWER, "none"
+        return {"generation": answer, "source": source, "conversation_history": [doctor_turn(answer)]}
+
+    @staticmethod
+    def _needs_generation(state: AgentState) -> bool:
+        # An answer the LLM agent already produced this turn is never regenerated,
+        # so a turn costs at most one completion call.
+        if state.get("llm_success", False) and state.get("generation"):
+            return False
+        return bool(state.get("documents"))
+
+    @classmethod
+    def process(cls, state: AgentState) -> dict:
+        # Use docs if available
+        if cls._needs_generation(state):
+            response = get_resource("llm").invoke(cls.build_prompt(state))
+            record_llm_usage(response)
+            return cls._record_generation(response.content.strip())
+        return cls._finish_without_docs(state)
+
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> dict:
+        if cls._needs_generation(state):
+            # Scoring the evidence runs the embedding model; keep it off the event loop
+            prompt = await asyncio.to_thread(cls.build_prompt, state)
+            llm = await aget_resource("llm")
+            response = await llm.ainvoke(prompt)
+            record_llm_usage(response)
+            return cls._record_generation(response.content.strip())
+        return cls._finish_without_docs(state)
@@ -3,7 +3,10 @@ from core.state import AgentState
 
 class ExplanationAgent:
     @staticmethod
-    def process(state: AgentState) -> AgentState:
+    def process(state: AgentState) -> dict:
         explanation = "This response is generated using a combination of medical literature and AI reasoning."
-        state["conversation_history"].append(f"AI Explanation: {explanation}")
-        return state
\ No newline at end of file
+        return {"answer_note": explanation}
+
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> dict:
+        return cls.process(state)
@@ -0,0 +1,136 @@
+# agents/fanout_agent.py
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from core.instrumentation import record_exception
+from core.state import AgentState
+from core.state import document_refs
+from .retriever_agent import RetrieverAgent
+from .wikipedia_agent import WikipediaAgent
+from .duckduckgo_agent import DuckDuckGoAgent
+
+# Sources in priority order: (state key prefix, label, agent, deadline in seconds)
+SOURCES = [
+    ("rag", "medical PDF database", RetrieverAgent, float(os.getenv("MEDIGENIUS_RAG_DEADLINE", "3"))),
+    ("wiki", "Wikipedia", WikipediaAgent, float(os.getenv("MEDIGENIUS_WIKI_DEADLINE", "6"))),
+    ("ddg", "DuckDuckGo", DuckDuckGoAgent, float(os.getenv("MEDIGENIUS_DDG_DEADLINE", "6"))),
+]
+MAX_MERGED_DOCUMENTS = 6
+
+# Shared by all sync turns, one thread per source: the default serves four turns
+# at once. Running threads can't be cancelled, so each branch is handed its
+# deadline and gives its thread back by then; later turns queue behind them.
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("MEDIGENIUS_FANOUT_THREADS", str(4 * len(SOURCES)))), thread_name_prefix="fanout")
+
+class FanOutRetrievalAgent:
+    """Queries local RAG, Wikipedia and DuckDuckGo concurrently.
+
+    The turn waits only until the highest-priority source still in play has
+    answered: as soon as every source ranked above a successful one has
+    failed or missed its deadline, the remaining branches are cancelled and
+    the results gathered so far are merged by priority.
+    """
+
+    @staticmethod
+    def _sufficient(results: dict) -> bool:
+        for key, _, _, _ in SOURCES:
+            if key not in results:
+                return False
+            if results[key]:
+                return True
+        return True
+
+    @staticmethod
+    def _record(results: dict) -> dict:
+        update, merged, seen = {}, [], set()
+        for key, _, _, _ in SOURCES:
+            docs = results.get(key)
+            update[f"{key}_success"] = bool(docs)
+            if not docs:
+                continue
+            if key == "rag":
+                update["rag_score"] = max(doc.metadata.get("score", 0.0) for doc in docs)
+            for doc in docs:
+                fingerprint = hashlib.sha1(" ".join(doc.page_content.split()).lower().encode("utf-8")).hexdigest()
+                if fingerprint not in seen:
+                    seen.add(fingerprint)
+                    merged.append(doc)
+
+        update["documents"] = document_refs(merged[:MAX_MERGED_DOCUMENTS])
+        return update
+
+    @staticmethod
+    def _fetch(agent, state: AgentState, deadline: float) -> list:
+        # Web lookups stop waiting at the deadline; a branch queued past it is skipped
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return []
+        return agent.fetch(state, timeout=remaining)
+
+    @classmethod
+    def process(cls, state: AgentState) -> dict:
+        start = time.monotonic()
+        pending = {
+            _pool.submit(cls._fetch, agent, state, start + deadline): (key, deadline)
+            for key, _, agent, deadline in SOURCES
+        }
+        results = {}
+
+        while pending and not cls._sufficient(results):
+            next_deadline = min(start + deadline for _, deadline in pending.values())
+            done, _ = wait(pending, timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                key, _ = pending.pop(future)
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    record_exception(e)
+                    results[key] = []
+            now = time.monotonic()
+            for future, (key, deadline) in list(pending.items()):
+                if now >= start + deadline:
+                    future.cancel()
+                    pending.pop(future)
+                    results[key] = []
+
+        for future in pending:
+            future.cancel()
+        return cls._record(results)
+
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> dict:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        pending = {
+            asyncio.ensure_future(agent.afetch(state)): (key, deadline)
+            for key, _, agent, deadline in SOURCES
+        }
+        results = {}
+
+        try:
+            while pending and not cls._sufficient(results):
+                next_deadline = min(start + deadline for _, deadline in pending.values())
+                done, _ = await asyncio.wait(
+                    pending, timeout=max(0.0, next_deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    key, _ = pending.pop(task)
+                    if task.exception():
+                        record_exception(task.exception())
+                        results[key] = []
+                    else:
+                        results[key] = task.result()
+                now = loop.time()
+                for task, (key, deadline) in list(pending.items()):
+                    if now >= start + deadline:
+                        task.cancel()
+                        pending.pop(task)
+                        results[key] = []
+        finally:
+            for task in pending:
+                task.cancel()
+        return cls._record(results)
@@ -1,15 +1,16 @@
 # agents/llm_agent.py
-from tools.llm_client import get_llm
+from core.instrumentation import record_exception
+from core.instrumentation import record_llm_usage
+from core.memory import render_history
+from core.resources import aget_resource
+from core.resources import get_resource
 from core.state import AgentState
 
 class LLMAgent:
-    llm = get_llm()
-    
-    @classmethod
-    def process(cls, state: AgentState) -> AgentState:
-        try:
-            ctx = "\n".join(state.get("conversation_history", [])[-10:])
-            prompt = f"""You are a compassionate and knowledgeable medical AI assistant and doctor helping a patient. Your conversational skill should be a professional consultant with a human touch.
+    @staticmethod
+    def build_prompt(state: AgentState) -> str:
+        ctx = render_history(state.get("conversation_history", []), "llm", state["question"])
+        return f"""You are a compassionate and knowledgeable medical AI assistant and doctor helping a patient. Your conversational skill should be a professional consultant with a human touch.
 
 Patient's History:
 {ctx}
@@ -19,16 +20,29 @@ Patient's Question:
 
 Respond like an experienced doctor in 2–3 sentences. Be clear, professional, and confident. Do not mention sources or uncertainty."""
 
-            response = cls.llm.invoke(prompt)
-            answer = response.content.strip()
+    @staticmethod
+    def _record(answer: str) -> dict:
+        if answer:
+            return {"generation": answer, "llm_success": True}
+        return {"llm_success": False}
 
-            if answer:
-                state["generation"] = answer
-                state["llm_success"] = True
-            else:
-                state["llm_success"] = False
-        except Exception:
-            state["llm_success"] = False
+    @classmethod
+    def process(cls, state: AgentState) -> dict:
+        try:
+            response = get_resource("llm").invoke(cls.build_prompt(state))
+            record_llm_usage(response)
+            return cls._record(response.content.strip())
+        except Exception as e:
+            record_exception(e)
+            return {"llm_success": False}
 
-        state["llm_attempted"] = True
-        return state
\ No newline at end of file
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> dict:
+        try:
+            llm = await aget_resource("llm")
+            response = await llm.ainvoke(cls.build_prompt(state))
+            record_llm_usage(response)
+            return cls._record(response.content.strip())
+        except Exception as e:
+            record_exception(e)
+            return {"llm_success": False}
@@ -1,11 +1,20 @@
 # agents/memory_agent.py
+from core.memory import compact_history
 from core.state import AgentState
+from core.state import MAX_HISTORY
+from core.state import ReplaceTurns
 
 class MemoryAgent:
     @staticmethod
-    def process(state: AgentState) -> AgentState:
+    def process(state: AgentState) -> dict:
+        # One slot stays free for this turn's answer, so saving the session
+        # never trims a turn that wasn't folded into the summary
         history = state.get("conversation_history", [])
-        if len(history) > 20:
-            history = history[-20:]  # keep last 20 messages
-        state["conversation_history"] = history
-        return state
\ No newline at end of file
+        compacted = compact_history(history, MAX_HISTORY - 1)
+        if compacted == history:
+            return {}
+        return {"conversation_history": ReplaceTurns(compacted)}
+
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> dict:
+        return cls.process(state)
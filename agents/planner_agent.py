@@ -1,16 +1,13 @@
 # agents/planner_agent.py
 from core.state import AgentState
+from core.state import initialize_turn
 
 class PlannerAgent:
     @staticmethod
-    def process(state: AgentState) -> AgentState:
-        question = state["question"].lower()
-        medical_keywords = ["pain", "fever", "treatment", "symptom", "diagnosis", 
-                          "cancer", "disease", "virus", "bacteria", "infection"]
+    def process(state: AgentState) -> dict:
+        # Start every turn from clean scratch fields
+        return initialize_turn()
 
-        if any(word in question for word in medical_keywords):
-            state["current_tool"] = "llm"
-        else:
-            state["current_tool"] = "llm"
-        state["retry_count"] = 0
-        return state
\ No newline at end of file
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> dict:
+        return cls.process(state)
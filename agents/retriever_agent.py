@@ -1,28 +1,55 @@
 # agents/retriever_agent.py
-from tools.vector_store import get_retriever
+from core.instrumentation import record_exception
+from core.memory import render_history
+from core.resources import aget_resource
+from core.resources import get_resource
 from core.state import AgentState
+from core.state import document_refs
+from core.state import top_score
+from tools.semantic_cache import is_context_dependent
 
 class RetrieverAgent:
-    retriever = get_retriever()
-    
-    @classmethod
-    def process(cls, state: AgentState) -> AgentState:
+    @staticmethod
+    def build_query(state: AgentState) -> str:
         query = state["question"]
-        context = "\n".join(state.get("conversation_history", [])[-6:])
-        combined_query = f"Context: {context}\nQuestion: {query}"
+        history = state.get("conversation_history", [])
+        # A standalone question is embedded on its own, so the same question
+        # hits the query and retrieval caches whatever was said before it
+        if not is_context_dependent(query, history):
+            return query
+        context = render_history(history, "retriever", query)
+        return f"Context: {context}\nQuestion: {query}" if context else query
+
+    # Documents come back with their relevance in metadata["score"]; the bare
+    # question doubles as the keyword query for hybrid retrieval. The search is
+    # local and short, so the fan-out's `timeout` is accepted but not needed
+    @classmethod
+    def fetch(cls, state: AgentState, timeout: float = None) -> list:
+        retriever = get_resource("retriever")
+        return [doc for doc, _ in retriever.search_with_scores(cls.build_query(state), state["question"])]
+
+    @classmethod
+    async def afetch(cls, state: AgentState) -> list:
+        retriever = await aget_resource("retriever")
+        return [doc for doc, _ in await retriever.asearch_with_scores(cls.build_query(state), state["question"])]
 
+    @staticmethod
+    def _record(docs) -> dict:
+        refs = document_refs(docs)
+        return {"documents": refs, "rag_success": bool(refs), "rag_score": top_score(refs)}
+
+    @classmethod
+    def process(cls, state: AgentState) -> dict:
         try:
-            docs = cls.retriever.invoke(combined_query)
-            if docs and len(docs) > 0:
-                state["documents"] = docs
-                state["rag_success"] = True
-                state["conversation_history"].append("AI: Retrieved documents from medical PDF database.")
-            else:
-                state["documents"] = []
-                state["rag_success"] = False
-        except Exception:
-            state["documents"] = []
-            state["rag_success"] = False
+            return cls._record(cls.fetch(state))
+        except Exception as e:
+            record_exception(e)
+            return {"documents": [], "rag_success": False}
 
-        state["rag_attempted"] = True
-        return state
\ No newline at end of file
+    @classmethod
+    async def aprocess(cls, state: AgentState) -> dict:
+        try:
+            return cls._record(await cls.afetch(state))
+        except Exception as e:
+            record_exception(e)
+            return {"documents": [], "rag_success": False}
@@ -1,29 +1,76 @@
 # agents/wikipedia_agent.py
-from langchain_community.utilities.wikipedia import WikipediaAPIWrapper
+import asyncio
+import os
+from core.instrumentation import record_exception
+from core.resources import aget_resource
+from core.resources import get_resource
+from core.resources import register_resource
 from core.state import AgentState
+from core.state import document_refs
 from langchain.schema import Document
+from tools.search_cache import CachedSearch
+from tools.web_search import WikipediaSearch
+
+WIKI_TIMEOUT = float(os.getenv("MEDIGENIUS_WIKI_TIMEOUT", "8"))
+
+def _build_wiki():
+    return WikipediaSearch(top_k_results=2, doc_content_chars_max=2000, timeout=WIKI_TIMEOUT)
+
+register_resource("wikipedia", _build_wiki, required=False)
+
+async def _asearch(query: str) -> str:
+    client = await aget_resource("wikipedia")
+    return await client.arun(query)
+
+# Cached on disk, bounded by a timeout and short-circuited while Wikipedia keeps failing
+wiki_search = CachedSearch(
+    "wikipedia",
+    lambda query: get_resource("wikipedia").run(query),
+    timeout=WIKI_TIMEOUT,
+    asearch=_asearch
+)
 
 class WikipediaAgent:
-    wiki = WikipediaAPIWrapper(
-        top_k_results=2,
-        doc_content_chars_max=2000,
-        load_all_available_meta=True
-    )
-    
+    @staticmethod
+    def search(question: str, timeout: float = None) -> str:
+        return wiki_search.run(question, timeout)
+
+    @classmethod
+    def fetch(cls, state: AgentState, timeout: float = None) -> list:
+        # Under overload only answers already cached are used; `timeout` caps the lookup
+        content = wiki_search.cached(state["question"]) if state.get("degraded") else cls.search(state["question"], timeout)
+        return cls._documents(content)
+
+    @staticmethod
+    def _documents(content: str) -> list:
+        return [Document(page_content=content, metadata={"source": "wikipedia"})] if content else []
+
+    @classmethod
+    async def afetch(cls, state: AgentState) -> list:
+        # The lookup itself is async HTTP; only the local cache read goes to a thread
+        if state.get("degraded"):
+            content = await asyncio.to_thread(wiki_search.cached, state["question"])
+        else:
+            content = await wiki_search.arun(state["question"])
+        return cls._documents(content)
+
+    @staticmethod
+    def _record(state: AgentState, docs: list) -> dict:
+        # Appended, so weaker evidence found earlier (low-scoring local chunks) is not lost
+        return {"documents": state.get("documents", []) + document_refs(docs), "wiki_success": bool(docs)}
+
+    @classmethod
+    def process(cls, state: AgentState) -> dict:
+        try:
+            return cls._record(state, cls.fetch(state))
+        except Exception as e:
+            record_exception(e)
+            return {"wiki_success": False}
+
     @classmethod
-    def process(cls, state: AgentState) -> AgentState:
+    async def aprocess(cls, state: AgentState) -> dict:
         try:
-            content = cls.wiki.run(state["question"])
-            if content:
-                state["documents"] = [Document(page_content=content)]
-                state["wiki_success"] = True
-                state["conversation_history"].append("AI: Retrieved information from Wikipedia.")
-            else:
-                state["documents"] = []
-                state["wiki_success"] = False
-        except Exception:
-            state["documents"] = []
-            state["wiki_success"] = False
-
-        state["wiki_attempted"] = True
-        return state
\ No newline at end of file
+            return cls._record(state, await cls.afetch(state))
+        except Exception as e:
+            record_exception(e)
+            return {"wiki_success": False}
@@ -1,11 +1,38 @@
 # api.py
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
+import asyncio
+import json
 import os
+from agents.duckduckgo_agent import ddg_search
+from agents.wikipedia_agent import wiki_search
+from core.admission import Overloaded
+from core.admission import get_admission
+from core.admission import priority_for
+from core.batch import BATCH_CONCURRENCY
+from core.batch import MAX_BATCH_CONCURRENCY
+from core.batch import Progress
+from core.batch import arun_batch
+from core.batch import read_items
+from core.instrumentation import recent_traces
+from core.instrumentation import render_metrics
+from core.instrumentation import trace_request
 from core.langgraph_workflow import setup_workflow
-from core.state import initialize_state
+from core.resources import WARMUP_ENABLED
+from core.resources import registry
+from core.session_store import create_session_store
+from core.session_store import new_session_id
+from core.state import new_turn
+from core.streaming import aiter_events
+from core.streaming import format_sse
+from tools.llm_client import get_llm
+from tools.llm_client import llm_session
+from tools.semantic_cache import get_semantic_cache
+from tools.vector_store import get_retrieval_cache
 from pydantic import BaseModel
 
 app = FastAPI(title="Medical AI Assistant API")
@@ -21,8 +48,50 @@ app.add_middleware(
 # Initialize workflow
 workflow = setup_workflow()
 
-# Session storage (in production, use Redis or database)
-sessions = {}
+# Session storage: SQLite shared by all workers (default), or an in-memory LRU per worker
+sessions = create_session_store()
+
+@app.on_event("startup")
+async def warmup_resources():
+    # Load models in the background so the port opens immediately
+    if WARMUP_ENABLED:
+        registry.warmup(background=True)
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    is_ready = registry.probe()
+    return JSONResponse(
+        {"ready": is_ready, "resources": registry.status()},
+        status_code=200 if is_ready else 503
+    )
+
+@app.get("/cache/stats")
+async def cache_stats():
+    stats = get_semantic_cache().stats()
+    stats["search"] = {"wikipedia": wiki_search.stats(), "duckduckgo": ddg_search.stats()}
+    stats["retrieval"] = get_retrieval_cache().stats()
+    return stats
+
+@app.get("/admission/stats")
+async def admission_stats():
+    return get_admission().stats()
+
+@app.get("/llm/stats")
+async def llm_stats():
+    return get_llm().stats()
+
+@app.get("/metrics")
+async def metrics():
+    # Per-process; scrape every worker or run a single worker per container
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/traces")
+async def traces(limit: int = 20):
+    return {"traces": recent_traces(limit)}
 
 class ChatRequest(BaseModel):
     message: str
@@ -33,35 +102,56 @@ class ChatResponse(BaseModel):
     timestamp: str
     conversation_id: str
 
+async def prepare_conversation(chat_request: ChatRequest):
+    # Get or create conversation; the store may hit SQLite, so not on the event loop
+    history = None
+    if chat_request.conversation_id:
+        history = await asyncio.to_thread(sessions.get_history, chat_request.conversation_id)
+    if history is None:
+        history = []
+        chat_request.conversation_id = new_session_id()
+
+    # A fresh state per turn with the patient's message as the newest turn
+    return new_turn(chat_request.message, history)
+
+async def finish_conversation(chat_request: ChatRequest, result: dict):
+    # The graph returns the compacted history with this turn's answer appended
+    await asyncio.to_thread(sessions.save_history, chat_request.conversation_id, result.get("conversation_history", []))
+
+def overloaded_response(e: Overloaded):
+    return JSONResponse({"detail": str(e)}, status_code=e.status_code, headers=e.headers)
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """Releases its admission ticket however the response ends.
+
+    A client that disconnects before the body generator starts, or while it
+    is suspended at a `yield`, never runs the generator's `finally`, so the
+    release is also tied to the response itself (like Flask's call_on_close).
+    """
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
 @app.post("/chat")
 async def chat_handler(chat_request: ChatRequest):
     try:
-        # Get or create conversation
-        if chat_request.conversation_id and chat_request.conversation_id in sessions:
-            conversation_data = sessions[chat_request.conversation_id]
-        else:
-            conversation_id = datetime.now().strftime("%Y%m%d%H%M%S")
-            conversation_data = {
-                "history": [],
-                "state": initialize_state()
-            }
-            sessions[conversation_id] = conversation_data
-            chat_request.conversation_id = conversation_id
-
-        # Update conversation history
-        conversation_data["history"].append(f"User: {chat_request.message}")
-        
-        # Prepare state
-        conversation_data["state"].update({
-            "question": chat_request.message,
-            "conversation_history": conversation_data["history"]
-        })
+        state = await prepare_conversation(chat_request)
 
-        # Process through workflow
-        result = workflow.invoke(conversation_data["state"])
+        # Wait for a slot, or fail fast with 429/503 when the queue can't take the request
+        async with get_admission().aadmit(priority_for(state)) as ticket:
+            state["degraded"] = ticket.degraded
+            with trace_request("chat"), llm_session(chat_request.conversation_id):
+                result = await workflow.ainvoke(state)
         
         # Update history with response
-        conversation_data["history"].append(f"Doctor: {result.get('generation', '')}")
+        await finish_conversation(chat_request, result)
         
         return JSONResponse({
             "response": result.get("generation", "I couldn't generate a response."),
@@ -69,9 +159,62 @@ async def chat_handler(chat_request: ChatRequest):
             "conversation_id": chat_request.conversation_id
         })
         
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat/stream")
+async def chat_stream_handler(chat_request: ChatRequest):
+    state = await prepare_conversation(chat_request)
+    admission = get_admission()
+    try:
+        # Admitted before the response starts, so a rejection is still a plain 429/503
+        ticket = await admission.aacquire(priority_for(state))
+    except Overloaded as e:
+        return overloaded_response(e)
+    state["degraded"] = ticket.degraded
+
+    async def event_stream():
+        yield format_sse({"event": "start", "conversation_id": chat_request.conversation_id})
+        try:
+            result = {}
+            with trace_request("stream"), llm_session(chat_request.conversation_id):
+                async for event in aiter_events(workflow, state, result):
+                    if event["event"] == "done":
+                        await finish_conversation(chat_request, result)
+                        event["conversation_id"] = chat_request.conversation_id
+                    yield format_sse(event)
+        except Exception as e:
+            yield format_sse({"event": "error", "detail": str(e)})
+        finally:
+            # Frees the slot as soon as the graph is done, before the response closes
+            admission.release(ticket)
+
+    return AdmittedStreamingResponse(
+        event_stream(),
+        lambda: admission.release(ticket),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/batch")
+async def batch_handler(request: Request, concurrency: int = Query(BATCH_CONCURRENCY, ge=1, le=MAX_BATCH_CONCURRENCY)):
+    """Answer a JSONL body of questions, streaming one JSON answer per line as each finishes."""
+    try:
+        items = read_items((await request.body()).decode("utf-8").splitlines())
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSONL: {e}")
+    progress = Progress(len(items), out=None)
+
+    async def answers():
+        # Every graph run queues behind live conversations in admission control
+        async for record in arun_batch(workflow, items, concurrency, get_admission(), progress):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+        yield json.dumps({"summary": progress.summary()}) + "\n"
+
+    return StreamingResponse(answers(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,48 +1,120 @@
 # app.py
 from flask import Flask
+from flask import Response
 from flask import render_template
 from flask import request
 from flask import jsonify
-from flask import session
+from flask import stream_with_context
+from core.admission import Overloaded
+from core.admission import get_admission
+from core.admission import priority_for
 from core.langgraph_workflow import setup_workflow
-from core.state import initialize_state
+from core.resources import WARMUP_ENABLED
+from core.resources import registry
+from core.session_store import create_session_store
+from core.session_store import new_session_id
+from core.state import new_turn
+from core.streaming import format_sse
+from core.streaming import iter_events
+from tools.llm_client import llm_session
 from datetime import datetime
 import os
-from pathlib import Path
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+
+# The cookie carries only the conversation ID; history lives server-side in a
+# store every gunicorn worker shares (SQLite by default).
+CONVERSATION_COOKIE = 'conversation_id'
+sessions = create_session_store()
 
 # Initialize the workflow
 workflow = setup_workflow()
 
+# Load models in the background so the worker starts serving immediately
+if WARMUP_ENABLED:
+    registry.warmup(background=True)
+
+def load_conversation():
+    conversation_id = request.cookies.get(CONVERSATION_COOKIE)
+    history = sessions.get_history(conversation_id) if conversation_id else None
+    if history is None:
+        return new_session_id(), []
+    return conversation_id, history
+
+def set_conversation_cookie(response, conversation_id):
+    response.set_cookie(CONVERSATION_COOKIE, conversation_id, httponly=True, samesite='Lax')
+    return response
+
+def prepare_state(user_input, history):
+    return new_turn(user_input, history)
+
 @app.route('/')
 def home():
-    session['conversation_id'] = datetime.now().strftime("%Y%m%d%H%M%S")
-    return render_template('index.html')
+    # Every page load starts a new consultation
+    response = app.make_response(render_template('index.html'))
+    return set_conversation_cookie(response, new_session_id())
+
+@app.route('/health')
+def health():
+    return jsonify({'status': 'ok'})
+
+@app.route('/ready')
+def ready():
+    is_ready = registry.probe()
+    return jsonify({'ready': is_ready, 'resources': registry.status()}), 200 if is_ready else 503
 
 @app.route('/chat', methods=['POST'])
 def chat():
     user_input = request.json['message']
-    conversation_state = initialize_state()
-    
-    if 'history' not in session:
-        session['history'] = []
+    conversation_id, history = load_conversation()
+    conversation_state = prepare_state(user_input, history)
     
-    session['history'].append(f"User: {user_input}")
+    try:
+        with get_admission().admit(priority_for(conversation_state)) as ticket:
+            conversation_state["degraded"] = ticket.degraded
+            with llm_session(conversation_id):
+                result = workflow.invoke(conversation_state)
+    except Overloaded as e:
+        return jsonify({'error': str(e)}), e.status_code, e.headers
+    sessions.save_history(conversation_id, result.get("conversation_history", []))
     
-    conversation_state.update({
-        "question": user_input,
-        "conversation_history": session['history']
-    })
-    
-    result = workflow.invoke(conversation_state)
-    session['history'].append(f"Doctor: {result.get('generation', '')}")
-    
-    return jsonify({
+    response = jsonify({
         'response': result.get("generation", "I couldn't generate a response."),
         'timestamp': datetime.now().strftime("%H:%M")
     })
+    return set_conversation_cookie(response, conversation_id)
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    user_input = request.json['message']
+    conversation_id, history = load_conversation()
+    conversation_state = prepare_state(user_input, history)
+    admission = get_admission()
+    try:
+        ticket = admission.acquire(priority_for(conversation_state))
+    except Overloaded as e:
+        return jsonify({'error': str(e)}), e.status_code, e.headers
+    conversation_state["degraded"] = ticket.degraded
+
+    def generate():
+        try:
+            result = {}
+            with llm_session(conversation_id):
+                for event in iter_events(workflow, conversation_state, result):
+                    if event['event'] == 'done':
+                        sessions.save_history(conversation_id, result.get('conversation_history', []))
+                    yield format_sse(event)
+        except Exception as e:
+            yield format_sse({'event': 'error', 'detail': str(e)})
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Runs even if the client disconnects before the stream starts
+    response.call_on_close(lambda: admission.release(ticket))
+    return set_conversation_cookie(response, conversation_id)
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
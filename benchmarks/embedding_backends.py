@@ -0,0 +1,139 @@
+# benchmarks/embedding_backends.py
+"""Compare the torch and int8 ONNX embedding backends.
+
+Loads each backend in a fresh process and reports startup time (imports plus
+model load plus first query), resident memory, per-query latency, batched
+throughput, and how close its vectors are to the torch backend's.
+
+    python -m tools.onnx_embeddings export     # once, builds the ONNX artifact
+    python -m benchmarks.embedding_backends --queries 200 --output embedding_backends.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from benchmarks.common import PROJECT_ROOT
+from benchmarks.common import latency_summary
+from benchmarks.common import rss_mb
+from benchmarks.micro import synthetic_text
+
+QUERIES_PATH = PROJECT_ROOT / "benchmarks" / "queries.jsonl"
+
+def load_questions(count: int) -> list:
+    with open(QUERIES_PATH, encoding="utf-8") as f:
+        questions = [json.loads(line)["question"] for line in f if line.strip()]
+    # Numbered so repeats are distinct texts; no backend gets cache hits
+    return [f"{questions[i % len(questions)]} ({i})" for i in range(count)]
+
+def run_worker(backend: str, workdir: Path, batch_size: int) -> dict:
+    """Runs in a fresh process so startup time and RSS belong to one backend only."""
+    questions = json.loads((workdir / "questions.json").read_text(encoding="utf-8"))
+    passages = json.loads((workdir / "passages.json").read_text(encoding="utf-8"))
+    base_rss = rss_mb()
+
+    start = time.perf_counter()
+    from tools.embeddings import load_model
+    model = load_model(backend, batch_size=batch_size)
+    model.embed_query(questions[0])
+    startup_seconds = time.perf_counter() - start
+
+    latencies, vectors = [], []
+    for question in questions:
+        start = time.perf_counter()
+        vectors.append(model.embed_query(question))
+        latencies.append(time.perf_counter() - start)
+    np.save(workdir / f"{backend}.npy", np.asarray(vectors, dtype=np.float32))
+
+    start = time.perf_counter()
+    model.embed_documents(passages)
+    batch_seconds = time.perf_counter() - start
+
+    summary = latency_summary(latencies)
+    return {
+        "backend": backend,
+        "startup_ms": startup_seconds * 1000,
+        "p50_ms": summary["p50_ms"],
+        "p95_ms": summary["p95_ms"],
+        "passages_per_s": len(passages) / batch_seconds if batch_seconds else 0.0,
+        "rss_mb": rss_mb(),
+        "rss_delta_mb": rss_mb() - base_rss,
+    }
+
+def agreement(workdir: Path, backend: str, baseline: str = "torch") -> dict:
+    """Cosine of each query vector to the baseline's, and how often the nearest other query is the same."""
+    a, b = np.load(workdir / f"{backend}.npy"), np.load(workdir / f"{baseline}.npy")
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    cosines = np.sum(a * b, axis=1)
+    nearest = []
+    for vectors in (a, b):
+        similarity = vectors @ vectors.T
+        np.fill_diagonal(similarity, -np.inf)
+        nearest.append(similarity.argmax(axis=1))
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "nearest_neighbour_agreement": float(np.mean(nearest[0] == nearest[1])),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--passages", type=int, default=256, help="texts embedded in batches for throughput")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--backends", default="torch,onnx")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, Path(args.workdir), args.batch_size)))
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        (workdir / "questions.json").write_text(json.dumps(load_questions(args.queries)), encoding="utf-8")
+        passages = [text[:1000] for text in synthetic_text(args.passages)]
+        (workdir / "passages.json").write_text(json.dumps(passages), encoding="utf-8")
+
+        for backend in [b for b in args.backends.split(",") if b]:
+            process = subprocess.run(
+                [sys.executable, "-m", "benchmarks.embedding_backends", "--worker", backend, "--workdir", str(workdir),
+                 "--batch-size", str(args.batch_size)],
+                cwd=PROJECT_ROOT, capture_output=True, text=True, env=dict(os.environ)
+            )
+            if process.returncode != 0:
+                error = (process.stderr.strip().splitlines() or ["failed"])[-1]
+                print(f"{backend} backend skipped: {error}", file=sys.stderr)
+                continue
+            results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+        available = {result["backend"] for result in results}
+        for result in results:
+            if result["backend"] != "torch" and "torch" in available:
+                result["vs_torch"] = agreement(workdir, result["backend"])
+
+    report = {"queries": args.queries, "passages": args.passages, "batch_size": args.batch_size, "results": results}
+    for result in results:
+        line = (
+            f"{result['backend']:>6}: startup {result['startup_ms']:.0f} ms, p50 {result['p50_ms']:.2f} ms, "
+            f"p95 {result['p95_ms']:.2f} ms, {result['passages_per_s']:.0f} passages/s, "
+            f"RSS {result['rss_mb']:.0f} MB (+{result['rss_delta_mb']:.0f})"
+        )
+        if "vs_torch" in result:
+            line += (f", cosine to torch min {result['vs_torch']['min_cosine']:.4f}, "
+                     f"NN agreement {result['vs_torch']['nearest_neighbour_agreement']:.2f}")
+        print(line)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
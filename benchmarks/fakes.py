@@ -0,0 +1,111 @@
+# benchmarks/fakes.py
+"""Deterministic stand-ins for Groq, Wikipedia, DuckDuckGo, the retriever and the embedder.
+
+Each one sleeps for a configurable latency and derives its output from a hash
+of the input, so two runs over the same query corpus do identical work.
+"""
+import asyncio
+import re
+import time
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from tools.fake_llm import FakeChatModel
+from tools.fake_llm import stable_hash
+
+_WORDS = re.compile(r"[a-z0-9]+")
+
+class FakeSearch:
+    """Wikipedia/DuckDuckGo stand-in with the `run`/`arun(query) -> str` interface."""
+
+    def __init__(self, name: str, latency: float = 0.8, miss_rate: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self.miss_rate = miss_rate
+
+    def run(self, query: str) -> str:
+        time.sleep(self.latency)
+        return self._content(query)
+
+    def _content(self, query: str) -> str:
+        digest = stable_hash(f"{self.name}:{query}")
+        if (digest % 1000) / 1000 < self.miss_rate:
+            return ""
+        return f"{self.name} article {digest % 997}: background information about {query.strip()}."
+
+    async def arun(self, query: str) -> str:
+        await asyncio.sleep(self.latency)
+        return self._content(query)
+
+class FakeRetriever:
+    """Local retriever stand-in with the `search_with_scores` interface of the real one."""
+
+    def __init__(self, latency: float = 0.02, k: int = 3):
+        self.latency = latency
+        self.k = k
+
+    def _results(self, query: str, keywords: str = None):
+        digest = stable_hash(keywords or query)
+        top = 0.3 + (digest % 60) / 100
+        results = []
+        for rank in range(self.k):
+            score = round(top - 0.05 * rank, 3)
+            doc = Document(page_content=f"Medical reference chunk {(digest + rank) % 5000}.", metadata={"score": score, "source": "fake.pdf"})
+            results.append((doc, score))
+        return results
+
+    def search_with_scores(self, query: str, keywords: str = None):
+        time.sleep(self.latency)
+        return self._results(query, keywords)
+
+    async def asearch_with_scores(self, query: str, keywords: str = None):
+        await asyncio.sleep(self.latency)
+        return self._results(query, keywords)
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words vectors: cheap, deterministic, and similar for near-duplicate questions."""
+
+    def __init__(self, dim: int = 384, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+
+    def _vector(self, text: str):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _WORDS.findall(text.lower()):
+            vector[stable_hash(word) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_queries(self, texts):
+        return self.embed_documents(texts)
+
+    def embed_query(self, text):
+        time.sleep(self.latency)
+        return self._vector(text)
+
+    async def aembed_query(self, text):
+        await asyncio.sleep(self.latency)
+        return self._vector(text)
+
+def install_fakes(llm_latency: float = 0.4, wiki_latency: float = 0.8, ddg_latency: float = 0.6,
+                  retrieval_latency: float = 0.02, llm_failure_rate: float = 0.0, real_retriever: bool = False):
+    """Point the shared resource registry at the stand-ins."""
+    from core.resources import registry
+
+    from tools.llm_client import LLMGateway
+
+    # Through the real gateway, so its limits and bookkeeping are part of the measurement
+    registry.override("llm", lambda: LLMGateway(model=FakeChatModel(latency=llm_latency, failure_rate=llm_failure_rate)))
+    registry.override("wikipedia", lambda: FakeSearch("wikipedia", wiki_latency, miss_rate=0.3), required=False)
+    registry.override("duckduckgo", lambda: FakeSearch("duckduckgo", ddg_latency), required=False)
+    if not real_retriever:
+        import agents.cache_agent
+
+        registry.override("embeddings", FakeEmbeddings)
+        registry.override("retriever", lambda: FakeRetriever(retrieval_latency))
+        # Benchmark answers must not share cache keys with the real corpus version
+        agents.cache_agent._namespace = lambda source: f"benchmark|{source}"
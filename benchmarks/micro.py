@@ -0,0 +1,93 @@
+# benchmarks/micro.py
+"""Ingestion and retrieval microbenchmarks: chunking, embedding batch sizes and top-k search."""
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from benchmarks.common import latency_summary
+from benchmarks.vector_backends import ArraySource
+from benchmarks.vector_backends import make_corpus
+
+SENTENCES = [
+    "Dengue fever is a mosquito-borne viral infection that causes high fever, headache and joint pain.",
+    "Type 2 diabetes is managed with diet, exercise and medicines such as metformin.",
+    "Hypertension rarely causes symptoms but raises the risk of stroke and heart attack.",
+    "Iron deficiency anemia leads to fatigue, pale skin and shortness of breath.",
+    "Asthma inhalers deliver bronchodilators or corticosteroids directly to the airways.",
+]
+
+def synthetic_text(pages: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return [" ".join(SENTENCES[i] for i in rng.integers(len(SENTENCES), size=40)) for _ in range(pages)]
+
+def _skipped(exc: Exception) -> dict:
+    return {"skipped": f"{type(exc).__name__}: {exc}"}
+
+def bench_chunking(pages: int = 200) -> dict:
+    try:
+        from tools.pdf_loader import get_text_splitter
+        splitter = get_text_splitter()
+    except Exception as e:
+        return _skipped(e)
+    texts = synthetic_text(pages)
+    start = time.perf_counter()
+    chunks = sum(len(splitter.split_text(text)) for text in texts)
+    seconds = time.perf_counter() - start
+    megabytes = sum(len(text) for text in texts) / 1e6
+    return {"pages": pages, "chunks": chunks, "seconds": round(seconds, 3), "pages_per_s": round(pages / seconds, 1),
+            "mb_per_s": round(megabytes / seconds, 2)}
+
+def bench_embedding(batch_sizes=(1, 8, 32, 64), texts: int = 256) -> dict:
+    """Throughput of the real embedding model per batch size; skipped without the model."""
+    try:
+        from tools.embeddings import EmbeddingCache
+        from tools.embeddings import EmbeddingService
+        sample = [SENTENCES[i % len(SENTENCES)] + f" ({i})" for i in range(texts)]
+        results = {}
+        for batch_size in batch_sizes:
+            service = EmbeddingService(batch_size=batch_size, cache=EmbeddingCache())
+            service.embed_documents(sample[:batch_size])  # warm-up
+            start = time.perf_counter()
+            service.embed_documents(sample)
+            seconds = time.perf_counter() - start
+            results[str(batch_size)] = {"seconds": round(seconds, 3), "texts_per_s": round(texts / seconds, 1)}
+        return results
+    except Exception as e:
+        return _skipped(e)
+
+def bench_top_k(count: int = 30000, dim: int = 384, queries: int = 200, k_values=(3, 10), batch_size: int = 32) -> dict:
+    from tools.bm25_index import BM25Index
+    from tools.flat_index import export_flat_index
+
+    vectors = make_corpus(count, dim)
+    rng = np.random.default_rng(1)
+    query_vectors = vectors[rng.integers(count, size=queries)]
+    results = {"count": count, "dim": dim}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = export_flat_index(ArraySource(vectors), Path(tmp) / "flat", "micro")
+        for k in k_values:
+            latencies = []
+            for query in query_vectors:
+                start = time.perf_counter()
+                index.search(query[None, :], k)
+                latencies.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            for offset in range(0, queries, batch_size):
+                index.search(query_vectors[offset:offset + batch_size], k)
+            results[f"flat_k{k}"] = dict(latency_summary(latencies), batched_qps=round(queries / (time.perf_counter() - start), 1))
+
+    texts = synthetic_text(count // 10)
+    start = time.perf_counter()
+    bm25 = BM25Index.build([str(i) for i in range(len(texts))], texts)
+    build_seconds = time.perf_counter() - start
+    latencies = []
+    for sentence in SENTENCES * (queries // len(SENTENCES)):
+        start = time.perf_counter()
+        bm25.search(sentence, 10)
+        latencies.append(time.perf_counter() - start)
+    results["bm25"] = dict(latency_summary(latencies), documents=len(texts), build_s=round(build_seconds, 3))
+    return results
+
+def run_micro() -> dict:
+    return {"chunking": bench_chunking(), "embedding": bench_embedding(), "top_k": bench_top_k()}
@@ -0,0 +1,212 @@
+# benchmarks/run.py
+"""Replay a query corpus through the compiled graph with deterministic stand-ins.
+
+Groq, Wikipedia, DuckDuckGo and (unless --real-retriever) the retriever and
+embedder are replaced by the fakes in benchmarks/fakes.py, so runs need no
+network and differ only when the code does. Reports p50/p95/p99 latency,
+throughput at the given concurrency, time per graph node, RSS and startup
+time, and optionally the microbenchmarks in benchmarks/micro.py.
+
+    python -m benchmarks.run --concurrency 8 --output bench.json
+    python -m benchmarks.run --queries requests.jsonl --field title --micro
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Keep the search cache of a benchmark out of the project's own cache
+os.environ.setdefault("MEDIGENIUS_SEARCH_CACHE_PATH", str(Path(tempfile.mkdtemp()) / "search_cache.sqlite3"))
+
+from benchmarks.common import PROJECT_ROOT
+from benchmarks.common import environment
+from benchmarks.common import latency_summary
+from benchmarks.common import rss_mb
+
+DEFAULT_QUERIES = Path(__file__).parent / "queries.jsonl"
+QUESTION_FIELDS = ("question", "message", "query", "title")
+
+def load_conversations(path, field: str = None, limit: int = None, repeat: int = 1) -> list:
+    """[[question, ...], ...]: one list of turns per conversation, in file order."""
+    conversations = {}
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            fields = (field,) if field else QUESTION_FIELDS
+            question = next((item[name] for name in fields if item.get(name)), None)
+            if question:
+                conversations.setdefault(item.get("conversation", f"line-{number}"), []).append(question)
+    turns = list(conversations.values()) * repeat
+    if limit:
+        trimmed, remaining = [], limit
+        for conversation in turns:
+            if remaining <= 0:
+                break
+            trimmed.append(conversation[:remaining])
+            remaining -= len(trimmed[-1])
+        turns = trimmed
+    return turns
+
+def build_workflow(args):
+    from benchmarks.fakes import install_fakes
+    from core import instrumentation
+    from core.langgraph_workflow import setup_workflow
+
+    install_fakes(args.llm_latency, args.wiki_latency, args.ddg_latency, args.retrieval_latency,
+                  args.llm_failure_rate, args.real_retriever)
+    instrumentation.TRACE_SAMPLE_RATE = 1.0
+    return setup_workflow(retrieval_mode=args.retrieval_mode, routing_mode=args.routing, semantic_cache=not args.no_cache)
+
+def _state(question: str, history: list) -> dict:
+    from core.state import new_turn
+
+    return new_turn(question, history)
+
+async def replay_async(workflow, conversations, concurrency: int) -> dict:
+    from core.instrumentation import trace_request
+
+    semaphore = asyncio.Semaphore(concurrency)
+    run = {"latencies": [], "traces": [], "sources": Counter(), "errors": Counter()}
+
+    async def converse(turns):
+        history = []
+        for question in turns:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    with trace_request("benchmark") as trace:
+                        result = await workflow.ainvoke(_state(question, history))
+                except Exception as e:
+                    run["errors"][type(e).__name__] += 1
+                    continue
+                run["latencies"].append(time.perf_counter() - start)
+            run["traces"].append(trace)
+            run["sources"][result.get("source") or "none"] += 1
+            history = result.get("conversation_history", [])
+
+    await asyncio.gather(*(converse(turns) for turns in conversations))
+    return run
+
+def replay_sync(workflow, conversations, concurrency: int) -> dict:
+    from core.instrumentation import trace_request
+
+    run = {"latencies": [], "traces": [], "sources": Counter(), "errors": Counter()}
+
+    def converse(turns):
+        history = []
+        for question in turns:
+            start = time.perf_counter()
+            try:
+                with trace_request("benchmark") as trace:
+                    result = workflow.invoke(_state(question, history))
+            except Exception as e:
+                run["errors"][type(e).__name__] += 1
+                continue
+            run["latencies"].append(time.perf_counter() - start)
+            run["traces"].append(trace)
+            run["sources"][result.get("source") or "none"] += 1
+            history = result.get("conversation_history", [])
+
+    # One thread per in-flight conversation, like a threaded Flask/gunicorn worker
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(converse, conversations))
+    return run
+
+def stage_summary(traces) -> dict:
+    per_node = {}
+    for trace in traces:
+        for span in trace.spans:
+            per_node.setdefault(span["node"], []).append(span.get("ms", 0.0) / 1000)
+    return {node: latency_summary(seconds) for node, seconds in sorted(per_node.items())}
+
+def startup_probe() -> dict:
+    """Import and graph-construction time in a fresh interpreter."""
+    code = (
+        "import json, time; start = time.perf_counter();"
+        "from core.langgraph_workflow import setup_workflow; imported = time.perf_counter();"
+        "setup_workflow(); built = time.perf_counter();"
+        "from benchmarks.common import rss_mb;"
+        "print(json.dumps({'import_s': round(imported - start, 3), 'setup_s': round(built - imported, 3), 'rss_mb': round(rss_mb(), 1)}))"
+    )
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a query corpus through the MediGenius graph with fake backends.")
+    parser.add_argument("--queries", default=str(DEFAULT_QUERIES), help="JSONL corpus (question/message/query/title field)")
+    parser.add_argument("--field", help="read questions from this JSON field")
+    parser.add_argument("--limit", type=int, help="replay at most this many turns")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the corpus this many times")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=("async", "sync"), default="async", help="ainvoke (FastAPI) or threaded invoke (Flask)")
+    parser.add_argument("--routing", default=None, help="llm_first or retrieval_first (default: MEDIGENIUS_ROUTING)")
+    parser.add_argument("--retrieval-mode", default=None, help="sequential or fanout (default: MEDIGENIUS_RETRIEVAL_MODE)")
+    parser.add_argument("--no-cache", action="store_true", help="disable the semantic answer cache")
+    parser.add_argument("--llm-latency", type=float, default=0.4)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--wiki-latency", type=float, default=0.8)
+    parser.add_argument("--ddg-latency", type=float, default=0.6)
+    parser.add_argument("--retrieval-latency", type=float, default=0.02)
+    parser.add_argument("--real-retriever", action="store_true", help="use the real index and embedding model")
+    parser.add_argument("--micro", action="store_true", help="also run the ingestion/retrieval microbenchmarks")
+    parser.add_argument("--skip-startup", action="store_true")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = {"environment": environment(), "config": vars(args)}
+    if not args.skip_startup:
+        report["startup"] = startup_probe()
+
+    conversations = load_conversations(args.queries, args.field, args.limit, args.repeat)
+    workflow = build_workflow(args)
+    base_rss = rss_mb()
+    start = time.perf_counter()
+    if args.mode == "async":
+        run = asyncio.run(replay_async(workflow, conversations, args.concurrency))
+    else:
+        run = replay_sync(workflow, conversations, args.concurrency)
+    wall = time.perf_counter() - start
+
+    report["e2e"] = {
+        "requests": len(run["latencies"]),
+        "conversations": len(conversations),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(run["latencies"]) / wall, 2) if wall else 0.0,
+        "latency": latency_summary(run["latencies"]),
+        "stages": stage_summary(run["traces"]),
+        "sources": dict(run["sources"]),
+        "errors": dict(run["errors"]),
+        "rss_mb": round(rss_mb(), 1),
+        "rss_growth_mb": round(rss_mb() - base_rss, 1),
+        "peak_rss_mb": round(rss_mb(peak=True), 1),
+    }
+    if args.micro:
+        from benchmarks.micro import run_micro
+        report["micro"] = run_micro()
+
+    e2e = report["e2e"]
+    print(f"{e2e['requests']} requests in {e2e['wall_s']}s ({e2e['throughput_rps']} req/s at concurrency {args.concurrency})")
+    print("latency: " + ", ".join(f"{key} {value}" for key, value in e2e["latency"].items()))
+    for node, summary in e2e["stages"].items():
+        print(f"  {node:>13}: n={summary['count']:<4} p50 {summary['p50_ms']:.1f} ms  p95 {summary['p95_ms']:.1f} ms")
+    print(f"sources: {e2e['sources']}  errors: {e2e['errors']}  RSS {e2e['rss_mb']} MB (peak {e2e['peak_rss_mb']} MB)")
+    if "startup" in report:
+        print(f"startup: {report['startup']}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
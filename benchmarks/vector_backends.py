@@ -0,0 +1,171 @@
+# benchmarks/vector_backends.py
+"""Compare the Chroma and flat (memory-mapped NumPy) vector backends.
+
+Builds both indexes over the same synthetic corpus, then opens each one in a
+fresh process and reports open time, per-query latency, batched throughput,
+recall@k against exact search, and resident memory.
+
+    python -m benchmarks.vector_backends --count 30000 --dim 384 --queries 200
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from benchmarks.common import PROJECT_ROOT
+from benchmarks.common import latency_summary
+from benchmarks.common import rss_mb
+
+COLLECTION = "benchmark"
+
+def make_corpus(count: int, dim: int, seed: int = 0):
+    # Clustered vectors, like embeddings of chunks from one book, so approximate search has work to do
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(count // 200, 1), dim))
+    vectors = centers[rng.integers(len(centers), size=count)] + 0.35 * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+class ArraySource:
+    """Chroma-style `get` over in-memory arrays, for exporting the flat index."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def get(self, include=None, limit=None, offset=0):
+        rows = range(offset, min(len(self.vectors), offset + limit))
+        return {
+            "ids": [f"chunk-{i}" for i in rows],
+            "documents": [f"synthetic chunk {i}" for i in rows],
+            "metadatas": [{"page": i // 4} for i in rows],
+            "embeddings": [self.vectors[i] for i in rows],
+        }
+
+def build(workdir: Path, vectors, backends) -> dict:
+    timings = {}
+    if "flat" in backends:
+        from tools.flat_index import export_flat_index
+        start = time.perf_counter()
+        export_flat_index(ArraySource(vectors), workdir / "flat", "benchmark")
+        timings["flat"] = time.perf_counter() - start
+    if "chroma" in backends:
+        import chromadb
+        start = time.perf_counter()
+        client = chromadb.PersistentClient(path=str(workdir / "chroma"))
+        collection = client.get_or_create_collection(COLLECTION, metadata={"hnsw:space": "cosine"})
+        for offset in range(0, len(vectors), 4096):
+            rows = range(offset, min(len(vectors), offset + 4096))
+            collection.add(
+                ids=[f"chunk-{i}" for i in rows],
+                embeddings=vectors[offset:offset + len(rows)].tolist(),
+                documents=[f"synthetic chunk {i}" for i in rows],
+                metadatas=[{"page": i // 4} for i in rows],
+            )
+        timings["chroma"] = time.perf_counter() - start
+    return timings
+
+def run_worker(backend: str, workdir: Path, k: int, batch_size: int) -> dict:
+    """Runs in a fresh process so open time and RSS belong to one backend only."""
+    queries = np.load(workdir / "queries.npy")
+    truth = np.load(workdir / "truth.npy")
+    base_rss = rss_mb()
+
+    start = time.perf_counter()
+    if backend == "flat":
+        from tools.flat_index import FlatIndex
+        index = FlatIndex(workdir / "flat")
+        search = lambda batch: [[f"chunk-{r}" for r in row] for row in index.search(batch, k)[0]]
+    else:
+        import chromadb
+        collection = chromadb.PersistentClient(path=str(workdir / "chroma")).get_collection(COLLECTION)
+        search = lambda batch: collection.query(query_embeddings=batch.tolist(), n_results=k, include=[])["ids"]
+    search(queries[:1])  # first query pays for lazy loading; counted in open time
+    open_seconds = time.perf_counter() - start
+
+    latencies, found = [], []
+    for query in queries:
+        start = time.perf_counter()
+        found.extend(search(query[None, :]))
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for offset in range(0, len(queries), batch_size):
+        search(queries[offset:offset + batch_size])
+    batch_seconds = time.perf_counter() - start
+
+    expected = [[f"chunk-{r}" for r in row] for row in truth]
+    recall = np.mean([len(set(got) & set(want)) / k for got, want in zip(found, expected)])
+    return {
+        "backend": backend,
+        "open_ms": open_seconds * 1000,
+        "p50_ms": latency_summary(latencies)["p50_ms"],
+        "p95_ms": latency_summary(latencies)["p95_ms"],
+        "batched_qps": len(queries) / batch_seconds if batch_seconds else 0.0,
+        f"recall@{k}": float(recall),
+        "rss_mb": rss_mb(),
+        "rss_delta_mb": rss_mb() - base_rss,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=30000, help="corpus size in vectors")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--backends", default="chroma,flat")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, Path(args.workdir), args.k, args.batch_size)))
+        return 0
+
+    backends = [b for b in args.backends.split(",") if b]
+    if "chroma" in backends:
+        try:
+            import chromadb  # noqa: F401
+        except ImportError:
+            print("chromadb is not installed; benchmarking the flat backend only", file=sys.stderr)
+            backends.remove("chroma")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        vectors = make_corpus(args.count, args.dim)
+        rng = np.random.default_rng(1)
+        queries = vectors[rng.integers(len(vectors), size=args.queries)] + 0.2 * rng.normal(size=(args.queries, args.dim))
+        queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+        np.save(workdir / "queries.npy", queries)
+        np.save(workdir / "truth.npy", np.argsort(-(queries @ vectors.T), axis=1)[:, :args.k])
+        build_seconds = build(workdir, vectors, backends)
+
+        results = []
+        for backend in backends:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.vector_backends", "--worker", backend, "--workdir", str(workdir),
+                 "--k", str(args.k), "--batch-size", str(args.batch_size)],
+                cwd=PROJECT_ROOT, check=True, capture_output=True, text=True, env=dict(os.environ)
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result["build_s"] = build_seconds[backend]
+            results.append(result)
+
+    report = {"count": args.count, "dim": args.dim, "queries": args.queries, "k": args.k, "results": results}
+    for result in results:
+        print(
+            f"{result['backend']:>6}: open {result['open_ms']:.0f} ms, p50 {result['p50_ms']:.2f} ms, "
+            f"p95 {result['p95_ms']:.2f} ms, batched {result['batched_qps']:.0f} q/s, "
+            f"recall@{args.k} {result[f'recall@{args.k}']:.3f}, RSS {result['rss_mb']:.0f} MB "
+            f"(+{result['rss_delta_mb']:.0f}), build {result['build_s']:.1f} s"
+        )
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+# core/admission.py
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from contextlib import contextmanager
+from core.instrumentation import ADMISSIONS
+from core.instrumentation import QUEUE_SECONDS
+
+ADMISSION_ENABLED = os.getenv("MEDIGENIUS_ADMISSION", "1") != "0"
+# Graph runs in flight per process; the rest wait in a bounded queue
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MEDIGENIUS_MAX_CONCURRENT", "8"))
+MAX_QUEUE = int(os.getenv("MEDIGENIUS_MAX_QUEUE", "32"))
+# Longest a request may wait for a slot, in seconds
+QUEUE_DEADLINE = float(os.getenv("MEDIGENIUS_QUEUE_DEADLINE", "15"))
+# Requests granted while at least this many others are queued skip Wikipedia and DuckDuckGo
+DEGRADE_QUEUE_DEPTH = int(os.getenv("MEDIGENIUS_DEGRADE_QUEUE_DEPTH", str(max(1, MAX_QUEUE // 4))))
+SERVICE_TIME_SMOOTHING = 0.2
+
+# Lower runs first: a patient mid-consultation waits less than a new visitor
+FOLLOW_UP = 0
+NEW_CONVERSATION = 1
+PRIORITY_NAMES = {FOLLOW_UP: "follow_up", NEW_CONVERSATION: "new"}
+
+class Overloaded(Exception):
+    """The request was shed; `status_code` is 429 or 503 and `retry_after` is in whole seconds."""
+
+    def __init__(self, status_code: int, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+
+    @property
+    def headers(self) -> dict:
+        return {"Retry-After": str(self.retry_after)}
+
+class Ticket:
+    """One request's place in the queue, then its slot."""
+
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.started = None
+        self.degraded = False
+        self.rejection = None
+        self.released = False
+        self._wake = None
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class AdmissionController:
+    """Bounded, prioritized queue in front of the workflow.
+
+    A request is refused up front when the queue is full (429) or when the
+    wait expected from the recent service time is longer than the queue
+    deadline (503). A follow-up arriving at a full queue takes the place of
+    the newest queued new-conversation request. A queued request that isn't
+    granted a slot within the deadline gets a 503. Requests granted while the
+    queue is deep run degraded (no Wikipedia/DuckDuckGo lookups), which
+    shortens their own service time and so the wait of everyone behind them.
+
+    Thread-safe: Flask workers use `admit`, FastAPI uses `aadmit`.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_REQUESTS, max_queue: int = MAX_QUEUE,
+                 deadline: float = QUEUE_DEADLINE, degrade_depth: int = DEGRADE_QUEUE_DEPTH):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self.degrade_depth = degrade_depth
+        self.service_seconds = None
+        self.active = 0
+        self._queue = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._counts = {"admitted": 0, "rejected_full": 0, "rejected_wait": 0, "shed": 0, "timed_out": 0, "degraded": 0}
+
+    def expected_wait(self, ahead: int) -> float:
+        """Seconds until a slot frees up for a request with `ahead` requests queued before it."""
+        if self.active < self.max_concurrent or not self.service_seconds:
+            return 0.0
+        return (ahead + 1) * self.service_seconds / self.max_concurrent
+
+    def _reject(self, key: str, status_code: int, retry_after: float, reason: str):
+        self._counts[key] += 1
+        ADMISSIONS.inc(key)
+        raise Overloaded(status_code, retry_after, reason)
+
+    def _grant(self, ticket: Ticket):
+        # Caller holds the lock
+        self.active += 1
+        ticket.started = time.monotonic()
+        ticket.degraded = len(self._queue) >= self.degrade_depth
+        self._counts["admitted"] += 1
+        self._counts["degraded"] += ticket.degraded
+        ADMISSIONS.inc("degraded" if ticket.degraded else "admitted")
+        QUEUE_SECONDS.observe(PRIORITY_NAMES[ticket.priority], ticket.started - ticket.enqueued)
+
+    def _enqueue(self, priority: int, wake) -> Ticket:
+        ticket = Ticket(priority, next(self._seq))
+        with self._lock:
+            if self.active < self.max_concurrent and not self._queue:
+                self._grant(ticket)
+                return ticket
+
+            ahead = sum(1 for queued in self._queue if queued.priority <= priority)
+            wait = self.expected_wait(ahead)
+            if wait > self.deadline:
+                self._reject("rejected_wait", 503, wait, f"Expected wait of {wait:.1f}s exceeds the {self.deadline:g}s deadline")
+            if len(self._queue) >= self.max_queue:
+                victim = max(self._queue)
+                if victim.priority <= priority:
+                    self._reject("rejected_full", 429, self.expected_wait(len(self._queue)), "Too many requests are waiting")
+                self._queue.remove(victim)
+                heapq.heapify(self._queue)
+                self._counts["shed"] += 1
+                ADMISSIONS.inc("shed")
+                victim.rejection = Overloaded(503, self.expected_wait(len(self._queue)), "Displaced by a follow-up question")
+                victim._wake()
+
+            ticket._wake = wake
+            heapq.heappush(self._queue, ticket)
+            return ticket
+
+    def _abandon(self, ticket: Ticket) -> bool:
+        """Take a ticket that gave up waiting out of the queue; False if it was granted meanwhile."""
+        with self._lock:
+            if ticket.started is not None:
+                return False
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+            return True
+
+    def _timed_out(self, ticket: Ticket):
+        if self._abandon(ticket):
+            with self._lock:
+                self._reject("timed_out", 503, self.expected_wait(len(self._queue)), f"No capacity within {self.deadline:g}s")
+
+    def release(self, ticket: Ticket):
+        """Give the ticket's slot back; releasing a ticket twice is a no-op."""
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            elapsed = time.monotonic() - ticket.started
+            if self.service_seconds is None:
+                self.service_seconds = elapsed
+            else:
+                self.service_seconds += SERVICE_TIME_SMOOTHING * (elapsed - self.service_seconds)
+            self.active -= 1
+            if self._queue and self.active < self.max_concurrent:
+                following = heapq.heappop(self._queue)
+                self._grant(following)
+                following._wake()
+
+    def acquire(self, priority: int = NEW_CONVERSATION) -> Ticket:
+        event = threading.Event()
+        ticket = self._enqueue(priority, event.set)
+        if ticket.started is None and not event.wait(self.deadline):
+            self._timed_out(ticket)
+        if ticket.rejection is not None:
+            raise ticket.rejection
+        return ticket
+
+    async def aacquire(self, priority: int = NEW_CONVERSATION) -> Ticket:
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        ticket = self._enqueue(priority, wake)
+        if ticket.started is None:
+            try:
+                await asyncio.wait_for(granted, self.deadline)
+            except asyncio.TimeoutError:
+                self._timed_out(ticket)
+            except asyncio.CancelledError:
+                # The client went away while queued
+                if not self._abandon(ticket):
+                    self.release(ticket)
+                raise
+        if ticket.rejection is not None:
+            raise ticket.rejection
+        return ticket
+
+    @contextmanager
+    def admit(self, priority: int = NEW_CONVERSATION):
+        ticket = self.acquire(priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    @asynccontextmanager
+    async def aadmit(self, priority: int = NEW_CONVERSATION):
+        ticket = await self.aacquire(priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self._counts,
+                in_flight=self.active,
+                queued=len(self._queue),
+                max_concurrent=self.max_concurrent,
+                max_queue=self.max_queue,
+                service_seconds=round(self.service_seconds or 0.0, 3),
+            )
+
+def priority_for(state: dict) -> int:
+    # The patient's own message is the only turn of a brand-new conversation
+    return FOLLOW_UP if len(state.get("conversation_history", [])) > 1 else NEW_CONVERSATION
+
+_admission = None
+
+def get_admission() -> AdmissionController:
+    global _admission
+    if _admission is None:
+        # Disabled: every request is granted at once and never degraded
+        _admission = AdmissionController() if ADMISSION_ENABLED else AdmissionController(max_concurrent=2 ** 31)
+    return _admission
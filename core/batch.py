@@ -0,0 +1,288 @@
+# core/batch.py
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from pathlib import Path
+from core.resources import get_resource
+from core.state import new_turn
+from tools.semantic_cache import normalize_question
+
+BATCH_CONCURRENCY = int(os.getenv("MEDIGENIUS_BATCH_CONCURRENCY", "4"))
+# Upper bound on the concurrency a /batch caller may ask for
+MAX_BATCH_CONCURRENCY = int(os.getenv("MEDIGENIUS_MAX_BATCH_CONCURRENCY", "16"))
+# Times a batch run shed by admission queues again before it is recorded as failed
+BATCH_OVERLOAD_RETRIES = int(os.getenv("MEDIGENIUS_BATCH_OVERLOAD_RETRIES", "20"))
+PREEMBED_CHUNK = 256
+PROGRESS_INTERVAL = 5.0
+
+ID_FIELDS = ("request_id", "id", "conversation_id")
+QUESTION_FIELDS = ("question", "message", "query")
+
+def parse_item(item: dict, number: int):
+    """(id, question) of one input record, or None if it has no question.
+
+    Accepts `{"question": ...}`-style records as well as the `title`/`body`
+    shape of requests.jsonl, where the body adds detail to the title.
+    """
+    item_id = next((str(item[field]) for field in ID_FIELDS if item.get(field)), f"line-{number}")
+    question = next((item[field] for field in QUESTION_FIELDS if item.get(field)), None)
+    if question is None:
+        question = "\n\n".join(part for part in (item.get("title"), item.get("body")) if part)
+    question = str(question).strip()
+    return (item_id, question) if question else None
+
+def read_items(lines) -> list:
+    """[(id, question)] from JSONL lines; blank lines and records without a question are skipped."""
+    items = []
+    for number, line in enumerate(lines, start=1):
+        if line.strip():
+            parsed = parse_item(json.loads(line), number)
+            if parsed:
+                items.append(parsed)
+    return items
+
+def read_checkpoint(path) -> dict:
+    """Answer records already written to `path`, by ID.
+
+    The last record of an ID wins. Failed IDs, superseded records, lines that
+    are not a record with a `request_id` and a torn last line are dropped from
+    the file, so a retry leaves one record per ID.
+    """
+    done = {}
+    path = Path(path)
+    if not path.exists():
+        return done
+    stale = False
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                stale = True
+                break
+            if not isinstance(record, dict) or "request_id" not in record:
+                stale = True
+                continue
+            item_id = record["request_id"]
+            stale = stale or item_id in done or "error" in record or not line.endswith("\n")
+            done.pop(item_id, None)
+            if "error" not in record:
+                done[item_id] = record
+    if stale:
+        # Resume appends after the surviving records
+        temp = path.with_name(path.name + ".tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in done.values())
+        os.replace(temp, path)
+    return done
+
+class Progress:
+    """Throughput and ETA, printed every few seconds."""
+
+    def __init__(self, total: int, out=sys.stderr, interval: float = PROGRESS_INTERVAL):
+        self.total = total
+        self.out = out
+        self.interval = interval
+        self.done = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def update(self, record: dict):
+        self.done += 1
+        self.errors += "error" in record
+        now = time.perf_counter()
+        if self.out is not None and (now - self._last >= self.interval or self.done == self.total):
+            self._last = now
+            print(self.line(), file=self.out, flush=True)
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed else 0.0
+        return {
+            "done": self.done,
+            "total": self.total,
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 2),
+            "questions_per_s": round(rate, 2),
+            "eta_s": round((self.total - self.done) / rate, 1) if rate else None,
+        }
+
+    def line(self) -> str:
+        s = self.summary()
+        eta = f", ETA {s['eta_s']:.0f}s" if s["eta_s"] else ""
+        return f"[batch] {s['done']}/{s['total']} answered, {s['errors']} errors, {s['questions_per_s']} q/s{eta}"
+
+def plan(items, done: dict):
+    """Group pending items by normalized question.
+
+    Returns `(jobs, duplicates, copies)`: one `(id, question)` per distinct
+    question still to run, the IDs of later items asking the same question
+    (by normalized question), and the records that can be written right away
+    because an identical question was answered by an earlier run.
+    """
+    answered = {normalize_question(record["question"]): record for record in done.values()}
+    jobs, duplicates, copies = {}, {}, []
+    for item_id, question in items:
+        if item_id in done:
+            continue
+        key = normalize_question(question)
+        if key in answered:
+            copies.append(duplicate_record(answered[key], item_id))
+        elif key in jobs:
+            duplicates.setdefault(key, []).append(item_id)
+        else:
+            jobs[key] = (item_id, question)
+    return list(jobs.values()), duplicates, copies
+
+def duplicate_record(record: dict, item_id: str) -> dict:
+    return dict(record, request_id=item_id, duplicate_of=record.get("duplicate_of", record["request_id"]), elapsed_ms=0.0)
+
+def preembed(questions, chunk: int = PREEMBED_CHUNK) -> int:
+    """Embed every question the graph will embed, in large batches, so its lookups hit the cache.
+
+    Single-turn retrieval queries are the bare question, and the semantic
+    cache looks up its normalized form. Returns the number of texts embedded,
+    or 0 when the embedder has no batch path.
+    """
+    try:
+        embeddings = get_resource("embeddings")
+    except Exception:
+        # Retrieval will fail over to the other sources on its own
+        return 0
+    if not hasattr(embeddings, "embed_queries"):
+        return 0
+    texts = list(dict.fromkeys(text for question in questions for text in (question, normalize_question(question))))
+    for start in range(0, len(texts), chunk):
+        embeddings.embed_queries(texts[start:start + chunk])
+    return len(texts)
+
+def _record(item_id: str, question: str, result: dict = None, error: Exception = None, elapsed: float = 0.0) -> dict:
+    record = {"request_id": item_id, "question": question}
+    if error is not None:
+        record["error"] = f"{type(error).__name__}: {error}"
+    else:
+        record.update(answer=result.get("generation", ""), source=result.get("source", ""))
+    record["elapsed_ms"] = round(elapsed * 1000, 1)
+    return record
+
+def _answer(workflow, item_id: str, question: str) -> dict:
+    start = time.perf_counter()
+    try:
+        result = workflow.invoke(new_turn(question))
+    except Exception as e:
+        return _record(item_id, question, error=e, elapsed=time.perf_counter() - start)
+    return _record(item_id, question, result, elapsed=time.perf_counter() - start)
+
+def _with_duplicates(record: dict, duplicates: dict):
+    yield record
+    for item_id in duplicates.get(normalize_question(record["question"]), []):
+        yield duplicate_record(record, item_id) if "error" not in record else dict(record, request_id=item_id)
+
+def run_batch(workflow, items, done: dict = None, concurrency: int = BATCH_CONCURRENCY, progress: Progress = None):
+    """Answer `items` with at most `concurrency` graph runs in flight, yielding records as they finish.
+
+    Each distinct question runs once; its duplicates are yielded right after
+    it with `duplicate_of` set. Items whose ID is in `done` are skipped.
+    """
+    jobs, duplicates, copies = plan(items, done or {})
+    for record in copies:
+        if progress:
+            progress.update(record)
+        yield record
+    if not jobs:
+        return
+    preembed([question for _, question in jobs])
+
+    pending_jobs = iter(jobs)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as pool:
+        in_flight = set()
+        while True:
+            # Keep the pool full without queueing the whole batch up front
+            for item_id, question in pending_jobs:
+                in_flight.add(pool.submit(_answer, workflow, item_id, question))
+                if len(in_flight) >= concurrency:
+                    break
+            if not in_flight:
+                return
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                for record in _with_duplicates(future.result(), duplicates):
+                    if progress:
+                        progress.update(record)
+                    yield record
+
+async def arun_batch(workflow, items, concurrency: int = BATCH_CONCURRENCY, admission=None, progress: Progress = None,
+                     overload_retries: int = BATCH_OVERLOAD_RETRIES):
+    """`run_batch` for the event loop; each graph run also takes an admission slot if `admission` is given.
+
+    A batch is never in a hurry: when admission sheds one of its runs, the
+    run waits for the advertised Retry-After and queues again, so live
+    conversations keep their priority. After `overload_retries` such retries
+    the item is recorded as failed.
+    """
+    from core.admission import NEW_CONVERSATION
+    from core.admission import Overloaded
+
+    jobs, duplicates, copies = plan(items, {})
+    for record in copies:
+        if progress:
+            progress.update(record)
+        yield record
+    if not jobs:
+        return
+    await asyncio.to_thread(preembed, [question for _, question in jobs])
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def answer(item_id, question):
+        async with semaphore:
+            for attempt in range(overload_retries + 1):
+                start = time.perf_counter()
+                try:
+                    if admission is None:
+                        result = await workflow.ainvoke(new_turn(question))
+                    else:
+                        async with admission.aadmit(NEW_CONVERSATION):
+                            result = await workflow.ainvoke(new_turn(question))
+                except Overloaded as e:
+                    if attempt == overload_retries:
+                        return _record(item_id, question, error=e, elapsed=time.perf_counter() - start)
+                    await asyncio.sleep(e.retry_after)
+                    continue
+                except Exception as e:
+                    return _record(item_id, question, error=e, elapsed=time.perf_counter() - start)
+                return _record(item_id, question, result, elapsed=time.perf_counter() - start)
+
+    tasks = [asyncio.ensure_future(answer(item_id, question)) for item_id, question in jobs]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for record in _with_duplicates(await next_done, duplicates):
+                if progress:
+                    progress.update(record)
+                yield record
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def run_batch_file(workflow, input_path, output_path, concurrency: int = BATCH_CONCURRENCY, out=sys.stderr) -> dict:
+    """Answer every question in `input_path` into `output_path` (JSONL), resuming a previous run."""
+    with open(input_path, encoding="utf-8") as f:
+        items = read_items(f)
+    done = read_checkpoint(output_path)
+    pending = sum(1 for item_id, _ in items if item_id not in done)
+    if out is not None and done:
+        print(f"[batch] resuming: {len(done)} answers already in {output_path}", file=out)
+
+    progress = Progress(pending, out=out)
+    with open(output_path, "a", encoding="utf-8") as f:
+        for record in run_batch(workflow, items, done, concurrency, progress):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            # Every finished answer survives an interruption
+            f.flush()
+    return progress.summary()
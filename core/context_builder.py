@@ -0,0 +1,112 @@
+# core/context_builder.py
+import os
+import re
+from typing import List
+import numpy as np
+from core.instrumentation import record_exception
+from core.memory import count_tokens
+from core.resources import get_resource
+
+# Prompt tokens the retrieved evidence may take in the executor prompt
+CONTEXT_TOKENS = int(os.getenv("MEDIGENIUS_CONTEXT_TOKENS", "600"))
+CONTEXT_COMPRESSION = os.getenv("MEDIGENIUS_CONTEXT_COMPRESSION", "1").lower() not in ("0", "false", "no")
+# Sentences at least this similar to one already picked add nothing new
+DUPLICATE_SIMILARITY = float(os.getenv("MEDIGENIUS_CONTEXT_DUPLICATE_SIMILARITY", "0.9"))
+# Small bonus for sentences from higher-ranked documents, so ties follow retrieval order
+RANK_BONUS = 0.02
+MAX_SENTENCE_WORDS = 60
+MIN_SENTENCE_CHARS = 15
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*|\s+\.\.\.\s+")
+
+class Sentence:
+    __slots__ = ("doc", "position", "text", "tokens")
+
+    def __init__(self, doc: int, position: int, text: str):
+        self.doc = doc
+        self.position = position
+        self.text = text
+        self.tokens = count_tokens(text)
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of `text`; run-on snippets are cut every MAX_SENTENCE_WORDS words."""
+    sentences = []
+    for part in _SENTENCE_BREAK.split(text or ""):
+        words = part.split()
+        for start in range(0, len(words), MAX_SENTENCE_WORDS):
+            sentence = " ".join(words[start:start + MAX_SENTENCE_WORDS])
+            if len(sentence) >= MIN_SENTENCE_CHARS:
+                sentences.append(sentence)
+    return sentences
+
+def _sentences(docs) -> List[Sentence]:
+    return [
+        Sentence(doc_index, position, text)
+        for doc_index, doc in enumerate(docs)
+        for position, text in enumerate(split_sentences(doc.page_content))
+    ]
+
+def _embed(embeddings, question: str, texts: List[str]):
+    # embed_passages batches the sentences in one forward pass and caches them apart
+    # from query vectors, so documents that come back on the next turn cost nothing
+    batch = getattr(embeddings, "embed_passages", None) or embeddings.embed_documents
+    matrix = np.asarray(batch(texts), dtype=np.float32)
+    query = np.asarray(embeddings.embed_query(question), dtype=np.float32)
+    # Not in place: the embedder may hand back its cached arrays
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return matrix, query / max(float(np.linalg.norm(query)), 1e-12)
+
+def select(sentences: List[Sentence], matrix, query, budget: int) -> List[Sentence]:
+    """Greedily pick the sentences closest to the question that fit `budget`, skipping near-duplicates."""
+    scores = matrix @ query + RANK_BONUS / (1.0 + np.array([s.doc for s in sentences], dtype=np.float32))
+    picked, used = [], 0
+    for index in np.argsort(-scores, kind="stable"):
+        sentence = sentences[index]
+        if used + sentence.tokens > budget:
+            # A shorter sentence further down may still fit
+            continue
+        if picked and float(np.max(matrix[picked] @ matrix[index])) >= DUPLICATE_SIMILARITY:
+            continue
+        picked.append(index)
+        used += sentence.tokens
+    return [sentences[index] for index in picked]
+
+def _truncate(sentences: List[Sentence], budget: int) -> List[Sentence]:
+    kept, used = [], 0
+    for sentence in sentences:
+        if used + sentence.tokens > budget:
+            break
+        kept.append(sentence)
+        used += sentence.tokens
+    return kept
+
+def _render(sentences: List[Sentence]) -> str:
+    # Back in reading order, one paragraph per document
+    paragraphs = {}
+    for sentence in sorted(sentences, key=lambda s: (s.doc, s.position)):
+        paragraphs.setdefault(sentence.doc, []).append(sentence.text)
+    return "\n".join(" ".join(texts) for texts in paragraphs.values())
+
+def build_context(question: str, docs, budget: int = CONTEXT_TOKENS, embeddings=None) -> dict:
+    """The evidence for the executor prompt, packed into `budget` tokens.
+
+    Documents that already fit are passed through untouched. Otherwise they
+    are split into sentences, scored against the question by cosine
+    similarity in one matrix product, and the best non-duplicate ones are
+    kept. Without embeddings the leading sentences are kept instead.
+    Returns `{"text", "tokens", "sentences", "kept"}`.
+    """
+    full = "\n".join(doc.page_content for doc in docs)
+    full_tokens = count_tokens(full)
+    if not CONTEXT_COMPRESSION or full_tokens <= budget:
+        return {"text": full, "tokens": full_tokens, "sentences": None, "kept": None}
+
+    sentences = _sentences(docs)
+    try:
+        matrix, query = _embed(embeddings or get_resource("embeddings"), question, [s.text for s in sentences])
+        kept = select(sentences, matrix, query, budget)
+    except Exception as e:
+        record_exception(e)
+        kept = _truncate(sentences, budget)
+    text = _render(kept)
+    return {"text": text, "tokens": count_tokens(text), "sentences": len(sentences), "kept": len(kept)}
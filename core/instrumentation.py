@@ -0,0 +1,239 @@
+# core/instrumentation.py
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from langchain_core.runnables import RunnableLambda
+
+INSTRUMENTATION_ENABLED = os.getenv("MEDIGENIUS_INSTRUMENTATION", "1") != "0"
+# Fraction of requests that keep a full per-node trace; metrics always cover every request
+TRACE_SAMPLE_RATE = float(os.getenv("MEDIGENIUS_TRACE_SAMPLE", "0.1"))
+TRACE_LOG = os.getenv("MEDIGENIUS_TRACE_LOG", "0") == "1"
+RECENT_TRACES = int(os.getenv("MEDIGENIUS_RECENT_TRACES", "100"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+RETRIEVAL_NODES = {"retriever", "wikipedia", "duckduckgo", "fanout"}
+
+logger = logging.getLogger("medigenius.trace")
+
+_trace = ContextVar("medigenius_trace", default=None)
+_span = ContextVar("medigenius_span", default=None)
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets, label: str):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label = label
+        self._series = {}  # label value -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float):
+        with self._lock:
+            series = self._series.setdefault(label_value, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for value, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{{{self.label}="{value}",le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{self.label}="{value}",le="+Inf"}} {series[-1]}')
+                lines.append(f'{self.name}_sum{{{self.label}="{value}"}} {series[-2]}')
+                lines.append(f'{self.name}_count{{{self.label}="{value}"}} {series[-1]}')
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                labels = ",".join(f'{label}="{value}"' for label, value in zip(self.labels, values))
+                lines.append(f"{self.name}{{{labels}}} {total}")
+        return lines
+
+REQUEST_SECONDS = Histogram("medigenius_request_seconds", "End-to-end graph latency per request.", LATENCY_BUCKETS, "kind")
+NODE_SECONDS = Histogram("medigenius_node_seconds", "Wall time per workflow node.", LATENCY_BUCKETS, "node")
+RETRIEVAL_SCORE = Histogram("medigenius_retrieval_top_score", "Best relevance score per retrieval.", SCORE_BUCKETS, "node")
+NODE_ERRORS = Counter("medigenius_node_errors_total", "Exceptions raised or swallowed inside a node.", ("node", "exception"))
+LLM_TOKENS = Counter("medigenius_llm_tokens_total", "LLM prompt and completion tokens.", ("node", "type"))
+RETRIEVED_DOCUMENTS = Counter("medigenius_retrieved_documents_total", "Documents returned by retrieval nodes.", ("node",))
+ANSWERS = Counter("medigenius_answers_total", "Answers by the source they came from.", ("source",))
+QUEUE_SECONDS = Histogram("medigenius_queue_seconds", "Time a request waited for an admission slot.", LATENCY_BUCKETS, "priority")
+ADMISSIONS = Counter("medigenius_admissions_total", "Admission decisions (admitted, degraded, shed, rejected, timed out).", ("decision",))
+METRICS = [REQUEST_SECONDS, NODE_SECONDS, RETRIEVAL_SCORE, NODE_ERRORS, LLM_TOKENS, RETRIEVED_DOCUMENTS, ANSWERS,
+           QUEUE_SECONDS, ADMISSIONS]
+
+_recent = deque(maxlen=RECENT_TRACES)
+
+class Trace:
+    """Per-request record of every node the turn went through."""
+
+    def __init__(self, kind: str):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.kind = kind
+        self.started = time.time()
+        self.total_ms = None
+        self.spans = []
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "kind": self.kind,
+            "started": self.started,
+            "total_ms": self.total_ms,
+            "path": [span["node"] for span in self.spans],
+            "spans": self.spans,
+        }
+
+@contextmanager
+def trace_request(kind: str = "chat"):
+    """Time one graph run; a sampled fraction also keeps a per-node trace."""
+    trace = Trace(kind) if random.random() < TRACE_SAMPLE_RATE else None
+    token = _trace.set(trace)
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        elapsed = time.perf_counter() - start
+        REQUEST_SECONDS.observe(kind, elapsed)
+        if trace is not None:
+            trace.total_ms = round(elapsed * 1000, 2)
+            _recent.append(trace.to_dict())
+            if TRACE_LOG:
+                logger.info(json.dumps(trace.to_dict(), default=str))
+        try:
+            _trace.reset(token)
+        except ValueError:
+            # A streaming generator may be closed from a different context
+            pass
+
+def recent_traces(limit: int = 20) -> list:
+    return list(_recent)[-limit:]
+
+def record_exception(exc: BaseException):
+    """Note an exception a node handled itself, so fallbacks stay explainable."""
+    span = _span.get()
+    node = span["node"] if span else "unknown"
+    NODE_ERRORS.inc(node, type(exc).__name__)
+    if span is not None:
+        span.setdefault("exceptions", []).append(type(exc).__name__)
+
+def record_llm_usage(response):
+    """Count the prompt/completion tokens reported on an LLM response."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if not usage:
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        usage = {"input_tokens": token_usage.get("prompt_tokens", 0), "output_tokens": token_usage.get("completion_tokens", 0)}
+    span = _span.get()
+    node = span["node"] if span else "unknown"
+    prompt, completion = usage.get("input_tokens", 0) or 0, usage.get("output_tokens", 0) or 0
+    LLM_TOKENS.inc(node, "prompt", amount=prompt)
+    LLM_TOKENS.inc(node, "completion", amount=completion)
+    if span is not None:
+        span["prompt_tokens"] = span.get("prompt_tokens", 0) + prompt
+        span["completion_tokens"] = span.get("completion_tokens", 0) + completion
+
+def record_context(context: dict):
+    """Note how much retrieved evidence the executor prompt carried."""
+    span = _span.get()
+    if span is not None:
+        span["context_tokens"] = context["tokens"]
+        if context.get("sentences") is not None:
+            span["context_sentences"] = f"{context['kept']}/{context['sentences']}"
+
+def _observe(span: dict, state, elapsed: float):
+    node = span["node"]
+    NODE_SECONDS.observe(node, elapsed)
+    span["ms"] = round(elapsed * 1000, 2)
+    if not isinstance(state, dict):
+        return
+    if node in RETRIEVAL_NODES:
+        docs = state.get("documents") or []
+        scores = [ref["score"] for ref in docs if ref.get("score") is not None]
+        RETRIEVED_DOCUMENTS.inc(node, amount=len(docs))
+        span["documents"] = len(docs)
+        if scores:
+            RETRIEVAL_SCORE.observe(node, max(scores))
+            span["top_score"] = round(max(scores), 4)
+    elif node == "cache_lookup":
+        span["cache_hit"] = bool(state.get("cache_hit"))
+        if state.get("cache_hit"):
+            ANSWERS.inc("cache")
+    elif node == "executor":
+        span["source"] = state.get("source", "")
+        ANSWERS.inc(state.get("source") or "none")
+
+def _begin(name: str):
+    span = {"node": name}
+    trace = _trace.get()
+    if trace is not None:
+        trace.spans.append(span)
+    return span, _span.set(span)
+
+def _fail(span: dict, exc: BaseException, elapsed: float):
+    NODE_SECONDS.observe(span["node"], elapsed)
+    NODE_ERRORS.inc(span["node"], type(exc).__name__)
+    span["ms"] = round(elapsed * 1000, 2)
+    span["error"] = type(exc).__name__
+
+def instrumented_node(name: str, agent):
+    """`agent_node` equivalent that times the agent and records what it did."""
+
+    def process(state):
+        span, token = _begin(name)
+        start = time.perf_counter()
+        try:
+            result = agent.process(state)
+        except Exception as e:
+            _fail(span, e, time.perf_counter() - start)
+            raise
+        finally:
+            _span.reset(token)
+        _observe(span, result, time.perf_counter() - start)
+        return result
+
+    async def aprocess(state):
+        span, token = _begin(name)
+        start = time.perf_counter()
+        try:
+            result = await agent.aprocess(state)
+        except Exception as e:
+            _fail(span, e, time.perf_counter() - start)
+            raise
+        finally:
+            _span.reset(token)
+        _observe(span, result, time.perf_counter() - start)
+        return result
+
+    return RunnableLambda(process, afunc=aprocess, name=agent.__name__)
+
+def render_metrics() -> str:
+    """All metrics of this process in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -1,4 +1,6 @@
 # core/langgraph_workflow.py
+import os
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph
 from langgraph.graph import END
 from agents import MemoryAgent
@@ -9,72 +11,153 @@ from agents import WikipediaAgent
 from agents import DuckDuckGoAgent
 from agents import ExecutorAgent
 from agents import ExplanationAgent
+from agents import FanOutRetrievalAgent
+from agents import CacheLookupAgent
+from agents import CacheStoreAgent
+from tools.semantic_cache import CACHE_ENABLED
 
+from core.instrumentation import INSTRUMENTATION_ENABLED
+from core.instrumentation import instrumented_node
 from core.state import AgentState
 
-def setup_workflow():
+# "llm_first" asks the LLM before anything else and retrieves only when it
+# fails; "retrieval_first" searches the local index first and picks exactly
+# one generation path from the top relevance score.
+ROUTING_MODE = os.getenv("MEDIGENIUS_ROUTING", "llm_first")
+
+# "sequential" tries the remaining sources one after another; "fanout"
+# queries them concurrently with per-source deadlines.
+RETRIEVAL_MODE = os.getenv("MEDIGENIUS_RETRIEVAL_MODE", "sequential")
+
+# Minimum cosine relevance for local chunks to answer without the LLM agent
+RAG_SCORE_THRESHOLD = float(os.getenv("MEDIGENIUS_RAG_SCORE_THRESHOLD", "0.5"))
+
+def agent_node(agent, name: str = None):
+    # Sync `invoke` (Flask, CLI) runs `process`; `ainvoke` (FastAPI) awaits `aprocess`
+    if INSTRUMENTATION_ENABLED and name:
+        return instrumented_node(name, agent)
+    return RunnableLambda(agent.process, afunc=agent.aprocess, name=agent.__name__)
+
+def setup_workflow(retrieval_mode: str = None, routing_mode: str = None, semantic_cache: bool = None):
+    semantic_cache = CACHE_ENABLED if semantic_cache is None else semantic_cache
+    retrieval_mode = retrieval_mode or RETRIEVAL_MODE
+    routing_mode = routing_mode or ROUTING_MODE
+    if retrieval_mode not in ("sequential", "fanout"):
+        raise ValueError(f"Unknown retrieval mode: {retrieval_mode}")
+    if routing_mode not in ("llm_first", "retrieval_first"):
+        raise ValueError(f"Unknown routing mode: {routing_mode}")
+
     workflow = StateGraph(AgentState)
     
     # Add all agent nodes
-    workflow.add_node("memory", MemoryAgent.process)
-    workflow.add_node("planner", PlannerAgent.process)
-    workflow.add_node("llm_agent", LLMAgent.process)
-    workflow.add_node("retriever", RetrieverAgent.process)
-    workflow.add_node("wikipedia", WikipediaAgent.process)
-    workflow.add_node("duckduckgo", DuckDuckGoAgent.process)
-    workflow.add_node("executor", ExecutorAgent.process)
-    workflow.add_node("explanation", ExplanationAgent.process)
+    workflow.add_node("memory", agent_node(MemoryAgent, "memory"))
+    workflow.add_node("planner", agent_node(PlannerAgent, "planner"))
+    workflow.add_node("llm_agent", agent_node(LLMAgent, "llm_agent"))
+    workflow.add_node("executor", agent_node(ExecutorAgent, "executor"))
+    workflow.add_node("explanation", agent_node(ExplanationAgent, "explanation"))
+
+    if retrieval_mode == "fanout":
+        workflow.add_node("fanout", agent_node(FanOutRetrievalAgent, "fanout"))
+        fallback = "fanout"
+    else:
+        workflow.add_node("wikipedia", agent_node(WikipediaAgent, "wikipedia"))
+        workflow.add_node("duckduckgo", agent_node(DuckDuckGoAgent, "duckduckgo"))
+        fallback = "wikipedia"
+    if routing_mode == "retrieval_first" or retrieval_mode == "sequential":
+        workflow.add_node("retriever", agent_node(RetrieverAgent, "retriever"))
     
     # Set entry point
     workflow.set_entry_point("memory")
     
     # Define edges and conditional routing
-    workflow.add_edge("memory", "planner")
-    workflow.add_edge("planner", "llm_agent")
+    if semantic_cache:
+        # Near-duplicate questions are answered from the cache without any LLM call
+        workflow.add_node("cache_lookup", agent_node(CacheLookupAgent, "cache_lookup"))
+        workflow.add_node("cache_store", agent_node(CacheStoreAgent, "cache_store"))
+        workflow.add_edge("memory", "cache_lookup")
+
+        def route_after_cache(state: AgentState):
+            if state.get("cache_hit", False):
+                return "explanation"
+            return "planner"
+
+        workflow.add_conditional_edges(
+            "cache_lookup",
+            route_after_cache,
+            {"explanation": "explanation", "planner": "planner"}
+        )
+    else:
+        workflow.add_edge("memory", "planner")
+
+    if routing_mode == "retrieval_first":
+        workflow.add_edge("planner", "retriever")
+
+        def route_after_rag(state: AgentState):
+            if state.get("rag_success", False) and state.get("rag_score", 0.0) >= RAG_SCORE_THRESHOLD:
+                return "executor"
+            return "llm_agent"
+
+        workflow.add_conditional_edges(
+            "retriever",
+            route_after_rag,
+            {"executor": "executor", "llm_agent": "llm_agent"}
+        )
+    else:
+        workflow.add_edge("planner", "llm_agent")
+        if retrieval_mode == "sequential":
+            fallback = "retriever"
+
+            def route_after_rag(state: AgentState):
+                if state.get("rag_success", False):
+                    return "executor"
+                return "wikipedia"
+
+            workflow.add_conditional_edges(
+                "retriever",
+                route_after_rag,
+                {"executor": "executor", "wikipedia": "wikipedia"}
+            )
     
     def route_after_llm(state: AgentState):
         if state.get("llm_success", False):
             return "executor"
-        return "retriever"
+        return fallback
     
     workflow.add_conditional_edges(
         "llm_agent",
         route_after_llm,
-        {"executor": "executor", "retriever": "retriever"}
-    )
-    
-    def route_after_rag(state: AgentState):
-        if state.get("rag_success", False):
-            return "executor"
-        return "wikipedia"
-    
-    workflow.add_conditional_edges(
-        "retriever",
-        route_after_rag,
-        {"executor": "executor", "wikipedia": "wikipedia"}
+        {"executor": "executor", fallback: fallback}
     )
-    
-    def route_after_wiki(state: AgentState):
-        if state.get("wiki_success", False):
+
+    if retrieval_mode == "fanout":
+        # The fan-out node already merged every source that answered in time
+        workflow.add_edge("fanout", "executor")
+    else:
+        def route_after_wiki(state: AgentState):
+            if state.get("wiki_success", False):
+                return "executor"
+            return "duckduckgo"
+
+        workflow.add_conditional_edges(
+            "wikipedia",
+            route_after_wiki,
+            {"executor": "executor", "duckduckgo": "duckduckgo"}
+        )
+
+        def route_after_ddg(state: AgentState):
             return "executor"
-        return "duckduckgo"
-    
-    workflow.add_conditional_edges(
-        "wikipedia",
-        route_after_wiki,
-        {"executor": "executor", "duckduckgo": "duckduckgo"}
-    )
-    
-    def route_after_ddg(state: AgentState):
-        return "executor"
-    
-    workflow.add_conditional_edges(
-        "duckduckgo",
-        route_after_ddg,
-        {"executor": "executor"}
-    )
+
+        workflow.add_conditional_edges(
+            "duckduckgo",
+            route_after_ddg,
+            {"executor": "executor"}
+        )
     
-    workflow.add_edge("executor", "explanation")
+    if semantic_cache:
+        workflow.add_edge("executor", "cache_store")
+        workflow.add_edge("cache_store", "explanation")
+    else:
+        workflow.add_edge("executor", "explanation")
     workflow.add_edge("explanation", END)
     
-    return workflow.compile()
\ No newline at end of file
+    return workflow.compile()
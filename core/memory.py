@@ -0,0 +1,161 @@
+# core/memory.py
+import os
+import re
+from functools import lru_cache
+from typing import List
+from typing import Optional
+from typing import TypedDict
+
+# Prompt tokens of conversation history each consumer may spend
+TOKEN_BUDGETS = {
+    "llm": int(os.getenv("MEDIGENIUS_LLM_HISTORY_TOKENS", "600")),
+    "executor": int(os.getenv("MEDIGENIUS_EXECUTOR_HISTORY_TOKENS", "400")),
+    "retriever": int(os.getenv("MEDIGENIUS_RETRIEVER_HISTORY_TOKENS", "64")),
+}
+# Turn roles each consumer sees; the retriever only embeds what the patient said
+CONSUMER_ROLES = {
+    "retriever": ("user",),
+}
+SUMMARY_TOKENS = int(os.getenv("MEDIGENIUS_SUMMARY_TOKENS", "200"))
+TOKENIZER_ENCODING = os.getenv("MEDIGENIUS_TOKENIZER", "cl100k_base")
+GIST_WORDS = 25
+
+ROLE_LABELS = {"user": "Patient", "doctor": "Doctor", "summary": "Earlier in this consultation"}
+_LEGACY_PREFIXES = (("User: ", "user"), ("Doctor: ", "doctor"))
+_INTERNAL_PREFIXES = ("AI: ", "AI Explanation: ")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+class Turn(TypedDict):
+    role: str  # "user", "doctor" or "summary"
+    content: str
+
+def user_turn(content: str) -> Turn:
+    return {"role": "user", "content": content}
+
+def doctor_turn(content: str) -> Turn:
+    return {"role": "doctor", "content": content}
+
+def summary_turn(content: str) -> Turn:
+    return {"role": "summary", "content": content}
+
+def as_turn(item) -> Optional[Turn]:
+    """Typed turn for `item`, or None for internal status lines.
+
+    Plain strings are histories saved before turns were typed.
+    """
+    if isinstance(item, dict):
+        return item if item.get("role") in ROLE_LABELS else None
+    for prefix in _INTERNAL_PREFIXES:
+        if item.startswith(prefix):
+            return None
+    for prefix, role in _LEGACY_PREFIXES:
+        if item.startswith(prefix):
+            return {"role": role, "content": item[len(prefix):]}
+    # The fallback answer used to be stored without a prefix
+    return doctor_turn(item)
+
+def normalize_history(history) -> List[Turn]:
+    """Typed turns with internal lines dropped; a summary is only kept as the first turn."""
+    turns = []
+    for item in history or []:
+        turn = as_turn(item)
+        if turn is None or (turn["role"] == "summary" and turns):
+            continue
+        turns.append(turn)
+    return turns
+
+def _split_summary(turns: List[Turn]):
+    if turns and turns[0]["role"] == "summary":
+        return turns[0]["content"], turns[1:]
+    return "", turns
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception:
+        # No tiktoken, or its BPE file can't be fetched: fall back to an estimate
+        return None
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+@lru_cache(maxsize=4096)
+def gist(text: str) -> str:
+    """First sentence of `text`, capped at GIST_WORDS words."""
+    sentence = _SENTENCE_END.split(" ".join(text.split()), 1)[0]
+    words = sentence.split()
+    return sentence if len(words) <= GIST_WORDS else " ".join(words[:GIST_WORDS]) + " ..."
+
+def format_turn(turn: Turn, short: bool = False) -> str:
+    content = gist(turn["content"]) if short else turn["content"]
+    return f"{ROLE_LABELS[turn['role']]}: {content}"
+
+def fold_summary(summary: str, turns: List[Turn], max_tokens: int = SUMMARY_TOKENS) -> str:
+    """Extend the rolling summary with the gist of evicted turns.
+
+    Purely extractive, so it costs no LLM call. When the summary outgrows
+    `max_tokens` the oldest doctor lines go first, then the oldest patient
+    lines, since the patient's own statements carry most of the history.
+    """
+    lines = summary.splitlines() if summary else []
+    lines.extend(format_turn(turn, short=True) for turn in turns if turn["role"] != "summary")
+    doctor_prefix = f"{ROLE_LABELS['doctor']}: "
+    while lines and count_tokens("\n".join(lines)) > max_tokens:
+        index = next((i for i, line in enumerate(lines) if line.startswith(doctor_prefix)), 0)
+        del lines[index]
+    return "\n".join(lines)
+
+def compact_history(history, max_turns: int, summary_tokens: int = SUMMARY_TOKENS) -> List[Turn]:
+    """Keep the last `max_turns` turns and fold older ones into the summary turn.
+
+    The summary only changes when turns are evicted, so it is computed once
+    per evicted turn and then travels with the history.
+    """
+    summary, turns = _split_summary(normalize_history(history))
+    if len(turns) > max_turns:
+        summary = fold_summary(summary, turns[:-max_turns], summary_tokens)
+        turns = turns[-max_turns:]
+    return ([summary_turn(summary)] if summary else []) + turns
+
+def cap_history(history: list, max_turns: int) -> list:
+    """Last `max_turns` entries, keeping a leading summary turn."""
+    if history and isinstance(history[0], dict) and history[0].get("role") == "summary":
+        return history[:1] + history[1:][-max_turns:]
+    return history[-max_turns:]
+
+def render_history(history, consumer: str, question: str = None) -> str:
+    """Conversation context for `consumer`, newest turns first within its token budget.
+
+    Turns that don't fit in full are shortened to their gist; the rolling
+    summary goes in front if there is budget left once every turn fits.
+    The current question is left out since every prompt states it separately.
+    """
+    budget = TOKEN_BUDGETS[consumer]
+    roles = CONSUMER_ROLES.get(consumer)
+    summary, turns = _split_summary(normalize_history(history))
+    if question is not None and turns and turns[-1] == user_turn(question):
+        turns = turns[:-1]
+
+    lines, used = [], 0
+    for turn in reversed(turns):
+        if roles and turn["role"] not in roles:
+            continue
+        line = format_turn(turn)
+        if used + count_tokens(line) > budget:
+            line = format_turn(turn, short=True)
+        if used + count_tokens(line) > budget:
+            return "\n".join(reversed(lines))
+        lines.append(line)
+        used += count_tokens(line)
+
+    if summary and not roles:
+        line = format_turn(summary_turn(summary))
+        if used + count_tokens(line) <= budget:
+            lines.append(line)
+    return "\n".join(reversed(lines))
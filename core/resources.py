@@ -0,0 +1,148 @@
+# core/resources.py
+import asyncio
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Warm heavy resources in the background once the server is listening
+WARMUP_ENABLED = os.getenv("MEDIGENIUS_WARMUP", "1") != "0"
+
+class Resource:
+    def __init__(self, name: str, factory, required: bool = True):
+        self.name = name
+        self.factory = factory
+        self.required = required
+        self.value = None
+        self.state = "pending"
+        self.seconds = None
+        self.error = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        if self.state == "ready":
+            return self.value
+        with self.lock:
+            if self.state != "ready":
+                self.state = "loading"
+                start = time.perf_counter()
+                try:
+                    self.value = self.factory()
+                except Exception as exc:
+                    self.state = "failed"
+                    self.error = f"{type(exc).__name__}: {exc}"
+                    raise
+                finally:
+                    self.seconds = round(time.perf_counter() - start, 3)
+                self.state = "ready"
+                self.error = None
+                logger.info("Initialized %s in %.2fs", self.name, self.seconds)
+        return self.value
+
+    def status(self) -> dict:
+        return {"state": self.state, "seconds": self.seconds, "required": self.required, "error": self.error}
+
+class ResourceRegistry:
+    """Heavy objects (models, clients, indexes) created on first use.
+
+    Nothing is built at import time; `warmup` builds everything ahead of the
+    first request and `ready` tells whether the required ones are loaded.
+    """
+
+    def __init__(self):
+        self._resources = {}
+        self._warmup_thread = None
+
+    def register(self, name: str, factory, required: bool = True):
+        if name not in self._resources:
+            self._resources[name] = Resource(name, factory, required)
+        return self._resources[name]
+
+    def get(self, name: str):
+        return self._resources[name].get()
+
+    async def aget(self, name: str):
+        """`get` for the event loop: a resource that still has to be built (or is being
+        warmed up) is waited for in a thread, so other requests keep running."""
+        resource = self._resources[name]
+        if resource.state == "ready":
+            return resource.value
+        return await asyncio.to_thread(resource.get)
+
+    def override(self, name: str, factory, required: bool = None):
+        """Swap in another factory (e.g. a stand-in for tests or benchmarks) and drop any built value."""
+        resource = self._resources.get(name)
+        if resource is None:
+            return self.register(name, factory, True if required is None else required)
+        with resource.lock:
+            resource.factory = factory
+            resource.value = None
+            resource.state = "pending"
+            resource.seconds = resource.error = None
+            if required is not None:
+                resource.required = required
+        return resource
+
+    def warmup(self, names=None, background: bool = True):
+        names = list(names or self._resources)
+
+        def run():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    logger.exception("Warm-up of %s failed", name)
+
+        if not background:
+            run()
+            return None
+        if self._warmup_thread is None or not self._warmup_thread.is_alive():
+            self._warmup_thread = threading.Thread(target=run, name="resource-warmup", daemon=True)
+            self._warmup_thread.start()
+        return self._warmup_thread
+
+    def ready(self) -> bool:
+        return all(r.state == "ready" for r in self._resources.values() if r.required)
+
+    def probe(self) -> bool:
+        """Readiness check: whether the required resources are loaded, starting their load if not.
+
+        A server without warm-up reports not ready until the first load succeeds.
+        """
+        if self.ready():
+            return True
+        self.warmup(background=True)
+        return False
+
+    def status(self) -> dict:
+        return {name: r.status() for name, r in self._resources.items()}
+
+registry = ResourceRegistry()
+
+def register_resource(name: str, factory, required: bool = True):
+    return registry.register(name, factory, required)
+
+def get_resource(name: str):
+    return registry.get(name)
+
+async def aget_resource(name: str):
+    return await registry.aget(name)
+
+def _embeddings():
+    from tools.embeddings import get_embeddings
+    return get_embeddings()
+
+def _retriever():
+    from tools.vector_store import get_retriever
+    return get_retriever()
+
+def _llm():
+    from tools.llm_client import get_llm
+    return get_llm()
+
+# Registration order is warm-up order: the retriever needs the embeddings
+register_resource("embeddings", _embeddings)
+register_resource("retriever", _retriever)
+register_resource("llm", _llm)
@@ -0,0 +1,157 @@
+# core/session_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC
+from abc import abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+
+from core.memory import cap_history
+from core.state import MAX_HISTORY
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+
+# SQLite by default so every worker of a multi-process server sees the same conversations
+SESSION_BACKEND = os.getenv("MEDIGENIUS_SESSION_BACKEND", "sqlite")
+SESSION_DB_PATH = os.getenv("MEDIGENIUS_SESSION_DB", str(PROJECT_ROOT / "sessions.sqlite3"))
+SESSION_TTL = float(os.getenv("MEDIGENIUS_SESSION_TTL", str(24 * 3600)))
+MAX_SESSIONS = int(os.getenv("MEDIGENIUS_MAX_SESSIONS", "10000"))
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+class SessionStore(ABC):
+    """Conversation history keyed by session ID.
+
+    `get_history` returns None for unknown or expired sessions. Histories are
+    trimmed to the rolling summary plus the last `max_history` turns on save,
+    the same window MemoryAgent keeps, so a session never grows without bound.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, max_history: int = MAX_HISTORY):
+        self.ttl = ttl
+        self.max_history = max_history
+
+    @abstractmethod
+    def get_history(self, session_id: str):
+        """The stored history, or None."""
+
+    @abstractmethod
+    def save_history(self, session_id: str, history: list):
+        """Store `history`, trimmed to the memory window."""
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """Forget the session."""
+
+class MemorySessionStore(SessionStore):
+    """Per-process LRU + TTL store; memory is bounded by `max_sessions`."""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, **kwargs):
+        super().__init__(**kwargs)
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # session_id -> (updated_at, history)
+        self._lock = threading.Lock()
+
+    def get_history(self, session_id: str):
+        with self._lock:
+            item = self._sessions.get(session_id)
+            if item is None:
+                return None
+            updated_at, history = item
+            if time.time() - updated_at > self.ttl:
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return list(history)
+
+    def save_history(self, session_id: str, history: list):
+        with self._lock:
+            self._sessions[session_id] = (time.time(), cap_history(list(history), self.max_history))
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite (WAL) store shared by every worker process on the host."""
+
+    PURGE_EVERY = 256
+
+    def __init__(self, path: str = SESSION_DB_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        # The database is created on first use, so importing a server touches no file
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connect(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self._create_schema(conn)
+                    self._schema_ready = True
+        return conn
+
+    @staticmethod
+    def _create_schema(conn):
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, updated_at REAL NOT NULL, history TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+
+    def get_history(self, session_id: str):
+        row = self._connect().execute(
+            "SELECT history FROM sessions WHERE id = ? AND updated_at >= ?",
+            (session_id, time.time() - self.ttl)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_history(self, session_id: str, history: list):
+        payload = json.dumps(cap_history(history, self.max_history), separators=(",", ":"), ensure_ascii=False)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sessions (id, updated_at, history) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET updated_at = excluded.updated_at, history = excluded.history",
+                (session_id, time.time(), payload)
+            )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def delete(self, session_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def purge_expired(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl,))
+
+def create_session_store(backend: str = None) -> SessionStore:
+    backend = backend or SESSION_BACKEND
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    raise ValueError(f"Unknown session backend: {backend}")
@@ -1,43 +1,106 @@
 # core/state.py
+from typing import Annotated
 from typing import TypedDict
 from typing import List
 from typing import Optional
-from langchain.schema import Document
+from core.memory import Turn
+from core.memory import user_turn
+from tools.doc_store import get_document_store
 
-class AgentState(TypedDict):
+# Conversation turns kept per session besides the rolling summary; MemoryAgent
+# and the session stores share it
+MAX_HISTORY = 20
+
+class ReplaceTurns(list):
+    """A history update that replaces the stored turns instead of extending them."""
+
+def add_turns(current: List[Turn], update: List[Turn]) -> List[Turn]:
+    # Nodes return only the turns they add; MemoryAgent returns the compacted history as ReplaceTurns
+    if isinstance(update, ReplaceTurns):
+        return list(update)
+    return (current or []) + list(update or [])
+
+class DocRef(TypedDict):
+    """A retrieved document in the state: its ID in the document store plus its relevance."""
+    id: str
+    score: Optional[float]
+    source: str
+
+class ConversationState(TypedDict):
+    """What outlives a turn; callers load it from and save it to the session store."""
+    conversation_history: Annotated[List[Turn], add_turns]
+
+class TurnInput(TypedDict):
+    """Set by the caller for one question."""
     question: str
-    documents: List[Document]
+    # Set by admission control when the server is overloaded: no web lookups this turn
+    degraded: bool
+
+class TurnState(TypedDict, total=False):
+    """Scratch data of one turn; the planner clears it before any routing reads it."""
+    documents: List[DocRef]
     generation: str
     source: str
-    search_query: Optional[str]
-    conversation_history: List[str]
-    llm_attempted: bool
     llm_success: bool
-    rag_attempted: bool
     rag_success: bool
-    wiki_attempted: bool
+    rag_score: float
     wiki_success: bool
-    ddg_attempted: bool
     ddg_success: bool
-    current_tool: Optional[str]
-    retry_count: int
+    # Set by the cache lookup at the start of every turn
+    cache_hit: bool
+    cache_eligible: bool
+    answer_note: str
 
-def initialize_state() -> AgentState:
+class AgentState(ConversationState, TurnInput, TurnState):
+    """The graph's state. Every node returns only the keys it changes."""
+
+def initialize_turn() -> dict:
+    """Per-turn fields; reset before every question so routing never sees the previous turn."""
     return {
-        "question": "",
         "documents": [],
         "generation": "",
         "source": "",
-        "search_query": None,
-        "conversation_history": [],
-        "llm_attempted": False,
         "llm_success": False,
-        "rag_attempted": False,
         "rag_success": False,
-        "wiki_attempted": False,
+        "rag_score": 0.0,
         "wiki_success": False,
-        "ddg_attempted": False,
         "ddg_success": False,
-        "current_tool": None,
-        "retry_count": 0
-    }
\ No newline at end of file
+        "answer_note": ""
+    }
+
+def new_turn(question: str, history: List[Turn] = None, degraded: bool = False) -> dict:
+    """Graph input for one question: the stored history plus the question as its newest turn."""
+    return {
+        "question": question,
+        "conversation_history": list(history or []) + [user_turn(question)],
+        "degraded": degraded,
+    }
+
+def initialize_state() -> AgentState:
+    """Every key at its default; for driving agents directly."""
+    state = {
+        "question": "",
+        "conversation_history": [],
+        "degraded": False,
+        "cache_hit": False,
+        "cache_eligible": False,
+    }
+    state.update(initialize_turn())
+    return state
+
+def document_refs(docs) -> List[DocRef]:
+    """Put retrieved Documents in the document store and return references to them."""
+    store = get_document_store()
+    return [
+        {"id": store.put(doc), "score": doc.metadata.get("score"), "source": doc.metadata.get("source", "")}
+        for doc in docs
+    ]
+
+def load_documents(refs: List[DocRef]) -> list:
+    """The Documents behind `refs`, in order; any the store has since evicted are skipped."""
+    store = get_document_store()
+    docs = (store.get(ref["id"]) for ref in refs or [])
+    return [doc for doc in docs if doc is not None]
+
+def top_score(refs: List[DocRef]) -> float:
+    return max((ref["score"] for ref in refs if ref.get("score") is not None), default=0.0)
@@ -0,0 +1,67 @@
+# core/streaming.py
+import json
+from datetime import datetime
+
+# Nodes whose LLM tokens make up the answer the patient sees
+STREAMING_NODES = {"llm_agent", "executor"}
+STREAM_MODES = ["updates", "messages", "values"]
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+class _EventBuilder:
+    """Turns LangGraph stream parts into progress/token/done events."""
+
+    def __init__(self):
+        self.token_node = None
+        self.final_state = None
+
+    def handle(self, mode, chunk):
+        if mode == "updates":
+            for node in chunk:
+                yield {"event": "progress", "node": node}
+        elif mode == "messages":
+            message, metadata = chunk
+            node = metadata.get("langgraph_node")
+            text = message.content if isinstance(message.content, str) else ""
+            if node not in STREAMING_NODES or not text:
+                return
+            if self.token_node and node != self.token_node:
+                # An earlier node streamed an answer that is being replaced
+                yield {"event": "reset", "node": node}
+            self.token_node = node
+            yield {"event": "token", "node": node, "text": text}
+        elif mode == "values":
+            self.final_state = chunk
+
+    def done(self):
+        state = self.final_state or {}
+        return {
+            "event": "done",
+            "response": state.get("generation") or "I couldn't generate a response.",
+            "source": state.get("source", ""),
+            "timestamp": datetime.now().strftime("%H:%M"),
+        }
+
+def iter_events(workflow, state, result: dict = None):
+    """Run the graph synchronously, yielding events as it progresses.
+
+    If given, `result` is filled with the final graph state before the done
+    event is yielded, so callers can persist the updated conversation.
+    """
+    builder = _EventBuilder()
+    for mode, chunk in workflow.stream(state, stream_mode=STREAM_MODES):
+        yield from builder.handle(mode, chunk)
+    if result is not None:
+        result.update(builder.final_state or {})
+    yield builder.done()
+
+async def aiter_events(workflow, state, result: dict = None):
+    """Async counterpart of `iter_events` for the FastAPI server."""
+    builder = _EventBuilder()
+    async for mode, chunk in workflow.astream(state, stream_mode=STREAM_MODES):
+        for event in builder.handle(mode, chunk):
+            yield event
+    if result is not None:
+        result.update(builder.final_state or {})
+    yield builder.done()
@@ -1,15 +1,38 @@
 # main.py
+import argparse
+import json
+from pathlib import Path
 from dotenv import load_dotenv
+from core.batch import BATCH_CONCURRENCY
+from core.batch import run_batch_file
 from core.langgraph_workflow import setup_workflow
-from core.state import initialize_state
+from core.resources import registry
+from core.state import new_turn
 
 def main():
+    parser = argparse.ArgumentParser(description="Interactive Medical AI Assistant consultation.")
+    parser.add_argument("--warmup", action="store_true", help="load all models before the first question")
+    parser.add_argument("--batch", metavar="INPUT", help="answer every question in a JSONL file instead of asking interactively")
+    parser.add_argument("--output", help="JSONL answers file for --batch (default: INPUT.answers.jsonl); an existing one is resumed")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="graph runs in flight for --batch")
+    args = parser.parse_args()
+
     # Load environment variables
     load_dotenv()
+
+    if args.warmup:
+        registry.warmup(background=False)
     
     # Initialize the workflow and state
     app = setup_workflow()
-    conversation_state = initialize_state()
+
+    if args.batch:
+        output = args.output or str(Path(args.batch).with_suffix(".answers.jsonl"))
+        summary = run_batch_file(app, args.batch, output, args.concurrency)
+        print(json.dumps(summary))
+        return
+
+    history = []
     
     print("=== Medical AI Assistant (Type 'exit' to quit) ===")
     
@@ -17,32 +40,13 @@ def main():
         query = input("\nAsk your medical question: ").strip()
         
         if query.lower() == "exit":
-            conversation_state = initialize_state()  # Reset state
+            history = []  # Reset the consultation
             print("\n=== Consultation Ended. Conversation history cleared. ===")
             break
             
-        # Update state with new question
-        conversation_state.update({
-            "question": query,
-            "documents": [],
-            "generation": "",
-            "source": "",
-            "search_query": None,
-            "llm_attempted": False,
-            "llm_success": False,
-            "rag_attempted": False,
-            "rag_success": False,
-            "wiki_attempted": False,
-            "wiki_success": False,
-            "ddg_attempted": False,
-            "ddg_success": False,
-            "current_tool": None,
-            "retry_count": 0
-        })
-        
-        # Run the workflow
-        result = app.invoke(conversation_state)
-        conversation_state.update(result)
+        # Run the workflow on a fresh turn; only the history carries over
+        result = app.invoke(new_turn(query, history))
+        history = result.get("conversation_history", [])
         
         # Print response
         if result.get("generation"):
@@ -35,6 +35,10 @@ setup(
         'flask',
         'pytest'
     ],
+    extras_require={
+        # int8 ONNX embedding backend; onnx itself is only needed to export the model
+        'onnx': ['onnxruntime', 'tokenizers', 'onnx'],
+    },
     python_requires='>=3.9',
     classifiers=[
         # 'Development Status :: 5 - Production/Stable',
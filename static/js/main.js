@@ -79,22 +79,8 @@ document.addEventListener('DOMContentLoaded', function() {
         // Show typing indicator
         typingIndicator.classList.add('active');
         
-        // Send to server
-        fetch('/chat', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ message: message })
-        })
-        .then(response => response.json())
-        .then(data => {
-            // Add bot response
-            addMessage(data.response, false, data.timestamp, data.source);
-            
-            // Show toast notification
-            showToast('Message received');
-        })
+        // Stream the answer from the server
+        streamChat(message)
         .catch(error => {
             console.error('Error:', error);
             addMessage("Sorry, I encountered an error. Please try again.", false);
@@ -102,7 +88,92 @@ document.addEventListener('DOMContentLoaded', function() {
         })
         .finally(() => {
             typingIndicator.classList.remove('active');
+            setStatus(defaultStatus);
+        });
+    }
+    
+    // Status text reflecting the last agent the graph finished
+    const statusText = document.querySelector('.status-indicator span:last-child');
+    const defaultStatus = statusText ? statusText.textContent : '';
+    const progressLabels = {
+        memory: 'Conversation reviewed',
+        cache_lookup: 'Checked recent answers',
+        planner: 'Consultation planned',
+        llm_agent: 'Medical knowledge consulted',
+        retriever: 'Medical library searched',
+        wikipedia: 'Wikipedia checked',
+        duckduckgo: 'Web searched',
+        fanout: 'Sources searched',
+        executor: 'Answer written',
+        explanation: 'Finishing up'
+    };
+    
+    function setStatus(text) {
+        if (statusText) statusText.textContent = text;
+    }
+    
+    async function streamChat(message) {
+        const response = await fetch('/chat/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ message: message })
         });
+        if (!response.ok || !response.body) {
+            throw new Error(`Request failed with status ${response.status}`);
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let bubble = null;
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            // Server-sent events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                const dataLine = frame.split('\n').find(line => line.startsWith('data: '));
+                if (!dataLine) continue;
+                bubble = handleStreamEvent(JSON.parse(dataLine.slice(6)), bubble);
+            }
+        }
+    }
+    
+    function handleStreamEvent(event, bubble) {
+        if (event.event === 'progress') {
+            setStatus(progressLabels[event.node] || defaultStatus);
+        } else if (event.event === 'token') {
+            if (!bubble) {
+                typingIndicator.classList.remove('active');
+                bubble = addMessage('', false);
+            }
+            bubble.textContent += event.text;
+            chatContainer.scrollTop = chatContainer.scrollHeight;
+        } else if (event.event === 'reset' && bubble) {
+            bubble.textContent = '';
+        } else if (event.event === 'done') {
+            if (!bubble) bubble = addMessage('', false);
+            bubble.textContent = event.response;
+            addTimestamp(bubble.parentElement, event.timestamp);
+            showToast('Message received');
+        } else if (event.event === 'error') {
+            throw new Error(event.detail);
+        }
+        return bubble;
+    }
+    
+    function addTimestamp(contentDiv, timestamp) {
+        const timeSpan = document.createElement('span');
+        timeSpan.className = 'message-time';
+        timeSpan.textContent = timestamp;
+        contentDiv.appendChild(timeSpan);
     }
     
     function addMessage(content, isUser, timestamp = null) {  // Removed source parameter
@@ -118,10 +189,7 @@ document.addEventListener('DOMContentLoaded', function() {
         contentDiv.innerHTML = `<p>${content}</p>`;
         
         if (timestamp) {
-            const timeSpan = document.createElement('span');
-            timeSpan.className = 'message-time';
-            timeSpan.textContent = timestamp;
-            contentDiv.appendChild(timeSpan);
+            addTimestamp(contentDiv, timestamp);
         }
         
         messageDiv.appendChild(avatarDiv);
@@ -140,6 +208,8 @@ document.addEventListener('DOMContentLoaded', function() {
             top: chatContainer.scrollHeight,
             behavior: 'smooth'
         });
+        
+        return contentDiv.querySelector('p');
     }
     
     function handleInputKeydown(e) {
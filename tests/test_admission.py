@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.admission import FOLLOW_UP
+from core.admission import NEW_CONVERSATION
+from core.admission import AdmissionController
+from core.admission import Overloaded
+
+
+def hold(controller, priority, started, release, outcomes):
+    try:
+        ticket = controller.acquire(priority)
+    except Overloaded as e:
+        outcomes.append(e.status_code)
+        return
+    outcomes.append(ticket)
+    started.set()
+    release.wait()
+    controller.release(ticket)
+
+
+def test_full_queue_is_refused_with_retry_after():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, deadline=5)
+    release, outcomes = threading.Event(), []
+    threads = []
+    for _ in range(2):
+        threads.append(threading.Thread(target=hold, args=(controller, NEW_CONVERSATION, threading.Event(), release, outcomes)))
+        threads[-1].start()
+        time.sleep(0.05)
+
+    with pytest.raises(Overloaded) as refused:
+        controller.acquire(NEW_CONVERSATION)
+    assert refused.value.status_code == 429 and refused.value.headers["Retry-After"] == "1"
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert controller.stats()["admitted"] == 2 and controller.stats()["in_flight"] == 0
+
+
+def test_follow_up_displaces_a_new_conversation():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, deadline=5)
+    release, outcomes = threading.Event(), []
+    first = threading.Thread(target=hold, args=(controller, NEW_CONVERSATION, threading.Event(), release, outcomes))
+    first.start()
+    time.sleep(0.05)
+    queued = threading.Thread(target=hold, args=(controller, NEW_CONVERSATION, threading.Event(), release, outcomes))
+    queued.start()
+    time.sleep(0.05)
+    follow_up = threading.Thread(target=hold, args=(controller, FOLLOW_UP, threading.Event(), release, outcomes))
+    follow_up.start()
+    queued.join(timeout=1)
+    assert 503 in outcomes
+
+    release.set()
+    first.join()
+    follow_up.join()
+    assert [o.priority for o in outcomes if not isinstance(o, int)] == [NEW_CONVERSATION, FOLLOW_UP]
+
+
+def test_expected_wait_beyond_deadline_is_refused_up_front():
+    controller = AdmissionController(max_concurrent=1, max_queue=10, deadline=1)
+    controller.service_seconds = 2.0
+    ticket = controller.acquire()
+    with pytest.raises(Overloaded) as refused:
+        controller.acquire()
+    assert refused.value.status_code == 503 and refused.value.retry_after == 2
+    controller.release(ticket)
+
+
+def test_queued_requests_time_out_and_deep_queues_degrade():
+    controller = AdmissionController(max_concurrent=1, max_queue=10, deadline=0.1, degrade_depth=1)
+
+    async def scenario():
+        holder = await controller.aacquire()
+        waiters = [asyncio.ensure_future(controller.aacquire()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        controller.release(holder)
+        granted = await waiters[0]
+        with pytest.raises(Overloaded):
+            await waiters[1]
+        controller.release(granted)
+        return granted
+
+    granted = asyncio.run(scenario())
+    assert granted.degraded
+    stats = controller.stats()
+    assert stats["timed_out"] == 1 and stats["degraded"] == 1 and stats["queued"] == 0
+
+
+def test_releasing_twice_frees_one_slot():
+    controller = AdmissionController(max_concurrent=2, max_queue=1, deadline=5)
+    first, second = controller.acquire(), controller.acquire()
+    controller.release(first)
+    controller.release(first)
+    assert controller.stats()["in_flight"] == 1
+    controller.release(second)
+
+
+def test_stream_slot_is_released_when_the_client_disconnects_before_the_body():
+    pytest.importorskip("fastapi")
+    from api import AdmittedStreamingResponse
+
+    controller = AdmissionController(max_concurrent=1, max_queue=1, deadline=5)
+    ticket = controller.acquire()
+
+    async def body():
+        yield "never sent"
+
+    async def disconnected_send(message):
+        raise OSError("client went away")
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    response = AdmittedStreamingResponse(body(), lambda: controller.release(ticket))
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+    with pytest.raises(Exception):
+        asyncio.run(response(scope, receive, disconnected_send))
+    assert controller.stats()["in_flight"] == 0
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from langchain.schema import Document
+
+from core.langgraph_workflow import setup_workflow
+from core.resources import registry
+from core.state import new_turn
+from tools.fake_llm import FakeChatModel
+
+COLD_START = 0.3
+
+
+class SlowToBuildRetriever:
+    def __init__(self):
+        # Stands in for opening the index: blocking work done on first use
+        time.sleep(COLD_START)
+
+    async def asearch_with_scores(self, query, keywords=None):
+        doc = Document(page_content="Dengue causes high fever and joint pain.", metadata={"score": 0.9, "source": "book.pdf"})
+        return [(doc, 0.9)]
+
+
+@pytest.fixture
+def fake_resources():
+    saved = {name: (resource.factory, resource.required) for name, resource in registry._resources.items()}
+    registry.override("llm", lambda: FakeChatModel(latency=0.0))
+    registry.override("retriever", SlowToBuildRetriever)
+    yield registry
+    for name, (factory, required) in saved.items():
+        registry.override(name, factory, required)
+
+
+def test_ainvoke_builds_cold_resources_off_the_event_loop(fake_resources):
+    workflow = setup_workflow(retrieval_mode="sequential", routing_mode="retrieval_first", semantic_cache=False)
+
+    async def scenario():
+        gaps, last = [], time.perf_counter()
+        done = asyncio.Event()
+
+        async def ticker():
+            nonlocal last
+            while not done.is_set():
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        tick = asyncio.ensure_future(ticker())
+        result = await workflow.ainvoke(new_turn("What are the symptoms of dengue?"))
+        done.set()
+        await tick
+        return result, max(gaps)
+
+    result, longest_stall = asyncio.run(scenario())
+    assert result["source"] == "retrieved_docs" and result["generation"]
+    assert longest_stall < COLD_START / 2
+
+
+class WeakRetriever:
+    async def asearch_with_scores(self, query, keywords=None):
+        doc = Document(page_content="Dengue spreads through mosquito bites.", metadata={"score": 0.3, "source": "book.pdf"})
+        return [(doc, 0.3)]
+
+
+def test_weak_local_evidence_survives_empty_web_fallbacks(fake_resources, monkeypatch):
+    from agents.duckduckgo_agent import DuckDuckGoAgent
+    from agents.llm_agent import LLMAgent
+    from agents.wikipedia_agent import WikipediaAgent
+
+    async def no_results(state):
+        return []
+
+    async def llm_down(state):
+        return {"llm_success": False}
+
+    fake_resources.override("retriever", WeakRetriever)
+    monkeypatch.setattr(LLMAgent, "aprocess", llm_down)
+    monkeypatch.setattr(WikipediaAgent, "afetch", no_results)
+    monkeypatch.setattr(DuckDuckGoAgent, "afetch", no_results)
+    workflow = setup_workflow(retrieval_mode="sequential", routing_mode="retrieval_first", semantic_cache=False)
+
+    result = asyncio.run(workflow.ainvoke(new_turn("How is dengue spread?")))
+    assert result["source"] == "retrieved_docs"
+    assert [doc["source"] for doc in result["documents"]] == ["book.pdf"]
+    assert not result["wiki_success"] and not result["ddg_success"]
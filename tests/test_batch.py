@@ -0,0 +1,140 @@
+import asyncio
+import json
+import threading
+import time
+
+from core import batch
+from core.batch import arun_batch
+from core.batch import parse_item
+from core.batch import read_items
+from core.batch import run_batch_file
+
+
+class EchoWorkflow:
+    """Stands in for the compiled graph: answers by echoing the question."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+        self.peak = self.active = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, state):
+        with self._lock:
+            self.calls.append(state["question"])
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        if state["question"] == self.fail_on:
+            raise RuntimeError("boom")
+        return {"generation": f"answer to {state['question']}", "source": "llm_knowledge"}
+
+    async def ainvoke(self, state):
+        return await asyncio.to_thread(self.invoke, state)
+
+
+def write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+
+def test_items_accept_question_and_requests_shapes():
+    assert parse_item({"question": "What is dengue?"}, 3) == ("line-3", "What is dengue?")
+    assert parse_item({"request_id": "user-001", "title": "Fever", "body": "For three days."}, 1) == ("user-001", "Fever\n\nFor three days.")
+    assert parse_item({"request_id": "x"}, 1) is None
+
+
+def test_duplicates_run_once_and_concurrency_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "preembed", lambda questions: len(questions))
+    source = tmp_path / "questions.jsonl"
+    write_jsonl(source, [{"id": str(i), "question": q} for i, q in enumerate(["Fever?", "fever?", "Cough?", "Rash?", "Asthma?", "Gout?"])])
+    workflow = EchoWorkflow()
+
+    summary = run_batch_file(workflow, source, tmp_path / "answers.jsonl", concurrency=2, out=None)
+    records = {r["request_id"]: r for r in map(json.loads, (tmp_path / "answers.jsonl").read_text().splitlines())}
+
+    assert summary["done"] == 6 and len(workflow.calls) == 5 and workflow.peak <= 2
+    assert records["1"]["duplicate_of"] == "0" and records["1"]["answer"] == "answer to Fever?"
+
+
+def test_interrupted_runs_resume_and_retry_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "preembed", lambda questions: len(questions))
+    source, output = tmp_path / "questions.jsonl", tmp_path / "answers.jsonl"
+    write_jsonl(source, [{"id": "a", "question": "Fever?"}, {"id": "b", "question": "Cough?"}, {"id": "c", "question": "Rash?"}])
+    output.write_text(
+        json.dumps({"request_id": "a", "question": "Fever?", "answer": "done before"}) + "\n"
+        + json.dumps({"request_id": "b", "question": "Cough?", "error": "RuntimeError: boom"}) + "\n"
+        + '{"request_id": "c", "quest',
+        encoding="utf-8"
+    )
+    workflow = EchoWorkflow()
+
+    run_batch_file(workflow, source, output, out=None)
+
+    assert sorted(workflow.calls) == ["Cough?", "Rash?"]
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(r["request_id"] for r in records) == ["a", "b", "c"]
+    assert all("error" not in r for r in records)
+
+
+def test_checkpoint_keeps_the_last_record_per_id(tmp_path):
+    output = tmp_path / "answers.jsonl"
+    output.write_text(
+        json.dumps({"request_id": "a", "question": "Fever?", "error": "RuntimeError: boom"}) + "\n"
+        + json.dumps({"request_id": "a", "question": "Fever?", "answer": "retried"}) + "\n"
+        + json.dumps({"request_id": "b", "question": "Cough?", "answer": "first"}) + "\n"
+        + json.dumps({"request_id": "b", "question": "Cough?", "error": "RuntimeError: boom"}) + "\n"
+        + json.dumps({"question": "No id?", "answer": "orphan"}) + "\n" + "[]\n",
+        encoding="utf-8"
+    )
+
+    done = batch.read_checkpoint(output)
+
+    assert list(done) == ["a"] and done["a"]["answer"] == "retried"
+    assert [json.loads(line) for line in output.read_text().splitlines()] == [done["a"]]
+
+
+def test_async_batch_streams_every_item(monkeypatch):
+    monkeypatch.setattr(batch, "preembed", lambda questions: len(questions))
+    items = read_items([json.dumps({"id": str(i), "question": q}) for i, q in enumerate(["Fever?", "Boom", "FEVER?"])])
+    workflow = EchoWorkflow(fail_on="Boom")
+
+    async def collect():
+        return [record async for record in arun_batch(workflow, items, concurrency=2)]
+
+    records = {r["request_id"]: r for r in asyncio.run(collect())}
+    assert set(records) == {"0", "1", "2"}
+    assert records["1"]["error"] == "RuntimeError: boom"
+    assert records["2"]["duplicate_of"] == "0"
+
+
+def test_async_batch_gives_up_on_an_item_that_keeps_being_shed(monkeypatch):
+    from contextlib import asynccontextmanager
+
+    from core.admission import Overloaded
+
+    class AlwaysFull:
+        attempts = 0
+
+        @asynccontextmanager
+        async def aadmit(self, key):
+            self.attempts += 1
+            raise Overloaded(503, 30, "queue is full")
+            yield
+
+    async def no_wait(seconds):
+        waits.append(seconds)
+
+    waits = []
+    monkeypatch.setattr(batch, "preembed", lambda questions: len(questions))
+    monkeypatch.setattr(batch.asyncio, "sleep", no_wait)
+    admission = AlwaysFull()
+
+    async def collect():
+        items = [("a", "Fever?")]
+        return [record async for record in arun_batch(EchoWorkflow(), items, admission=admission, overload_retries=2)]
+
+    [record] = asyncio.run(collect())
+    assert record["error"] == "Overloaded: queue is full"
+    assert admission.attempts == 3 and waits == [30, 30]
@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+
+from core.context_builder import build_context
+from core.context_builder import split_sentences
+from core.memory import count_tokens
+
+VOCABULARY = ["dengue", "fever", "rash", "mosquito", "platelet", "history", "city", "river", "population", "football"]
+
+
+class BagOfWordsEmbeddings:
+    """One dimension per vocabulary word, so similarity follows shared words."""
+
+    def __init__(self):
+        self.batches = 0
+
+    def _vector(self, text):
+        words = text.lower().replace(".", " ").split()
+        return [float(words.count(word)) + 0.01 for word in VOCABULARY]
+
+    def embed_passages(self, texts):
+        self.batches += 1
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def filler(topic, count):
+    return " ".join(f"The {topic} is described in chapter {i} of the guide." for i in range(count))
+
+
+def test_short_context_passes_through():
+    docs = [Document(page_content="Dengue causes fever.")]
+    assert build_context("What is dengue?", docs, budget=100)["text"] == "Dengue causes fever."
+
+
+def test_relevant_sentences_fit_the_budget_without_duplicates():
+    embeddings = BagOfWordsEmbeddings()
+    docs = [
+        Document(page_content=filler("city history", 20) + " Dengue fever spreads through a mosquito bite."),
+        Document(page_content="Dengue fever spreads through a mosquito bite. " + filler("football river", 20)),
+        Document(page_content="A dengue rash and low platelet count are common."),
+    ]
+
+    context = build_context("dengue fever rash mosquito platelet", docs, budget=40, embeddings=embeddings)
+
+    assert context["tokens"] <= 40 and embeddings.batches == 1
+    assert context["text"].count("mosquito bite") == 1
+    assert "platelet" in context["text"]
+    assert context["kept"] < context["sentences"]
+
+
+def test_without_embeddings_the_leading_sentences_are_kept():
+    class Broken:
+        def embed_passages(self, texts):
+            raise RuntimeError("model not loaded")
+
+    docs = [Document(page_content=filler("dengue", 30))]
+    context = build_context("dengue", docs, budget=50, embeddings=Broken())
+    assert 0 < context["tokens"] <= 50 and context["text"].startswith("The dengue is described in chapter 0")
+    assert count_tokens(docs[0].page_content) > 50
+
+
+def test_run_on_snippets_are_split():
+    assert len(split_sentences(" ".join(["word"] * 130))) == 3
+    assert split_sentences("Fever and rash.\nSee a doctor soon ... Rest well today.") == [
+        "Fever and rash.", "See a doctor soon", "Rest well today."
+    ]
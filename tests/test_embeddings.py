@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from tools import embeddings
+from tools.embeddings import EmbeddingCache
+from tools.embeddings import EmbeddingService
+from tools.embeddings import MicroBatcher
+from tools.embeddings import cache_key
+
+
+def test_cache_key_ignores_case_and_whitespace():
+    assert cache_key("m", "Dengue  symptoms\n") == cache_key("m", "dengue symptoms")
+    assert cache_key("m", "dengue") != cache_key("other", "dengue")
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(max_size=2, path=str(tmp_path / "cache.sqlite"))
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    cache.get("a")
+    cache.put("c", [3.0])
+    assert len(cache) == 2
+    # Evicted from memory but still served from the disk tier
+    assert cache.get("b") == [2.0]
+
+
+def test_micro_batcher_merges_concurrent_calls():
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    batcher = MicroBatcher(embed, window_ms=50)
+    results = {}
+    threads = [
+        threading.Thread(target=lambda t=text: results.__setitem__(t, batcher.submit(t).result()))
+        for text in ["a", "bb", "ccc", "a"]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {"a": [1.0], "bb": [2.0], "ccc": [3.0]}
+    assert len(calls) < 4
+
+
+def test_passages_do_not_touch_the_query_cache(monkeypatch):
+    class Model:
+        def embed_documents(self, texts):
+            return [[float(len(text))] for text in texts]
+
+    monkeypatch.setattr(embeddings, "load_model", lambda *args: Model())
+    service = EmbeddingService(cache=EmbeddingCache(max_size=8))
+
+    assert service.embed_passages(["Dengue causes fever.", "Dengue causes fever."]) == [[20.0], [20.0]]
+    assert len(service.cache) == 0 and service.stats()["cache_misses"] == 0
+    assert len(service.passage_cache) == 1
@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+
+from agents import executor_agent
+from agents.executor_agent import ExecutorAgent
+from core.state import document_refs
+from core.state import initialize_state
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return type("Response", (), {"content": "Rest and drink fluids."})()
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = CountingLLM()
+    monkeypatch.setattr(executor_agent, "get_resource", lambda name: fake)
+    return fake
+
+
+def test_llm_answer_is_reused_even_when_documents_exist(llm):
+    state = initialize_state()
+    state.update({
+        "question": "How do I treat a cold?",
+        "documents": document_refs([Document(page_content="Colds are viral.")]),
+        "generation": "Rest at home.",
+        "llm_success": True,
+    })
+    state = ExecutorAgent.process(state)
+    assert llm.calls == 0
+    assert state["generation"] == "Rest at home." and state["source"] == "llm_knowledge"
+
+
+def test_documents_are_used_when_llm_did_not_answer(llm):
+    state = initialize_state()
+    state.update({"question": "How do I treat a cold?", "documents": document_refs([Document(page_content="Colds are viral.")])})
+    update = ExecutorAgent.process(state)
+    assert llm.calls == 1 and update["source"] == "retrieved_docs"
+    assert update["conversation_history"] == [{"role": "doctor", "content": "Rest and drink fluids."}]
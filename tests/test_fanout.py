@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+
+from agents import fanout_agent
+from agents.fanout_agent import FanOutRetrievalAgent
+from core.state import load_documents
+
+
+def make_sources(monkeypatch, rag, wiki, ddg):
+    class Source:
+        def __init__(self, delay, docs):
+            self.delay, self.docs = delay, docs
+
+        def fetch(self, state, timeout=None):
+            time.sleep(self.delay)
+            return self.docs
+
+        async def afetch(self, state):
+            await asyncio.sleep(self.delay)
+            return self.docs
+
+    monkeypatch.setattr(fanout_agent, "SOURCES", [
+        ("rag", "medical PDF database", Source(*rag), 0.5),
+        ("wiki", "Wikipedia", Source(*wiki), 0.5),
+        ("ddg", "DuckDuckGo", Source(*ddg), 0.5),
+    ])
+
+
+def new_state():
+    return {"question": "dengue symptoms", "documents": [], "conversation_history": []}
+
+
+def test_fast_local_hit_does_not_wait_for_external_sources(monkeypatch):
+    make_sources(monkeypatch, (0.0, [Document(page_content="rag")]), (0.4, [Document(page_content="wiki")]), (0.4, []))
+    start = time.monotonic()
+    state = FanOutRetrievalAgent.process(new_state())
+    assert time.monotonic() - start < 0.3
+    assert [d.page_content for d in load_documents(state["documents"])] == ["rag"]
+    assert state["rag_success"] and not state["wiki_success"]
+
+
+def test_results_are_merged_by_priority_and_deduplicated(monkeypatch):
+    make_sources(
+        monkeypatch,
+        (0.05, []),
+        (0.1, [Document(page_content="Dengue causes fever.")]),
+        (0.0, [Document(page_content="dengue  causes fever."), Document(page_content="ddg")]),
+    )
+    state = asyncio.run(FanOutRetrievalAgent.aprocess(new_state()))
+    assert [d.page_content for d in load_documents(state["documents"])] == ["Dengue causes fever.", "ddg"]
+    assert state["wiki_success"] and state["ddg_success"] and not state["rag_success"]
+
+
+def test_slow_sources_are_cut_off_at_their_deadline(monkeypatch):
+    make_sources(monkeypatch, (2.0, [Document(page_content="late")]), (2.0, []), (0.0, [Document(page_content="ddg")]))
+    start = time.monotonic()
+    state = asyncio.run(FanOutRetrievalAgent.aprocess(new_state()))
+    assert time.monotonic() - start < 1.0
+    assert [d.page_content for d in load_documents(state["documents"])] == ["ddg"]
+
+
+def test_sync_branch_past_its_deadline_gives_its_thread_back(monkeypatch, tmp_path):
+    import threading
+
+    from agents import wikipedia_agent
+    from agents.wikipedia_agent import WikipediaAgent
+    from tools.search_cache import CachedSearch
+    from tools.search_cache import SearchCache
+
+    release = threading.Event()
+    cache = SearchCache(path=str(tmp_path / "search.sqlite3"), ttl=60)
+    slow = CachedSearch("wikipedia", lambda query: release.wait(5) and "", timeout=5, cache=cache, offline_dir="")
+    monkeypatch.setattr(wikipedia_agent, "wiki_search", slow)
+    make_sources(monkeypatch, (0.0, []), (0.0, []), (0.0, []))
+    fanout_agent.SOURCES[1] = ("wiki", "Wikipedia", WikipediaAgent, 0.2)
+    monkeypatch.setattr(fanout_agent, "_pool", fanout_agent.ThreadPoolExecutor(max_workers=3))
+
+    try:
+        start = time.monotonic()
+        state = FanOutRetrievalAgent.process(new_state())
+        assert time.monotonic() - start < 0.5 and not state["wiki_success"]
+        # All three fan-out threads are free again although the lookup itself is still running
+        barrier = threading.Barrier(3)
+        probes = [fanout_agent._pool.submit(barrier.wait, 0.3) for _ in range(3)]
+        for probe in probes:
+            probe.result(timeout=1)
+        assert slow.timeouts == 1 and not release.is_set()
+    finally:
+        release.set()
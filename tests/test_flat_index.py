@@ -0,0 +1,63 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_community")
+
+from tools import flat_index
+from tools.flat_index import FlatIndex
+from tools.flat_index import FlatVectorStore
+from tools.flat_index import export_flat_index
+
+
+class FakeChroma:
+    def __init__(self, vectors):
+        self.rows = [(f"id{i}", f"chunk {i}", {"page": i}, vector) for i, vector in enumerate(vectors)]
+
+    def get(self, include=None, limit=None, offset=0):
+        page = self.rows[offset:offset + limit]
+        return {
+            "ids": [row[0] for row in page],
+            "documents": [row[1] for row in page],
+            "metadatas": [row[2] for row in page],
+            "embeddings": [row[3] for row in page],
+        }
+
+
+class FakeEmbeddings:
+    def embed_query(self, text):
+        return [1.0, 0.0, 0.0]
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(50, 3)).astype(np.float32)
+
+
+def test_export_round_trips_and_search_is_exact(tmp_path, vectors, monkeypatch):
+    monkeypatch.setattr(flat_index, "EXPORT_PAGE_SIZE", 16)
+    monkeypatch.setattr(flat_index, "SEARCH_BLOCK_ROWS", 7)
+    index = export_flat_index(FakeChroma(vectors), tmp_path / "flat", "v1")
+
+    assert len(index) == 50 and index.record(3) == ["id3", "chunk 3", {"page": 3}]
+    assert FlatIndex.open(tmp_path / "flat", "v2") is None
+
+    queries = vectors[:4] * 2.0
+    rows, scores = index.search(queries, k=5)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(queries @ unit.T), axis=1)[:, :5]
+    assert (rows == expected).all()
+    assert scores[:, 0] == pytest.approx(np.ones(4), abs=1e-5)
+
+    fetched = index.get(ids=["id7", "missing", "id2"], include=["documents", "embeddings"])
+    assert fetched["ids"] == ["id7", "id2"] and fetched["documents"] == ["chunk 7", "chunk 2"]
+    assert len(fetched["embeddings"][0]) == 3
+
+
+def test_flat_vector_store_reports_cosine_relevance(tmp_path):
+    vectors = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.6, 0.8, 0.0]]
+    store = FlatVectorStore(export_flat_index(FakeChroma(vectors), tmp_path / "flat", "v1", dtype="float16"), FakeEmbeddings())
+
+    results = store.similarity_search_with_relevance_scores("anything", k=2)
+    assert [doc.page_content for doc, _ in results] == ["chunk 0", "chunk 2"]
+    assert [score for _, score in results] == pytest.approx([1.0, 0.6], abs=1e-3)
+    assert results[1][0].metadata == {"page": 2}
@@ -0,0 +1,102 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_community")
+
+from langchain.schema import Document
+from langchain_core.vectorstores import VectorStore
+
+from tools.bm25_index import BM25Index
+from tools.vector_store import HybridRetriever
+from tools.vector_store import reciprocal_rank_fusion
+
+CHUNKS = {
+    "c1": ("Metformin is a first-line medicine for type 2 diabetes.", [1.0, 0.0]),
+    "c2": ("Diabetes raises blood sugar and needs lifestyle changes.", [0.9, 0.1]),
+    "c3": ("Dengue fever is spread by mosquitoes.", [0.0, 1.0]),
+}
+
+
+class FakeEmbeddings:
+    def embed_query(self, text):
+        return [1.0, 0.0]
+
+
+class FakeChroma(VectorStore):
+    """Vector search that never surfaces the chunk naming the drug."""
+
+    embeddings = FakeEmbeddings()
+
+    def similarity_search_with_relevance_scores(self, query, k=4, **kwargs):
+        return [(Document(page_content=CHUNKS["c2"][0]), 0.8), (Document(page_content=CHUNKS["c3"][0]), 0.1)][:k]
+
+    def get(self, ids=None, include=None):
+        ids = [chunk_id for chunk_id in ids if chunk_id in CHUNKS]
+        return {
+            "ids": ids,
+            "documents": [CHUNKS[i][0] for i in ids],
+            "metadatas": [{"source": f"{i}.pdf"} for i in ids],
+            "embeddings": [CHUNKS[i][1] for i in ids],
+        }
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError
+
+    def similarity_search(self, query, k=4, **kwargs):
+        raise NotImplementedError
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError
+
+
+def build_index():
+    return BM25Index.build(list(CHUNKS), [text for text, _ in CHUNKS.values()], corpus_version="v1")
+
+
+def test_bm25_ranks_rare_terms_and_round_trips(tmp_path):
+    index = build_index()
+    assert [chunk_id for chunk_id, _ in index.search("What is metformin used for?", 3)] == ["c1"]
+    assert index.search("unknown words", 3) == []
+
+    path = tmp_path / "bm25.npz"
+    index.save(path)
+    assert BM25Index.load(path, "v1").search("diabetes", 3) == index.search("diabetes", 3)
+    assert BM25Index.load(path, "v2") is None
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b"], ["b", "c"]])
+    assert [key for key, _ in fused] == ["b", "a", "c"]
+
+
+def test_hybrid_retriever_recovers_keyword_hits_with_cosine_scores():
+    retriever = HybridRetriever(vectorstore=FakeChroma(), bm25=build_index(), search_kwargs={"k": 2})
+    results = retriever.search_with_scores("Context: Patient: I have diabetes.\nQuestion: metformin dose?", "metformin dose?")
+
+    texts = [doc.page_content for doc, _ in results]
+    assert CHUNKS["c1"][0] in texts and CHUNKS["c3"][0] not in texts
+    metformin = next(doc for doc, _ in results if doc.page_content == CHUNKS["c1"][0])
+    assert metformin.metadata["score"] == pytest.approx(1.0)
+    assert metformin.metadata["source"] == "c1.pdf" and metformin.metadata["bm25_score"] > 0
+
+
+def test_reranker_scores_do_not_depend_on_the_rest_of_the_batch():
+    from tools.reranker import CrossEncoderReranker
+
+    class Identity:
+        pass
+
+    class LogitModel:
+        activation_fn = Identity()
+        logits = {"metformin": 2.0, "diabetes": 0.5, "dengue": 0.7}
+
+        def predict(self, pairs):
+            return [self.logits[text] for _, text in pairs]
+
+    reranker = CrossEncoderReranker(model=LogitModel())
+    with_outlier = reranker.score("q", ["metformin", "diabetes"])
+    in_range = reranker.score("q", ["diabetes", "dengue"])
+
+    assert with_outlier[1] == in_range[0] == pytest.approx(0.6225, abs=1e-4)
+    assert CrossEncoderReranker(model=LogitModel(), activation="none").score("q", ["diabetes"]) == [0.5]
@@ -0,0 +1,105 @@
+import pytest
+
+pytest.importorskip("langchain_community")
+
+from langchain.schema import Document
+
+from tools import ingestion
+from tools.index_manager import expected_manifest
+from tools.index_manager import manifest_mismatches
+from tools.index_manager import new_manifest
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self.docs = {}
+
+    def add_documents(self, documents, ids):
+        self.docs.update(zip(ids, documents))
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            self.docs.pop(chunk_id, None)
+
+
+@pytest.fixture
+def text_loader(monkeypatch):
+    def load(path):
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield [Document(page_content=line.strip())]
+    monkeypatch.setitem(ingestion.LOADERS, ".txt", load)
+
+
+def test_manifest_detects_parameter_changes():
+    manifest = new_manifest("model-a")
+    assert manifest_mismatches(manifest, expected_manifest("model-a")) == []
+    assert manifest_mismatches(manifest, expected_manifest("model-b"))
+    assert manifest_mismatches(None, expected_manifest("model-a")) == ["no manifest"]
+
+
+def test_sync_only_embeds_changed_chunks(tmp_path, text_loader):
+    store, manifest = FakeVectorStore(), new_manifest("model-a")
+    (tmp_path / "a.txt").write_text("fever\ncough\n", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("rash\n", encoding="utf-8")
+
+    report = ingestion.sync_directory(store, tmp_path, manifest)
+    assert sorted(report.added) == ["a.txt", "b.txt"]
+    assert report.chunks_added == 3 and len(store.docs) == 3
+
+    (tmp_path / "a.txt").write_text("fever\nheadache and cough\n", encoding="utf-8")
+    (tmp_path / "b.txt").unlink()
+    report = ingestion.sync_directory(store, tmp_path, manifest)
+    assert report.changed == ["a.txt"] and report.removed == ["b.txt"]
+    assert report.chunks_added == 1 and report.chunks_deleted == 2
+    assert sorted(doc.page_content for doc in store.docs.values()) == ["fever", "headache and cough"]
+    assert manifest["chunk_count"] == 2
+
+    report = ingestion.sync_directory(store, tmp_path, manifest)
+    assert not report.has_changes
+
+
+def test_shipped_index_without_documents_is_adopted_not_wiped(tmp_path, monkeypatch):
+    from tools import vector_store
+    from tools.index_manager import read_manifest
+
+    class ShippedCollection(FakeVectorStore):
+        dropped = False
+
+        def get(self, include=None):
+            return {"ids": ["c1", "c2"]}
+
+        def delete_collection(self):
+            ShippedCollection.dropped = True
+
+    monkeypatch.setattr(vector_store, "DOCS_DIR", tmp_path / "data")
+    monkeypatch.setattr(vector_store, "VECTOR_DB_DIR", tmp_path / "medical_db")
+    monkeypatch.setattr(vector_store, "RETRIEVER_MODE", "vector")
+    monkeypatch.setattr(vector_store, "VECTOR_BACKEND", "chroma")
+    monkeypatch.setattr(vector_store, "_open_vectorstore", ShippedCollection)
+
+    vector_store.sync_vectorstore()
+
+    assert not ShippedCollection.dropped
+    manifest = read_manifest(tmp_path / "medical_db")
+    assert manifest["chunk_count"] == 2 and manifest["embedding_backend"] == "torch"
+
+
+def test_corpus_version_never_loads_the_index(tmp_path, monkeypatch):
+    from tools import vector_store
+    from tools.index_manager import write_manifest
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the cache key must not trigger ingestion")
+
+    monkeypatch.setattr(vector_store, "initialize_vectorstore", fail)
+    monkeypatch.setattr(vector_store, "sync_vectorstore", fail)
+    monkeypatch.setattr(vector_store, "VECTOR_DB_DIR", tmp_path)
+    monkeypatch.setattr(vector_store, "_corpus_version", None)
+    monkeypatch.setattr(vector_store, "_manifest_version", None)
+    assert vector_store.get_corpus_version() == "unindexed"
+
+    manifest = new_manifest("model-a")
+    write_manifest(tmp_path, manifest)
+    assert vector_store.get_corpus_version() == vector_store.corpus_version(manifest)
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from core import instrumentation
+from core.instrumentation import instrumented_node
+from core.instrumentation import record_exception
+from core.instrumentation import render_metrics
+from core.instrumentation import trace_request
+
+
+class Response:
+    content = "Rest."
+    usage_metadata = {"input_tokens": 120, "output_tokens": 8}
+
+
+class FakeRetrieverAgent:
+    @staticmethod
+    def process(state):
+        try:
+            raise TimeoutError("index busy")
+        except Exception as e:
+            record_exception(e)
+        return {"documents": [{"id": "a", "score": 0.42, "source": "book.pdf"}]}
+
+    @classmethod
+    async def aprocess(cls, state):
+        return cls.process(state)
+
+
+class FakeLLMAgent:
+    @staticmethod
+    def process(state):
+        instrumentation.record_llm_usage(Response())
+        return state
+
+    @classmethod
+    async def aprocess(cls, state):
+        return cls.process(state)
+
+
+class BrokenAgent:
+    @staticmethod
+    def process(state):
+        raise ValueError("boom")
+
+
+def test_sampled_requests_keep_a_per_node_trace(monkeypatch):
+    monkeypatch.setattr(instrumentation, "TRACE_SAMPLE_RATE", 1.0)
+    retriever = instrumented_node("retriever", FakeRetrieverAgent)
+    llm = instrumented_node("llm_agent", FakeLLMAgent)
+
+    with trace_request("test") as trace:
+        llm.invoke(retriever.invoke({}))
+    spans = trace.to_dict()["spans"]
+
+    assert trace.to_dict()["path"] == ["retriever", "llm_agent"]
+    assert spans[0]["documents"] == 1 and spans[0]["top_score"] == 0.42
+    assert spans[0]["exceptions"] == ["TimeoutError"]
+    assert spans[1]["prompt_tokens"] == 120 and spans[1]["completion_tokens"] == 8
+    assert trace.total_ms is not None and instrumentation.recent_traces(1)[0]["trace_id"] == trace.trace_id
+
+
+def test_unsampled_requests_still_feed_metrics(monkeypatch):
+    monkeypatch.setattr(instrumentation, "TRACE_SAMPLE_RATE", 0.0)
+    broken = instrumented_node("planner", BrokenAgent)
+
+    with trace_request("test") as trace:
+        asyncio.run(instrumented_node("retriever", FakeRetrieverAgent).ainvoke({}))
+        with pytest.raises(ValueError):
+            broken.invoke({})
+    assert trace is None
+
+    text = render_metrics()
+    assert 'medigenius_node_seconds_count{node="planner"}' in text
+    assert 'medigenius_node_errors_total{node="planner",exception="ValueError"}' in text
+    assert 'medigenius_retrieval_top_score_bucket{node="retriever",le="0.5"}' in text
+    assert 'medigenius_request_seconds_count{kind="test"}' in text
@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tools.fake_llm import FakeChatModel
+from tools.llm_client import LLMGateway
+from tools.llm_client import LLMUnavailable
+from tools.llm_client import TokenBucket
+from tools.llm_client import llm_session
+from tools.llm_client import parse_duration
+
+
+class Flaky(FakeChatModel):
+    """Fails the first `failures` calls with a retryable status."""
+
+    failures: int = 0
+    calls: int = 0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            error = RuntimeError("rate limited")
+            error.status_code = 429
+            raise error
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+
+class Tokens(BaseCallbackHandler):
+    def __init__(self):
+        self.tokens = []
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.tokens.append(token)
+
+
+def test_parse_duration():
+    assert parse_duration("2m59.5s") == pytest.approx(179.5)
+    assert parse_duration("120ms") == pytest.approx(0.12)
+    assert parse_duration("7") == 7.0
+    assert parse_duration(None) == 0.0
+
+
+def test_bucket_paces_requests_and_obeys_headers():
+    bucket = TokenBucket(rate=10, burst=1)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+
+    bucket = TokenBucket(rate=0)
+    bucket.observe(200, {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "2s"})
+    assert bucket.reserve(max_wait=0.5) is None
+    assert bucket.reserve() == pytest.approx(2.0, abs=0.05)
+
+
+def test_bucket_ignores_malformed_headers():
+    bucket = TokenBucket(rate=0)
+    bucket.observe(200, {"x-ratelimit-remaining-requests": "", "x-ratelimit-remaining-tokens": "lots"})
+    assert bucket.reserve() == 0
+
+
+def test_cancelled_acquire_returns_a_permit_granted_meanwhile():
+    gateway = LLMGateway(model=FakeChatModel(latency=0), bucket=TokenBucket(rate=0))
+
+    async def cancel_as_permit_frees():
+        semaphore = asyncio.Semaphore(1)
+        await semaphore.acquire()
+        waiter = asyncio.ensure_future(gateway._aacquire(semaphore, time.monotonic() + 5, "busy"))
+        await asyncio.sleep(0)
+        # The permit is handed to the waiter and the waiter is cancelled in the same tick
+        semaphore.release()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        await asyncio.wait_for(semaphore.acquire(), timeout=0.5)
+
+    asyncio.run(cancel_as_permit_frees())
+
+
+def test_transient_errors_are_retried(monkeypatch):
+    monkeypatch.setattr("tools.llm_client.RETRY_BASE_SECONDS", 0.001)
+    gateway = LLMGateway(model=Flaky(latency=0, failures=2), bucket=TokenBucket(rate=0))
+    assert gateway.invoke("fever").content
+    assert gateway.stats()["retries"] == 2
+
+    gateway = LLMGateway(model=Flaky(latency=0, failures=5), bucket=TokenBucket(rate=0), max_retries=1)
+    with pytest.raises(RuntimeError):
+        gateway.invoke("fever")
+    assert gateway.stats()["failures"] == 1
+
+
+def test_identical_prompts_in_flight_are_coalesced():
+    model = FakeChatModel(latency=0.2)
+    gateway = LLMGateway(model=model, bucket=TokenBucket(rate=0))
+    with ThreadPoolExecutor(4) as pool:
+        answers = list(pool.map(gateway.invoke, ["What is dengue?"] * 4))
+    assert len({answer.content for answer in answers}) == 1
+    stats = gateway.stats()
+    assert stats["calls"] == 1 and stats["coalesced"] == 3
+    assert sum(answer.usage_metadata["output_tokens"] > 0 for answer in answers) == 1
+
+    async def ask_all():
+        return await asyncio.gather(*(gateway.ainvoke("What is malaria?") for _ in range(3)))
+
+    assert len({answer.content for answer in asyncio.run(ask_all())}) == 1
+    assert gateway.stats()["calls"] == 2
+
+
+def test_cancelling_the_coalescing_leader_does_not_cancel_followers():
+    gateway = LLMGateway(model=FakeChatModel(latency=0.2), bucket=TokenBucket(rate=0))
+
+    async def cancel_leader():
+        leader = asyncio.ensure_future(gateway.ainvoke("What is dengue?"))
+        await asyncio.sleep(0.05)
+        follower = asyncio.ensure_future(gateway.ainvoke("What is dengue?"))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        with pytest.raises(LLMUnavailable):
+            await follower
+        return leader.cancelled(), follower.cancelled()
+
+    assert asyncio.run(cancel_leader()) == (True, False)
+    assert gateway.stats()["coalesced"] == 1
+
+
+def test_one_call_in_flight_per_session():
+    gateway = LLMGateway(model=FakeChatModel(latency=0.2), bucket=TokenBucket(rate=0), deadline=0.1)
+    errors = []
+
+    def ask(question):
+        with llm_session("abc"):
+            try:
+                gateway.invoke(question)
+            except LLMUnavailable as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=ask, args=(q,)) for q in ("fever?", "cough?")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 1
+
+
+def test_global_limit_caps_concurrency():
+    gateway = LLMGateway(model=FakeChatModel(latency=0.1), bucket=TokenBucket(rate=0), max_concurrency=2)
+
+    async def ask_all():
+        start = time.perf_counter()
+        await asyncio.gather(*(gateway.ainvoke(f"question {i}") for i in range(4)))
+        return time.perf_counter() - start
+
+    assert asyncio.run(ask_all()) >= 0.2
+
+
+def test_streaming_passes_tokens_through():
+    gateway = LLMGateway(model=FakeChatModel(latency=0), bucket=TokenBucket(rate=0))
+    chunks = [chunk.content for chunk in gateway.stream("headache")]
+    assert len(chunks) > 1
+
+    handler = Tokens()
+
+    async def astream():
+        return [chunk.content async for chunk in gateway.astream("headache", config={"callbacks": [handler]})]
+
+    assert asyncio.run(astream()) == chunks
+    assert "".join(handler.tokens) == "".join(chunks)
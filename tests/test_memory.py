@@ -0,0 +1,64 @@
+from core import memory
+from core.memory import compact_history
+from core.memory import normalize_history
+from core.memory import render_history
+from core.memory import doctor_turn
+from core.memory import user_turn
+from core.session_store import MemorySessionStore
+
+
+def test_legacy_lines_become_typed_turns_without_status_lines():
+    history = [
+        "User: I have a fever.",
+        "AI: Retrieved documents from medical PDF database.",
+        "Doctor: Rest and drink fluids.",
+        "AI Explanation: This response is generated using AI.",
+        "I couldn't find enough information.",
+    ]
+    assert normalize_history(history) == [
+        user_turn("I have a fever."),
+        doctor_turn("Rest and drink fluids."),
+        doctor_turn("I couldn't find enough information."),
+    ]
+
+
+def test_evicted_turns_fold_into_the_summary_once():
+    history = [user_turn(f"Symptom {i}. More detail here.") for i in range(6)]
+    compacted = compact_history(history, max_turns=4)
+    assert compacted[0] == {"role": "summary", "content": "Patient: Symptom 0.\nPatient: Symptom 1."}
+    assert compacted[1:] == history[2:]
+
+    # Compacting again leaves the summary untouched until more turns are evicted
+    assert compact_history(compacted, max_turns=4) == compacted
+    again = compact_history(compacted + [doctor_turn("Answer.")], max_turns=4)
+    assert again[0]["content"].splitlines() == ["Patient: Symptom 0.", "Patient: Symptom 1.", "Patient: Symptom 2."]
+
+
+def test_summary_drops_doctor_lines_before_patient_lines():
+    turns = [user_turn("I am allergic to penicillin."), doctor_turn("Noted, we will avoid it.")]
+    summary = memory.fold_summary("", turns, max_tokens=memory.count_tokens("Patient: I am allergic to penicillin."))
+    assert summary == "Patient: I am allergic to penicillin."
+
+
+def test_render_respects_budget_and_consumer_roles(monkeypatch):
+    monkeypatch.setitem(memory.TOKEN_BUDGETS, "llm", 40)
+    history = [
+        {"role": "summary", "content": "Patient: I am diabetic."},
+        user_turn("My feet tingle."),
+        doctor_turn("That can be neuropathy. " + "Keep your blood sugar controlled. " * 20),
+        user_turn("What should I do?"),
+    ]
+    context = render_history(history, "llm", "What should I do?")
+    lines = context.splitlines()
+    assert lines[-1] == "Doctor: That can be neuropathy."
+    assert "What should I do?" not in context
+    assert memory.count_tokens(context) <= 40
+
+    assert render_history(history, "retriever", "What should I do?") == "Patient: My feet tingle."
+
+
+def test_session_store_keeps_the_summary_when_capping():
+    store = MemorySessionStore(max_history=2)
+    history = [{"role": "summary", "content": "Patient: earlier."}] + [user_turn(f"q{i}") for i in range(4)]
+    store.save_history("s", history)
+    assert store.get_history("s") == [history[0], user_turn("q2"), user_turn("q3")]
@@ -0,0 +1,141 @@
+import importlib
+import json
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from tools import embeddings
+from tools.embeddings import EmbeddingCache
+from tools.embeddings import EmbeddingService
+from tools.embeddings import load_model
+from tools.onnx_embeddings import ARTIFACT_MANIFEST
+from tools.onnx_embeddings import MIN_REFERENCE_COSINE
+from tools.onnx_embeddings import MODEL_FILE
+from tools.onnx_embeddings import ONNX_MODEL_DIR
+from tools.onnx_embeddings import REFERENCE_FILE
+from tools.onnx_embeddings import REFERENCE_TEXTS
+from tools.onnx_embeddings import TOKENIZER_FILE
+from tools.onnx_embeddings import mean_pool
+
+
+def test_mean_pool_ignores_padding_and_normalizes():
+    hidden = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]])
+    pooled = mean_pool(hidden, [[1, 1, 0]])
+    assert pooled.tolist() == [[1.0, 0.0]]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        load_model("tensorflow")
+
+
+def test_documents_are_embedded_with_the_backend_the_index_was_built_with(monkeypatch):
+    loaded = []
+
+    class Model:
+        def __init__(self, backend):
+            self.backend = backend
+
+        def embed_documents(self, texts):
+            return [[1.0 if self.backend == "torch" else 0.9] for _ in texts]
+
+    monkeypatch.setattr(embeddings, "load_model", lambda backend, *args: loaded.append(backend) or Model(backend))
+    monkeypatch.setattr(embeddings, "_document_backend", None)
+    service = EmbeddingService(backend="onnx", cache=EmbeddingCache(max_size=8))
+
+    # An index built with the ONNX backend never needs torch
+    embeddings.use_document_backend("onnx")
+    assert service.embed_query("dengue") == [0.9]
+    assert service.embed_documents(["a chunk"]) == [[0.9]] and loaded == ["onnx"]
+
+    # A float32 index keeps getting float32 chunks
+    embeddings.use_document_backend("torch")
+    assert service.embed_documents(["a chunk"]) == [[1.0]] and loaded == ["onnx", "torch"]
+
+
+def tiny_int8_artifact(path):
+    """A word-level tokenizer and a one-layer int8 "encoder", with float32 reference vectors."""
+    from onnx import TensorProto
+    from onnx import helper
+    from onnx import numpy_helper
+    from onnx import save_model
+    from onnxruntime.quantization import QuantType
+    from onnxruntime.quantization import quantize_dynamic
+    from tokenizers import Tokenizer
+    from tokenizers.models import WordLevel
+    from tokenizers.normalizers import Lowercase
+    from tokenizers.pre_tokenizers import Whitespace
+
+    words = sorted({word.lower() for text in REFERENCE_TEXTS for word, _ in Whitespace().pre_tokenize_str(text)})
+    tokenizer = Tokenizer(WordLevel({word: i for i, word in enumerate(["[PAD]", "[UNK]"] + words)}, unk_token="[UNK]"))
+    tokenizer.normalizer = Lowercase()
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.save(str(path / TOKENIZER_FILE))
+
+    rng = np.random.default_rng(0)
+    table = rng.normal(size=(len(words) + 2, 32)).astype(np.float32)
+    weights = rng.normal(size=(32, 32)).astype(np.float32)
+    graph = helper.make_graph(
+        [
+            helper.make_node("Gather", ["table", "input_ids"], ["embedded"]),
+            helper.make_node("MatMul", ["embedded", "weights"], ["projected"]),
+            helper.make_node("Cast", ["attention_mask"], ["mask"], to=TensorProto.FLOAT),
+            helper.make_node("Unsqueeze", ["mask", "last_axis"], ["mask3"]),
+            helper.make_node("Mul", ["projected", "mask3"], ["last_hidden_state"]),
+        ],
+        "tiny-encoder",
+        [helper.make_tensor_value_info(name, TensorProto.INT64, ["batch", "sequence"]) for name in ("input_ids", "attention_mask")],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "sequence", 32])],
+        [numpy_helper.from_array(table, "table"), numpy_helper.from_array(weights, "weights"),
+         numpy_helper.from_array(np.array([2], dtype=np.int64), "last_axis")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    save_model(model, str(path / "model.fp32.onnx"))
+    quantize_dynamic(str(path / "model.fp32.onnx"), str(path / MODEL_FILE), weight_type=QuantType.QInt8)
+
+    reference = [(table[tokenizer.encode(text).ids] @ weights).mean(axis=0) for text in REFERENCE_TEXTS]
+    np.savez(path / REFERENCE_FILE, texts=np.array(REFERENCE_TEXTS), vectors=np.asarray(reference, dtype=np.float32))
+    manifest = {"model": "tiny", "max_seq_length": 64, "pad_id": 0, "pad_token": "[PAD]"}
+    (path / ARTIFACT_MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+
+
+def test_tiny_int8_export_passes_the_tolerance_check(tmp_path):
+    # No torch or download needed; CI installs the `onnx` extra and sets MEDIGENIUS_REQUIRE_ONNX
+    for module in ("onnx", "onnxruntime", "tokenizers"):
+        if os.getenv("MEDIGENIUS_REQUIRE_ONNX"):
+            importlib.import_module(module)
+        else:
+            pytest.importorskip(module)
+    from tools.onnx_embeddings import OnnxEmbeddingModel
+    from tools.onnx_embeddings import reference_cosines
+
+    tiny_int8_artifact(tmp_path)
+    model = OnnxEmbeddingModel(tmp_path, batch_size=3)
+
+    assert reference_cosines(model, tmp_path).min() >= MIN_REFERENCE_COSINE
+    # Sorting and padding keep every vector on its own text; activation scales
+    # are per batch, so batched vectors only match within the int8 tolerance
+    together = model.embed_array(REFERENCE_TEXTS)
+    alone = np.array([model.embed_query(text) for text in REFERENCE_TEXTS])
+    assert np.sum(together * alone, axis=1).min() >= MIN_REFERENCE_COSINE
+
+
+@pytest.mark.skipif(not (ONNX_MODEL_DIR / MODEL_FILE).exists(), reason="no ONNX artifact; run `python -m tools.onnx_embeddings export`")
+def test_int8_vectors_stay_within_tolerance_of_the_index_model():
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    from tools.onnx_embeddings import OnnxEmbeddingModel
+    from tools.onnx_embeddings import reference_cosines
+
+    model = OnnxEmbeddingModel(ONNX_MODEL_DIR)
+    assert reference_cosines(model, ONNX_MODEL_DIR).min() >= MIN_REFERENCE_COSINE
+
+    # Batching and length sorting must not change a vector
+    texts = ["dengue", "What are the symptoms of dengue fever and how long do they last?"]
+    together = model.embed_array(texts)
+    alone = np.array([model.embed_query(text) for text in texts])
+    assert np.allclose(together, alone, atol=1e-4)
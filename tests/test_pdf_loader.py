@@ -0,0 +1,58 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("langchain_community")
+
+from langchain.schema import Document
+
+from tools import pdf_loader
+from tools.pdf_loader import PAGES_PER_TASK
+from tools.pdf_loader import _ordered_map
+from tools.pdf_loader import _rebatch
+from tools.pdf_loader import iter_pdf_chunk_batches
+
+SENTENCES = [
+    "Dengue fever is a mosquito-borne viral infection that causes high fever, headache and joint pain.",
+    "Type 2 diabetes is managed with diet, exercise and medicines such as metformin.",
+    "Hypertension rarely causes symptoms but raises the risk of stroke and heart attack.",
+]
+
+
+def test_rebatch_fills_every_batch_but_the_last_across_group_boundaries():
+    assert list(_rebatch([[1, 2, 3], [4], [5, 6, 7, 8]], 3)) == [[1, 2, 3], [4, 5, 6], [7, 8]]
+    assert list(_rebatch([[], [1]], 3)) == [[1]]
+
+
+def test_ordered_map_keeps_submission_order():
+    def slow_first(n):
+        time.sleep(0.02 * (5 - n))
+        return n
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(_ordered_map(pool, slow_first, range(5), max_in_flight=3)) == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_chunk_batches_match_split_documents(monkeypatch, workers):
+    try:
+        splitter = pdf_loader.get_text_splitter()
+    except Exception as e:
+        pytest.skip(f"tiktoken encoding unavailable: {e}")
+    # Enough pages for several worker tasks, each long enough to split into several chunks
+    pages = [
+        Document(
+            page_content="\n\n".join(" ".join(SENTENCES[(page + i) % 3] for i in range(12)) for _ in range(3)),
+            metadata={"source": "book.pdf", "page": page},
+        )
+        for page in range(PAGES_PER_TASK * 2 + 5)
+    ]
+    monkeypatch.setattr(pdf_loader, "iter_pdf_pages", lambda path: iter(pages))
+
+    batches = list(iter_pdf_chunk_batches("book.pdf", batch_size=7, workers=workers))
+    chunks = [chunk for batch in batches for chunk in batch]
+
+    assert all(len(batch) == 7 for batch in batches[:-1]) and 0 < len(batches[-1]) <= 7
+    expected = splitter.split_documents(pages)
+    assert [(c.page_content, c.metadata) for c in chunks] == [(c.page_content, c.metadata) for c in expected]
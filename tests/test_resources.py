@@ -0,0 +1,59 @@
+import pytest
+
+from core.resources import ResourceRegistry
+
+
+def test_resources_are_built_once_on_first_use():
+    calls = []
+    registry = ResourceRegistry()
+    registry.register("model", lambda: calls.append(1) or "loaded")
+
+    assert calls == [] and not registry.ready()
+    assert registry.get("model") == "loaded"
+    assert registry.get("model") == "loaded"
+    assert calls == [1]
+    assert registry.ready()
+    assert registry.status()["model"]["state"] == "ready"
+
+
+def test_failed_resource_reports_error_and_retries():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("model download failed")
+        return "ok"
+
+    registry = ResourceRegistry()
+    registry.register("model", flaky)
+    registry.register("search", lambda: "optional", required=False)
+
+    with pytest.raises(RuntimeError):
+        registry.get("model")
+    assert registry.status()["model"]["error"] == "RuntimeError: model download failed"
+
+    registry.warmup(background=False)
+    assert registry.ready()
+    assert registry.get("model") == "ok"
+
+
+def test_override_replaces_a_built_resource():
+    registry = ResourceRegistry()
+    registry.register("llm", lambda: "groq")
+    assert registry.get("llm") == "groq"
+
+    registry.override("llm", lambda: "fake")
+    assert registry.status()["llm"]["state"] == "pending"
+    assert registry.get("llm") == "fake"
+    registry.override("wikipedia", lambda: "offline", required=False)
+    assert registry.get("wikipedia") == "offline" and not registry.status()["wikipedia"]["required"]
+
+
+def test_probe_is_not_ready_until_the_first_load_succeeds():
+    registry = ResourceRegistry()
+    registry.register("model", lambda: "loaded")
+
+    assert not registry.probe()
+    registry._warmup_thread.join()
+    assert registry.probe()
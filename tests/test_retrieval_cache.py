@@ -0,0 +1,90 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_community")
+
+from langchain.schema import Document
+from langchain_core.vectorstores import VectorStore
+
+from agents.retriever_agent import RetrieverAgent
+from tools import vector_store
+from tools.doc_store import DocumentStore
+from tools.vector_store import RetrievalCache
+from tools.vector_store import ScoredRetriever
+
+CHUNKS = {
+    "c1": "Dengue fever is spread by mosquitoes.",
+    "c2": "Dengue can lower the platelet count.",
+}
+
+
+class CountingStore(VectorStore):
+    def __init__(self):
+        self.searches = 0
+
+    def similarity_search_with_relevance_scores(self, query, k=4, **kwargs):
+        self.searches += 1
+        return [(Document(page_content=CHUNKS[i], metadata={"source": "dengue.pdf"}, id=i), 0.9 - n / 10) for n, i in enumerate(CHUNKS)][:k]
+
+    def get(self, ids=None, include=None):
+        ids = [i for i in ids if i in CHUNKS]
+        return {"ids": ids, "documents": [CHUNKS[i] for i in ids], "metadatas": [{"source": "dengue.pdf"} for _ in ids]}
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError
+
+    def similarity_search(self, query, k=4, **kwargs):
+        raise NotImplementedError
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError
+
+
+@pytest.fixture
+def doc_store(monkeypatch):
+    store = DocumentStore()
+    monkeypatch.setattr(vector_store, "get_document_store", lambda: store)
+    return store
+
+
+def retriever(store, cache, version="v1"):
+    return ScoredRetriever(vectorstore=store, search_kwargs={"k": 2}, cache=cache, version=version)
+
+
+def test_repeated_queries_skip_the_search_until_the_index_changes(doc_store):
+    store, cache = CountingStore(), RetrievalCache(max_size=8)
+    first = retriever(store, cache).search_with_scores("What is dengue?")
+    again = retriever(store, cache).search_with_scores("  what is DENGUE? ")
+
+    assert store.searches == 1
+    assert [(doc.id, score) for doc, score in again] == [(doc.id, score) for doc, score in first]
+    assert again[0][0].metadata["score"] == pytest.approx(0.9)
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["hit_rate"] == 0.5 and stats["saved_ms"] >= 0
+
+    retriever(store, cache, version="v2").search_with_scores("What is dengue?")
+    assert store.searches == 2 and cache.stats()["invalidations"] == 1 and len(cache) == 1
+
+
+def test_disk_tier_survives_a_restart(tmp_path, monkeypatch, doc_store):
+    path = str(tmp_path / "retrieval.sqlite3")
+    store = CountingStore()
+    retriever(store, RetrievalCache(path=path)).search_with_scores("What is dengue?")
+
+    # A new process: empty memory tier and document store
+    monkeypatch.setattr(vector_store, "get_document_store", lambda: DocumentStore())
+    results = retriever(store, RetrievalCache(path=path)).search_with_scores("What is dengue?")
+    assert store.searches == 1 and [doc.page_content for doc, _ in results] == list(CHUNKS.values())
+
+    retriever(store, RetrievalCache(path=path), version="v2").search_with_scores("What is dengue?")
+    assert store.searches == 2
+
+
+def test_standalone_questions_are_retrieved_without_history():
+    history = [{"role": "user", "content": "I have a fever."}, {"role": "doctor", "content": "Rest."}]
+    standalone = {"question": "What are the symptoms of dengue?", "conversation_history": history + [{"role": "user", "content": "What are the symptoms of dengue?"}]}
+    follow_up = {"question": "Is it serious?", "conversation_history": history + [{"role": "user", "content": "Is it serious?"}]}
+
+    assert RetrieverAgent.build_query(standalone) == "What are the symptoms of dengue?"
+    assert RetrieverAgent.build_query(follow_up).startswith("Context: ")
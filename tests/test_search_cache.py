@@ -0,0 +1,90 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from tools.search_cache import CachedSearch
+from tools.search_cache import CircuitBreaker
+from tools.search_cache import SearchCache
+from tools.search_cache import SearchUnavailable
+from tools.search_cache import normalize_query
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SearchCache(path=str(tmp_path / "search.sqlite3"), ttl=60)
+
+
+def test_repeated_queries_are_served_from_disk(cache):
+    calls = []
+
+    def search(query):
+        calls.append(query)
+        return f"about {query}"
+
+    source = CachedSearch("wikipedia", search, timeout=1, cache=cache, offline_dir="")
+    assert source.run("What is Dengue?") == "about What is Dengue?"
+    assert source.run("what is dengue") == "about What is Dengue?"
+    assert len(calls) == 1 and source.stats()["hits"] == 1
+
+    cache.ttl = -1
+    source.run("what is dengue")
+    assert len(calls) == 2
+
+
+def test_timeouts_open_the_breaker_until_reset(cache):
+    source = CachedSearch(
+        "duckduckgo", lambda query: time.sleep(0.5) or "late", timeout=0.05, cache=cache,
+        breaker=CircuitBreaker(failures=2, reset_after=0.2), offline_dir=""
+    )
+    for query in ("a", "b"):
+        with pytest.raises(SearchUnavailable):
+            source.run(query)
+    assert source.breaker.state == "open"
+
+    source.search = lambda query: "ok"
+    with pytest.raises(SearchUnavailable):
+        source.run("c")
+    assert source.stats()["short_circuits"] == 1
+
+    time.sleep(0.25)
+    assert source.run("c") == "ok"
+    assert source.breaker.state == "closed"
+
+
+def test_offline_mode_never_calls_the_source(cache, tmp_path):
+    (tmp_path / "wikipedia.json").write_text(json.dumps({"Flu symptoms": "Fever and cough."}))
+    cache.put("wikipedia", normalize_query("old query"), "Cached long ago.")
+    cache.ttl = -1
+
+    def search(query):
+        raise AssertionError("network used in offline mode")
+
+    source = CachedSearch("wikipedia", search, timeout=1, cache=cache, offline_dir=str(tmp_path))
+    assert source.run("flu symptoms?") == "Fever and cough."
+    assert source.run("Old query") == "Cached long ago."
+    assert source.run("unknown") == ""
+
+
+def test_cached_lookup_never_calls_the_source(cache):
+    calls = []
+    source = CachedSearch("wikipedia", lambda query: calls.append(query) or "fresh", timeout=1, cache=cache, offline_dir="")
+    assert source.cached("asthma") == ""
+    source.run("asthma")
+    assert source.cached("Asthma?") == "fresh"
+    assert calls == ["asthma"]
+
+
+def test_async_lookups_wait_without_a_thread_and_time_out(cache):
+    async def asearch(query):
+        await asyncio.sleep(0.5 if query == "slow" else 0)
+        return f"about {query}"
+
+    source = CachedSearch("wikipedia", None, timeout=0.05, cache=cache, offline_dir="", asearch=asearch)
+
+    assert asyncio.run(source.arun("Dengue")) == "about Dengue"
+    assert asyncio.run(source.arun("dengue")) == "about Dengue" and source.stats()["hits"] == 1
+    with pytest.raises(SearchUnavailable):
+        asyncio.run(source.arun("slow"))
+    assert source.stats()["timeouts"] == 1
@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_community")
+
+from tools.semantic_cache import SemanticCache
+from tools.semantic_cache import is_context_dependent
+from tools.semantic_cache import normalize_question
+
+
+def test_near_duplicate_questions_hit_within_namespace():
+    cache = SemanticCache(threshold=0.9, max_entries=4)
+    cache.store([1.0, 0.0, 0.0], "what are symptoms of dengue", "Fever and rash.", "llm_knowledge", "v1")
+
+    entry = cache.lookup([0.98, 0.1, 0.0], "v1")
+    assert entry is not None and entry.answer == "Fever and rash."
+    assert cache.lookup([0.0, 1.0, 0.0], "v1") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "v2") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["lookups"] == 3
+
+
+def test_entries_expire_and_lru_is_evicted():
+    cache = SemanticCache(threshold=0.9, max_entries=2, ttl=60)
+    cache.store([1.0, 0.0], "a", "A", "llm_knowledge", "v1")
+    cache.store([0.0, 1.0], "b", "B", "llm_knowledge", "v1")
+    cache.lookup([1.0, 0.0], "v1")
+    cache.store([0.7, 0.7], "c", "C", "llm_knowledge", "v1")
+    assert cache.lookup([0.0, 1.0], "v1") is None
+    assert cache.lookup([1.0, 0.0], "v1").answer == "A"
+
+    cache.ttl = -1
+    assert cache.lookup([1.0, 0.0], "v1") is None
+    assert cache.stats()["evictions"] == 2
+
+
+def test_follow_up_questions_are_context_dependent():
+    assert normalize_question("Dengue symptoms?") == "dengue symptoms"
+    question = {"role": "user", "content": "What is the treatment for it?"}
+    assert not is_context_dependent("What is the treatment for it?", [question])
+    history = [
+        {"role": "user", "content": "What is dengue?"},
+        {"role": "doctor", "content": "A viral infection."},
+        {"role": "user", "content": "How is it treated?"},
+    ]
+    assert is_context_dependent("How is it treated?", history)
+    assert is_context_dependent("And children?", history)
+    assert not is_context_dependent("What are the symptoms of malaria", history)
+
+
+def test_an_expired_best_match_falls_back_to_a_live_one():
+    cache = SemanticCache(threshold=0.9, max_entries=4, ttl=60)
+    cache.store([1.0, 0.0], "dengue symptoms", "Old answer.", "llm_knowledge", "v1")
+    cache.store([0.97, 0.24], "symptoms of dengue", "Fresh answer.", "llm_knowledge", "v1")
+    cache._entries[0].created = cache._created[0] = 0.0
+
+    assert cache.lookup([1.0, 0.0], "v1").answer == "Fresh answer."
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lookup_spans_namespaces_and_unused_ones_are_forgotten():
+    cache = SemanticCache(threshold=0.9, max_entries=2)
+    cache.store([1.0, 0.0], "a", "A", "retrieved_docs", "model|retrieved_docs|corpus-1")
+    assert cache.lookup([1.0, 0.0], "model|llm_knowledge", "model|retrieved_docs|corpus-1").answer == "A"
+
+    cache.store([0.0, 1.0], "b", "B", "retrieved_docs", "model|retrieved_docs|corpus-2")
+    cache.store([0.7, 0.7], "c", "C", "retrieved_docs", "model|retrieved_docs|corpus-2")
+    assert set(cache._namespaces) == {"model|retrieved_docs|corpus-2"}
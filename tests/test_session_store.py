@@ -0,0 +1,73 @@
+import pytest
+
+from core.session_store import MemorySessionStore
+from core.session_store import SessionStore
+from core.session_store import SQLiteSessionStore
+from core.session_store import create_session_store
+from core.session_store import new_session_id
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore(max_sessions=2, max_history=4)
+    return SQLiteSessionStore(path=str(tmp_path / "sessions.sqlite3"), max_history=4)
+
+
+def test_history_round_trip_and_cap(store):
+    session_id = new_session_id()
+    assert store.get_history(session_id) is None
+
+    store.save_history(session_id, [f"User: q{i}" for i in range(6)])
+    assert store.get_history(session_id) == ["User: q2", "User: q3", "User: q4", "User: q5"]
+
+    store.delete(session_id)
+    assert store.get_history(session_id) is None
+
+
+def test_expired_sessions_are_dropped(store):
+    session_id = new_session_id()
+    store.save_history(session_id, ["User: hi"])
+    store.ttl = -1
+    assert store.get_history(session_id) is None
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemorySessionStore(max_sessions=2)
+    store.save_history("a", ["User: a"])
+    store.save_history("b", ["User: b"])
+    store.get_history("a")
+    store.save_history("c", ["User: c"])
+    assert store.get_history("b") is None
+    assert store.get_history("a") == ["User: a"] and len(store) == 2
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    SQLiteSessionStore(path=path).save_history("abc", ["User: hi", "Doctor: hello"])
+    assert SQLiteSessionStore(path=path).get_history("abc") == ["User: hi", "Doctor: hello"]
+
+
+def test_session_ids_do_not_collide():
+    assert len({new_session_id() for _ in range(1000)}) == 1000
+
+
+def test_default_backend_is_the_store_shared_by_workers(monkeypatch, tmp_path):
+    monkeypatch.setattr("core.session_store.SQLiteSessionStore", lambda: SQLiteSessionStore(path=str(tmp_path / "s.sqlite3")))
+    assert isinstance(create_session_store(), SQLiteSessionStore)
+
+
+def test_a_store_must_implement_every_operation():
+    class ReadOnly(SessionStore):
+        def get_history(self, session_id):
+            return None
+
+    with pytest.raises(TypeError):
+        ReadOnly()
+
+
+def test_sqlite_store_creates_its_database_on_first_use(tmp_path):
+    path = tmp_path / "sessions.sqlite3"
+    store = SQLiteSessionStore(path=str(path))
+    assert not path.exists()
+    assert store.get_history("abc") is None and path.exists()
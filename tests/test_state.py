@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("langgraph")
+
+from langchain_core.documents import Document
+from langgraph.graph import END
+from langgraph.graph import StateGraph
+
+from agents.memory_agent import MemoryAgent
+from core.memory import doctor_turn
+from core.memory import user_turn
+from core.state import AgentState
+from core.state import MAX_HISTORY
+from core.state import ReplaceTurns
+from core.state import add_turns
+from core.state import document_refs
+from core.state import load_documents
+from core.state import new_turn
+
+
+def test_history_updates_append_unless_replacing():
+    history = [user_turn("Hi")]
+    assert add_turns(history, [doctor_turn("Hello")]) == [user_turn("Hi"), doctor_turn("Hello")]
+    assert add_turns(history, ReplaceTurns([doctor_turn("Hello")])) == [doctor_turn("Hello")]
+    assert history == [user_turn("Hi")]
+
+
+def test_documents_travel_as_references():
+    docs = [Document(page_content="Dengue causes fever.", metadata={"score": 0.8, "source": "book.pdf"}, id="book-1"),
+            Document(page_content="Wikipedia text", metadata={"source": "wikipedia"})]
+    refs = document_refs(docs)
+    assert refs[0] == {"id": "book-1", "score": 0.8, "source": "book.pdf"}
+    assert refs[1]["id"].startswith("sha1:") and refs[1]["score"] is None
+    assert load_documents(refs) == docs
+
+
+def test_nodes_return_partial_updates_through_reducers():
+    def answer(state):
+        return {"generation": "Rest.", "conversation_history": [doctor_turn("Rest.")]}
+
+    graph = StateGraph(AgentState)
+    graph.add_node("memory", MemoryAgent.process)
+    graph.add_node("answer", answer)
+    graph.set_entry_point("memory")
+    graph.add_edge("memory", "answer")
+    graph.add_edge("answer", END)
+    workflow = graph.compile()
+
+    history = [turn for i in range(MAX_HISTORY) for turn in (user_turn(f"q{i}"), doctor_turn(f"a{i}"))]
+    result = workflow.invoke(new_turn("Is it serious?", history))
+    assert result["conversation_history"][-2:] == [user_turn("Is it serious?"), doctor_turn("Rest.")]
+    assert result["conversation_history"][0]["role"] == "summary"
+    assert len(result["conversation_history"]) <= MAX_HISTORY + 1
+    assert "documents" not in result
@@ -0,0 +1,42 @@
+from core.streaming import format_sse
+from core.streaming import iter_events
+
+
+class Chunk:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeWorkflow:
+    def __init__(self, parts):
+        self.parts = parts
+
+    def stream(self, state, stream_mode):
+        yield from self.parts
+
+
+def test_events_stream_tokens_and_final_answer():
+    workflow = FakeWorkflow([
+        ("updates", {"memory": {}}),
+        ("messages", (Chunk("Stay "), {"langgraph_node": "llm_agent"})),
+        ("messages", (Chunk("hydrated."), {"langgraph_node": "llm_agent"})),
+        ("updates", {"llm_agent": {}}),
+        ("values", {"generation": "Stay hydrated.", "source": "llm_knowledge"}),
+    ])
+    events = list(iter_events(workflow, {}))
+
+    assert [e["event"] for e in events] == ["progress", "token", "token", "progress", "done"]
+    assert "".join(e["text"] for e in events if e["event"] == "token") == "Stay hydrated."
+    assert events[-1]["response"] == "Stay hydrated."
+    assert format_sse(events[0]).startswith("event: progress\ndata: ")
+
+
+def test_events_reset_when_another_node_takes_over():
+    workflow = FakeWorkflow([
+        ("messages", (Chunk("partial"), {"langgraph_node": "llm_agent"})),
+        ("messages", (Chunk("ignored"), {"langgraph_node": "planner"})),
+        ("messages", (Chunk("Rest well."), {"langgraph_node": "executor"})),
+        ("values", {"generation": "Rest well."}),
+    ])
+    events = [e["event"] for e in iter_events(workflow, {})]
+    assert events == ["token", "reset", "token", "done"]
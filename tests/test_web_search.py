@@ -0,0 +1,47 @@
+import asyncio
+
+import httpx
+
+from tools.web_search import DuckDuckGoSearch
+from tools.web_search import WikipediaSearch
+
+
+def wikipedia_api(request):
+    params = request.url.params
+    if params.get("list") == "search":
+        return httpx.Response(200, json={"query": {"search": [{"title": "Dengue fever"}, {"title": "Aedes"}]}})
+    assert params["titles"] == "Dengue fever|Aedes"
+    return httpx.Response(200, json={"query": {"pages": {
+        "2": {"title": "Aedes", "extract": "A genus of mosquitoes."},
+        "1": {"title": "Dengue fever", "extract": "A mosquito-borne viral disease."},
+    }}})
+
+
+def duckduckgo_html(request):
+    assert request.method == "POST" and b"q=dengue" in request.content
+    page = "".join(
+        f'<a class="result__snippet" href="#">{text}</a>'
+        for text in ["<b>Dengue</b> is spread by mosquitoes.", "Symptoms include fever &amp; rash."]
+    )
+    return httpx.Response(200, text=page)
+
+
+def test_wikipedia_summaries_follow_search_order_sync_and_async():
+    search = WikipediaSearch(transport=httpx.MockTransport(wikipedia_api), async_transport=httpx.MockTransport(wikipedia_api))
+    expected = "Page: Dengue fever\nSummary: A mosquito-borne viral disease.\n\nPage: Aedes\nSummary: A genus of mosquitoes."
+
+    assert search.run("dengue") == expected
+    assert asyncio.run(search.arun("dengue")) == expected
+
+
+def test_wikipedia_without_hits_is_empty():
+    empty = httpx.MockTransport(lambda request: httpx.Response(200, json={"query": {"search": []}}))
+    assert WikipediaSearch(transport=empty).run("xyzzy") == ""
+
+
+def test_duckduckgo_snippets_are_plain_text():
+    search = DuckDuckGoSearch(transport=httpx.MockTransport(duckduckgo_html), async_transport=httpx.MockTransport(duckduckgo_html))
+    expected = "Dengue is spread by mosquitoes. Symptoms include fever & rash."
+
+    assert search.run("dengue") == expected
+    assert asyncio.run(search.arun("dengue")) == expected
@@ -2,11 +2,15 @@
 from .pdf_loader import load_pdf_documents
 from .vector_store import get_retriever
 from .vector_store import initialize_vectorstore
+from .vector_store import sync_vectorstore
 from .llm_client import get_llm
+from .embeddings import get_embeddings
 
 __all__ = [
     'load_pdf_documents',
     'get_retriever',
     'initialize_vectorstore',
-    'get_llm'
+    'sync_vectorstore',
+    'get_llm',
+    'get_embeddings'
 ]
\ No newline at end of file
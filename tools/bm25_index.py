@@ -0,0 +1,115 @@
+# tools/bm25_index.py
+import json
+import math
+import os
+import re
+from collections import Counter
+import numpy as np
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+INDEX_FILENAME = "bm25.npz"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by can do does for from had has have how i if in into is it its "
+    "me my of on or so than that the their them then there these they this to was were what when "
+    "where which who why will with you your".split()
+)
+
+def tokenize(text: str) -> list:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+class BM25Index:
+    """Okapi BM25 inverted index over the chunks in the vector store.
+
+    Postings are stored as flat arrays (one slice per term, located through
+    `offsets`), so a query only touches the postings of its own terms and the
+    whole index loads from a single .npz file.
+    """
+
+    def __init__(self, ids, doc_lengths, terms, offsets, postings, frequencies,
+                 k1: float = BM25_K1, b: float = BM25_B, corpus_version: str = ""):
+        self.ids = list(ids)
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        self.terms = list(terms)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.postings = np.asarray(postings, dtype=np.int32)
+        self.frequencies = np.asarray(frequencies, dtype=np.float32)
+        self.k1 = k1
+        self.b = b
+        self.corpus_version = corpus_version
+        self._term_index = {term: i for i, term in enumerate(self.terms)}
+        self._avg_length = max(float(self.doc_lengths.mean()), 1.0) if len(self.ids) else 1.0
+
+    @classmethod
+    def build(cls, ids, texts, corpus_version: str = "", k1: float = BM25_K1, b: float = BM25_B):
+        postings_by_term, doc_lengths = {}, []
+        for doc, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                postings_by_term.setdefault(term, []).append((doc, count))
+
+        terms = sorted(postings_by_term)
+        offsets, postings, frequencies = [0], [], []
+        for term in terms:
+            for doc, count in postings_by_term[term]:
+                postings.append(doc)
+                frequencies.append(count)
+            offsets.append(len(postings))
+        return cls(ids, doc_lengths, terms, offsets, postings, frequencies, k1, b, corpus_version)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query: str, k: int) -> list:
+        """[(chunk id, BM25 score)] of the best `k` chunks with any query term."""
+        if not self.ids or k <= 0:
+            return []
+        n = len(self.ids)
+        scores = np.zeros(n, dtype=np.float32)
+        for term in set(tokenize(query)):
+            index = self._term_index.get(term)
+            if index is None:
+                continue
+            start, end = self.offsets[index], self.offsets[index + 1]
+            docs, tf = self.postings[start:end], self.frequencies[start:end]
+            idf = math.log(1.0 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[docs] / self._avg_length)
+            scores[docs] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def save(self, path):
+        meta = {"k1": self.k1, "b": self.b, "corpus_version": self.corpus_version}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta)),
+                ids=np.array(self.ids, dtype=str),
+                doc_lengths=self.doc_lengths,
+                terms=np.array(self.terms, dtype=str),
+                offsets=self.offsets,
+                postings=self.postings,
+                frequencies=self.frequencies,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, corpus_version: str = None):
+        """The saved index, or None if it is missing or was built for another corpus version."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if corpus_version is not None and meta["corpus_version"] != corpus_version:
+                return None
+            return cls(
+                data["ids"].tolist(), data["doc_lengths"], data["terms"].tolist(), data["offsets"],
+                data["postings"], data["frequencies"], meta["k1"], meta["b"], meta["corpus_version"]
+            )
@@ -0,0 +1,58 @@
+# tools/doc_store.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# Documents a turn retrieved stay here while the turn needs them; state only carries their IDs
+DOC_STORE_SIZE = int(os.getenv("MEDIGENIUS_DOC_STORE_SIZE", "20000"))
+
+def document_id(doc) -> str:
+    """The chunk ID the index assigned, or a content hash for web results."""
+    if getattr(doc, "id", None):
+        return str(doc.id)
+    source = doc.metadata.get("source", "")
+    return "sha1:" + hashlib.sha1(f"{source}\0{doc.page_content}".encode("utf-8")).hexdigest()
+
+class DocumentStore:
+    """Thread-safe LRU of retrieved Documents by ID.
+
+    Retrieval nodes put their results here and hand `DocRef`s to the graph;
+    the executor resolves them when it builds its prompt. The same Document
+    object is shared by every turn that retrieves it, so nothing is copied.
+    """
+
+    def __init__(self, max_size: int = DOC_STORE_SIZE):
+        self.max_size = max_size
+        self._docs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, doc) -> str:
+        doc_id = document_id(doc)
+        with self._lock:
+            self._docs[doc_id] = doc
+            self._docs.move_to_end(doc_id)
+            while len(self._docs) > self.max_size:
+                self._docs.popitem(last=False)
+        return doc_id
+
+    def get(self, doc_id: str):
+        with self._lock:
+            doc = self._docs.get(doc_id)
+            if doc is not None:
+                self._docs.move_to_end(doc_id)
+            return doc
+
+    def __len__(self):
+        return len(self._docs)
+
+_doc_store = None
+_doc_store_lock = threading.Lock()
+
+def get_document_store() -> DocumentStore:
+    global _doc_store
+    if _doc_store is None:
+        with _doc_store_lock:
+            if _doc_store is None:
+                _doc_store = DocumentStore()
+    return _doc_store
@@ -0,0 +1,275 @@
+# tools/embeddings.py
+import asyncio
+import hashlib
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# "torch" runs the model through HuggingFaceEmbeddings; "onnx" loads the int8
+# export from MEDIGENIUS_ONNX_MODEL_DIR (see tools/onnx_embeddings.py)
+EMBEDDING_BACKEND = os.getenv("MEDIGENIUS_EMBEDDING_BACKEND", "torch")
+
+# CPU inference and cache knobs
+EMBED_BATCH_SIZE = int(os.getenv("MEDIGENIUS_EMBED_BATCH_SIZE", "32"))
+EMBED_THREADS = int(os.getenv("MEDIGENIUS_EMBED_THREADS", "0"))  # 0 keeps the runtime's default
+EMBED_CACHE_SIZE = int(os.getenv("MEDIGENIUS_EMBED_CACHE_SIZE", "4096"))
+EMBED_CACHE_PATH = os.getenv("MEDIGENIUS_EMBED_CACHE_PATH")  # optional on-disk tier
+BATCH_WINDOW_MS = float(os.getenv("MEDIGENIUS_EMBED_BATCH_WINDOW_MS", "5"))
+MAX_QUERY_BATCH = int(os.getenv("MEDIGENIUS_EMBED_MAX_QUERY_BATCH", "64"))
+# Evidence sentences scored by the context builder; memory only, apart from queries
+PASSAGE_CACHE_SIZE = int(os.getenv("MEDIGENIUS_EMBED_PASSAGE_CACHE_SIZE", "1024"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    # MiniLM's WordPiece tokenizer is uncased and splits on whitespace, so
+    # case and whitespace differences never change the vector.
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip().lower()
+
+def cache_key(model_name: str, text: str) -> str:
+    return hashlib.sha1(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """Thread-safe LRU of query vectors with an optional SQLite tier shared by workers."""
+
+    def __init__(self, max_size: int = EMBED_CACHE_SIZE, path: str = None):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+
+    def get(self, key):
+        with self._lock:
+            vector = self._items.get(key)
+            if vector is not None:
+                self._items.move_to_end(key)
+                return vector
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        vector = array("f")
+        vector.frombytes(row[0])
+        vector = vector.tolist()
+        self._remember(key, vector)
+        return vector
+
+    def put(self, key, vector):
+        self._remember(key, vector)
+        if self._db is not None:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    (key, array("f", vector).tobytes())
+                )
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._items[key] = vector
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+class MicroBatcher:
+    """Merges concurrent calls into one `fn(texts)` call per time window."""
+
+    def __init__(self, fn, window_ms: float = BATCH_WINDOW_MS, max_batch: int = MAX_QUERY_BATCH):
+        self.fn = fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(texts, self.fn(texts)))
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+def load_model(backend: str = EMBEDDING_BACKEND, model_name: str = EMBEDDING_MODEL_NAME,
+               batch_size: int = EMBED_BATCH_SIZE, num_threads: int = EMBED_THREADS):
+    """The raw embedding model (anything with `embed_documents`) for `backend`."""
+    if backend == "onnx":
+        from .onnx_embeddings import OnnxEmbeddingModel
+
+        model = OnnxEmbeddingModel(batch_size=batch_size, num_threads=num_threads)
+        if model.model_name != model_name:
+            # Vectors from another model would not match the index
+            raise ValueError(f"ONNX artifact is {model.model_name}, expected {model_name}")
+        return model
+    if backend != "torch":
+        raise ValueError(f"Unknown embedding backend {backend!r}")
+
+    from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+
+    if num_threads:
+        import torch
+        torch.set_num_threads(num_threads)
+    return HuggingFaceEmbeddings(model_name=model_name, encode_kwargs={"batch_size": batch_size})
+
+class EmbeddingService(Embeddings):
+    """Shared embedder for ingestion and queries.
+
+    Documents are encoded in fixed-size batches without caching; queries go
+    through the cache and are micro-batched across concurrent requests.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, batch_size: int = EMBED_BATCH_SIZE,
+                 num_threads: int = EMBED_THREADS, cache: EmbeddingCache = None, backend: str = EMBEDDING_BACKEND):
+        self.model_name = model_name
+        self.backend = backend
+        # int8 vectors are close to, not equal to, the float32 ones: keep them apart in a shared disk cache
+        self.cache_name = model_name if backend == "torch" else f"{model_name}@{backend}"
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.model = load_model(backend, model_name, batch_size, num_threads)
+        self._document_models = {backend: self.model}
+        self._document_model_lock = threading.Lock()
+        self.cache = cache if cache is not None else EmbeddingCache(path=EMBED_CACHE_PATH)
+        self.passage_cache = EmbeddingCache(max_size=PASSAGE_CACHE_SIZE)
+        self.batcher = MicroBatcher(self.model.embed_documents)
+        self.hits = 0
+        self.misses = 0
+
+    def document_model(self):
+        """The model that embeds documents: the one the index was built with, else this backend."""
+        backend = _document_backend or self.backend
+        if backend not in self._document_models:
+            with self._document_model_lock:
+                if backend not in self._document_models:
+                    self._document_models[backend] = load_model(backend, self.model_name, self.batch_size, self.num_threads)
+        return self._document_models[backend]
+
+    def embed_documents(self, texts):
+        return self.document_model().embed_documents(list(texts))
+
+    def _embed_cached(self, texts, cache):
+        """(vectors, hits, misses) for `texts`, computing the misses in one forward pass."""
+        keys = [cache_key(self.cache_name, text) for text in texts]
+        vectors = [cache.get(key) for key in keys]
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        hits = len(texts) - sum(vector is None for vector in vectors)
+
+        computed = dict(zip(missing, self.model.embed_documents(missing))) if missing else {}
+        for index, (key, text) in enumerate(zip(keys, texts)):
+            if vectors[index] is None:
+                vectors[index] = computed[text]
+                cache.put(key, vectors[index])
+        return vectors, hits, len(missing)
+
+    def embed_queries(self, texts):
+        """Embed many queries in one forward pass, filling and reusing the cache."""
+        vectors, hits, misses = self._embed_cached(texts, self.cache)
+        self.hits += hits
+        self.misses += misses
+        return vectors
+
+    def embed_passages(self, texts):
+        """Embed short passages with the query model through their own small cache.
+
+        They never evict query vectors or count towards the query hit rate.
+        """
+        return self._embed_cached(texts, self.passage_cache)[0]
+
+    def embed_query(self, text):
+        key = cache_key(self.cache_name, text)
+        vector = self.cache.get(key)
+        if vector is not None:
+            self.hits += 1
+            return vector
+        self.misses += 1
+        vector = self.batcher.submit(text).result()
+        self.cache.put(key, vector)
+        return vector
+
+    async def aembed_query(self, text):
+        key = cache_key(self.cache_name, text)
+        vector = self.cache.get(key)
+        if vector is not None:
+            self.hits += 1
+            return vector
+        self.misses += 1
+        vector = await asyncio.wrap_future(self.batcher.submit(text))
+        self.cache.put(key, vector)
+        return vector
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "cache_size": len(self.cache),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": self.hits / lookups if lookups else 0.0,
+            "query_batches": self.batcher.batches,
+            "avg_query_batch": self.batcher.items / self.batcher.batches if self.batcher.batches else 0.0,
+        }
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+_document_backend = None
+
+def use_document_backend(backend: str):
+    """Embed documents with `backend`, the one recorded in the index manifest.
+
+    New chunks then match the vectors already in the index, whatever backend
+    serves queries; torch is only loaded for an index that was built with it.
+    """
+    global _document_backend
+    _document_backend = backend
+
+def get_embeddings():
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                _embeddings = EmbeddingService()
+    return _embeddings
@@ -0,0 +1,82 @@
+# tools/fake_llm.py
+import asyncio
+import hashlib
+import time
+from typing import Any
+from typing import List
+from typing import Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGeneration
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.outputs import ChatResult
+
+ANSWERS = [
+    "This sounds like a mild viral infection; rest, drink plenty of fluids and take paracetamol for fever.",
+    "These symptoms are common and usually settle within a week, but see a doctor if they get worse.",
+    "Keeping your blood sugar in range, regular exercise and a balanced diet are the most important steps.",
+    "Please seek urgent care if you have chest pain, trouble breathing or confusion.",
+]
+
+def stable_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+class FakeChatModel(BaseChatModel):
+    """ChatGroq stand-in: fixed latency, canned answers and usage metadata.
+
+    `failure_rate` makes that fraction of prompts (chosen by hash) raise, to
+    exercise the fallback paths. Streaming yields one word at a time after
+    the first-token latency.
+    """
+
+    latency: float = 0.4
+    token_delay: float = 0.0
+    failure_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-groq"
+
+    def _answer(self, messages) -> str:
+        prompt = "\n".join(str(m.content) for m in messages)
+        digest = stable_hash(prompt)
+        if (digest % 1000) / 1000 < self.failure_rate:
+            raise RuntimeError("simulated Groq failure")
+        return ANSWERS[digest % len(ANSWERS)]
+
+    def _message(self, messages, answer: str) -> AIMessage:
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        completion_tokens = len(answer) // 4
+        usage = {"input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        return AIMessage(content=answer, usage_metadata=usage)
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, self._answer(messages)))])
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, self._answer(messages)))])
+
+    def _stream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        answer = self._answer(messages)
+        time.sleep(self.latency)
+        for word in answer.split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+            if self.token_delay:
+                time.sleep(self.token_delay)
+
+    async def _astream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        answer = self._answer(messages)
+        await asyncio.sleep(self.latency)
+        for word in answer.split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
@@ -0,0 +1,207 @@
+# tools/flat_index.py
+import json
+import mmap
+import os
+import shutil
+from pathlib import Path
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from .index_manager import utc_now
+
+# float16 halves disk and page-cache use at the cost of a per-block upcast on every search
+FLAT_DTYPE = os.getenv("MEDIGENIUS_FLAT_DTYPE", "float32")
+SEARCH_BLOCK_ROWS = 65536
+EXPORT_PAGE_SIZE = 4096
+
+class FlatIndex:
+    """Read-only exact-search index over memory-mapped files in one directory.
+
+    - `vectors.npy`: (n, dim) unit-length embeddings, float32 or float16
+    - `chunks.bin`: one UTF-8 JSON record `[id, text, metadata]` per row
+    - `offsets.npy`: n + 1 byte offsets of the records in `chunks.bin`
+    - `meta.json`: corpus version, shape and dtype
+
+    Every file is mapped read-only, so worker processes on one host share the
+    same pages through the OS cache instead of each holding a copy.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        self.vectors = np.load(self.path / "vectors.npy", mmap_mode="r")
+        self.offsets = np.load(self.path / "offsets.npy", mmap_mode="r")
+        with open(self.path / "chunks.bin", "rb") as f:
+            self._chunks = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        self._rows = None
+
+    @classmethod
+    def open(cls, path, corpus_version: str = None):
+        """The index at `path`, or None if it is missing or was built for another corpus version."""
+        path = Path(path)
+        if not (path / "meta.json").exists():
+            return None
+        index = cls(path)
+        if corpus_version is not None and index.corpus_version != corpus_version:
+            return None
+        return index
+
+    @property
+    def corpus_version(self) -> str:
+        return self.meta.get("corpus_version", "")
+
+    def __len__(self):
+        return int(self.meta["count"])
+
+    def record(self, row: int):
+        """(id, text, metadata) of one row."""
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._chunks[start:end].decode("utf-8"))
+
+    def row_of(self, chunk_id: str):
+        if self._rows is None:
+            self._rows = {self.record(row)[0]: row for row in range(len(self))}
+        return self._rows.get(chunk_id)
+
+    def search(self, queries, k: int):
+        """Top-k rows and cosine scores for each query vector, best first.
+
+        Scores one block of rows at a time with a single matrix product for
+        all queries, keeping only a running top-k per query.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1.0, norms)
+        k = min(k, len(self))
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        if k <= 0:
+            return best_rows, best_scores
+
+        for start in range(0, len(self), SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, start + len(block)), (len(queries), len(block)))], axis=1)
+            keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(scores, keep, axis=1)
+            best_rows = np.take_along_axis(rows, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def get(self, ids=None, include=None, limit: int = None, offset: int = None) -> dict:
+        """Rows by ID (or all, paged), shaped like `Chroma.get`."""
+        include = ["documents", "metadatas"] if include is None else include
+        if ids is None:
+            start = offset or 0
+            rows = range(start, len(self) if limit is None else min(len(self), start + limit))
+        else:
+            rows = [row for row in map(self.row_of, ids) if row is not None]
+        records = [self.record(row) for row in rows]
+        result = {"ids": [record[0] for record in records]}
+        if "documents" in include:
+            result["documents"] = [record[1] for record in records]
+        if "metadatas" in include:
+            result["metadatas"] = [record[2] for record in records]
+        if "embeddings" in include:
+            result["embeddings"] = [np.asarray(self.vectors[row], dtype=np.float32) for row in rows]
+        return result
+
+def export_flat_index(source, path, corpus_version: str, dtype: str = FLAT_DTYPE) -> FlatIndex:
+    """Write every chunk of `source` (anything with Chroma's `get`) as a flat index at `path`.
+
+    The files are written to a temporary directory and swapped in, so a
+    process that already mapped the old index keeps reading it safely.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    vectors, offsets, position = [], [0], 0
+    with open(tmp_path / "chunks.bin", "wb") as chunks:
+        page_start = 0
+        while True:
+            page = source.get(include=["documents", "metadatas", "embeddings"], limit=EXPORT_PAGE_SIZE, offset=page_start)
+            if not page["ids"]:
+                break
+            for chunk_id, text, metadata, embedding in zip(page["ids"], page["documents"], page["metadatas"], page["embeddings"]):
+                record = json.dumps([chunk_id, text, metadata or {}], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                chunks.write(record)
+                position += len(record)
+                offsets.append(position)
+                vectors.append(np.asarray(embedding, dtype=np.float32))
+            page_start += len(page["ids"])
+
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = (matrix / np.where(norms == 0, 1.0, norms)).astype(dtype)
+    np.save(tmp_path / "vectors.npy", matrix)
+    np.save(tmp_path / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+    meta = {
+        "corpus_version": corpus_version,
+        "count": int(matrix.shape[0]),
+        "dim": int(matrix.shape[1]),
+        "dtype": str(matrix.dtype),
+        "built_at": utc_now(),
+    }
+    (tmp_path / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    old_path = path.with_name(f"{path.name}.{os.getpid()}.old")
+    if path.exists():
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return FlatIndex(path)
+
+class FlatVectorStore(VectorStore):
+    """Read-only LangChain vector store over a `FlatIndex`.
+
+    Relevance scores are cosine similarities, the same scale Chroma reports
+    for its cosine collection, so retrievers and routing thresholds work
+    unchanged on either backend.
+    """
+
+    def __init__(self, index: FlatIndex, embedding):
+        self.index = index
+        self._embedding = embedding
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def _results(self, rows, scores) -> list:
+        results = []
+        for row, score in zip(rows, scores):
+            chunk_id, text, metadata = self.index.record(int(row))
+            results.append((Document(page_content=text, metadata=metadata, id=chunk_id), float(score)))
+        return results
+
+    def similarity_search_by_vectors_with_scores(self, vectors, k: int = 4) -> list:
+        """One [(Document, score)] list per query vector, from a single batched search."""
+        rows, scores = self.index.search(vectors, k)
+        return [self._results(r, s) for r, s in zip(rows, scores)]
+
+    def similarity_search_batch_with_relevance_scores(self, queries, k: int = 4) -> list:
+        embed = getattr(self._embedding, "embed_queries", self._embedding.embed_documents)
+        return self.similarity_search_by_vectors_with_scores(embed(list(queries)), k)
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4, **kwargs):
+        return self.similarity_search_by_vectors_with_scores([self._embedding.embed_query(query)], k)[0]
+
+    async def asimilarity_search_with_relevance_scores(self, query: str, k: int = 4, **kwargs):
+        vector = await self._embedding.aembed_query(query)
+        return self.similarity_search_by_vectors_with_scores([vector], k)[0]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_relevance_scores(query, k)]
+
+    def get(self, ids=None, include=None, limit: int = None, offset: int = None) -> dict:
+        return self.index.get(ids=ids, include=include, limit=limit, offset=offset)
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("The flat index is read-only; rebuild it with `python -m tools.index_manager build`")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Export a flat index from the Chroma collection with `export_flat_index`")
@@ -0,0 +1,111 @@
+# tools/index_manager.py
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+
+from .pdf_loader import CHUNK_SIZE
+from .pdf_loader import CHUNK_OVERLAP
+from .pdf_loader import SEPARATORS
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 2
+
+# Keys that must match for a persisted index to be reused; changing any of
+# them changes every chunk or every vector, so only a full rebuild helps.
+_INDEX_KEYS = ("manifest_version", "embedding_model", "chunk_size", "chunk_overlap", "separators")
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+def file_sha256(path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def manifest_path(db_dir) -> Path:
+    return Path(db_dir) / MANIFEST_NAME
+
+def read_manifest(db_dir):
+    path = manifest_path(db_dir)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+def write_manifest(db_dir, manifest: dict):
+    path = manifest_path(db_dir)
+    tmp_path = path.with_suffix(f".json.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def expected_manifest(embedding_model: str) -> dict:
+    return {
+        "manifest_version": MANIFEST_VERSION,
+        "embedding_model": embedding_model,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "separators": list(SEPARATORS),
+    }
+
+def new_manifest(embedding_model: str, embedding_backend: str = "torch") -> dict:
+    manifest = expected_manifest(embedding_model)
+    # Not an index key: the backend only decides how later documents are embedded
+    manifest.update({"sources": {}, "chunk_count": 0, "built_at": utc_now(), "embedding_backend": embedding_backend})
+    return manifest
+
+def manifest_mismatches(current, expected) -> list:
+    """Return the reasons `current` cannot be reused for `expected`; empty means reusable."""
+    if not current:
+        return ["no manifest"]
+    return [
+        f"{key} changed ({current.get(key)!r} -> {expected.get(key)!r})"
+        for key in _INDEX_KEYS
+        if current.get(key) != expected.get(key)
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.index_manager",
+        description="Build or verify the persisted medical vector index."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build the index, re-embedding only what changed")
+    build.add_argument("--force", action="store_true", help="drop the index and rebuild from scratch")
+    sub.add_parser("verify", help="exit non-zero if the index does not match the documents")
+    args = parser.parse_args(argv)
+
+    # Imported lazily so `--help` does not load the embedding model.
+    from .ingestion import stale_reasons
+    from .vector_store import DOCS_DIR
+    from .vector_store import EMBEDDING_MODEL_NAME
+    from .vector_store import VECTOR_DB_DIR
+    from .vector_store import initialize_vectorstore
+
+    if args.command == "build":
+        initialize_vectorstore(rebuild=args.force)
+        manifest = read_manifest(VECTOR_DB_DIR)
+        print(f"Index ready: {manifest.get('chunk_count')} chunks from "
+              f"{len(manifest.get('sources', {}))} documents, built {manifest.get('built_at')}")
+        return 0
+
+    current = read_manifest(VECTOR_DB_DIR)
+    reasons = stale_reasons(current, DOCS_DIR, expected_manifest(EMBEDDING_MODEL_NAME))
+    if reasons:
+        print("Index is stale: " + "; ".join(reasons))
+        return 1
+    print(f"Index is up to date: {current.get('chunk_count')} chunks, built {current.get('built_at')}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
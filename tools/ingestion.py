@@ -0,0 +1,210 @@
+# tools/ingestion.py
+import argparse
+import hashlib
+import json
+import sys
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+
+from .index_manager import file_sha256
+from .index_manager import manifest_mismatches
+from .index_manager import utc_now
+from .pdf_loader import iter_pdf_chunk_batches
+from .pdf_loader import iter_text_chunk_batches
+
+# Each loader yields bounded batches of chunks for one file
+LOADERS = {
+    ".pdf": iter_pdf_chunk_batches,
+    ".txt": iter_text_chunk_batches,
+    ".md": iter_text_chunk_batches,
+}
+
+@dataclass
+class IngestReport:
+    added: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+    chunks_added: int = 0
+    chunks_deleted: int = 0
+    chunks_kept: int = 0
+    seconds: float = 0.0
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed, "
+            f"{len(self.unchanged)} unchanged documents; {self.chunks_added} chunks embedded, "
+            f"{self.chunks_deleted} deleted, {self.chunks_kept} kept in {self.seconds:.1f}s"
+        )
+
+def scan_directory(docs_dir, previous_sources=None) -> dict:
+    """Fingerprint every supported document under `docs_dir`.
+
+    The stored hash is reused when a file's size and mtime are unchanged, so a
+    scan of an untouched corpus does not read any file contents.
+    """
+    docs_dir = Path(docs_dir)
+    previous_sources = previous_sources or {}
+    if not docs_dir.is_dir():
+        return {}
+
+    files = {}
+    for path in sorted(docs_dir.rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in LOADERS:
+            continue
+        name = path.relative_to(docs_dir).as_posix()
+        stat = path.stat()
+        fingerprint = {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+        previous = previous_sources.get(name) or {}
+        if previous.get("size") == fingerprint["size"] and previous.get("mtime") == fingerprint["mtime"]:
+            fingerprint["sha256"] = previous.get("sha256")
+        else:
+            fingerprint["sha256"] = file_sha256(path)
+        files[name] = fingerprint
+    return files
+
+def plan_sync(files: dict, sources: dict) -> dict:
+    plan = {"added": [], "changed": [], "removed": [], "unchanged": []}
+    for name, fingerprint in files.items():
+        if name not in sources:
+            plan["added"].append(name)
+        elif sources[name].get("sha256") != fingerprint["sha256"]:
+            plan["changed"].append(name)
+        else:
+            plan["unchanged"].append(name)
+    plan["removed"] = sorted(set(sources) - set(files))
+    return plan
+
+def stale_reasons(manifest: dict, docs_dir, expected: dict) -> list:
+    """Why the index described by `manifest` no longer matches `docs_dir`; empty when current.
+
+    A prebuilt index shipped without its documents counts as current.
+    """
+    reasons = manifest_mismatches(manifest, expected)
+    if reasons:
+        return reasons
+    files = scan_directory(docs_dir, manifest.get("sources"))
+    if files:
+        plan = plan_sync(files, manifest.get("sources", {}))
+        reasons = [f"{name} {change}" for change, names in plan.items() if change != "unchanged" for name in names]
+    if not manifest.get("chunk_count"):
+        reasons.append("index is empty")
+    return reasons
+
+def chunk_ids(name: str, chunks, seen=None) -> list:
+    """Deterministic IDs from each chunk's file, text and metadata.
+
+    Unchanged chunks of an edited document keep their ID and are not re-embedded.
+    Pass the same `seen` dict for every batch of one file so repeated chunks
+    get distinct suffixes.
+    """
+    ids, seen = [], {} if seen is None else seen
+    for chunk in chunks:
+        payload = json.dumps([name, chunk.page_content, chunk.metadata], sort_keys=True, default=str)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+        seen[digest] = seen.get(digest, -1) + 1
+        ids.append(digest if seen[digest] == 0 else f"{digest}-{seen[digest]}")
+    return ids
+
+def iter_chunk_batches(path):
+    return LOADERS[Path(path).suffix.lower()](str(path))
+
+def sync_directory(vectorstore, docs_dir, manifest: dict, prune: bool = True) -> IngestReport:
+    """Bring `vectorstore` in line with `docs_dir`, updating `manifest` in place.
+
+    Only chunks whose ID is not already indexed are embedded; chunks of
+    removed files and chunks that disappeared from edited files are deleted.
+    With `prune=False` documents missing from `docs_dir` are left indexed.
+    """
+    start = time.perf_counter()
+    docs_dir = Path(docs_dir)
+    sources = manifest.setdefault("sources", {})
+    files = scan_directory(docs_dir, sources)
+    plan = plan_sync(files, sources)
+    report = IngestReport(unchanged=plan["unchanged"])
+
+    for name in plan["removed"] if prune else []:
+        stale_ids = sources.pop(name).get("chunks", [])
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+        report.removed.append(name)
+        report.chunks_deleted += len(stale_ids)
+
+    for name in plan["added"] + plan["changed"]:
+        old_ids = set((sources.get(name) or {}).get("chunks", []))
+        ids, seen, embedded = [], {}, 0
+
+        # Chunks reach the embedder one bounded batch at a time
+        for batch in iter_chunk_batches(docs_dir / name):
+            for chunk in batch:
+                # Relative names keep chunk IDs stable when the corpus moves between machines
+                chunk.metadata["source"] = name
+            batch_ids = chunk_ids(name, batch, seen)
+            ids.extend(batch_ids)
+
+            new_pairs = [(chunk_id, chunk) for chunk_id, chunk in zip(batch_ids, batch) if chunk_id not in old_ids]
+            if new_pairs:
+                vectorstore.add_documents([chunk for _, chunk in new_pairs], ids=[chunk_id for chunk_id, _ in new_pairs])
+                embedded += len(new_pairs)
+
+        stale_ids = sorted(old_ids - set(ids))
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+
+        sources[name] = dict(files[name], chunks=ids)
+        (report.changed if name in plan["changed"] else report.added).append(name)
+        report.chunks_added += embedded
+        report.chunks_deleted += len(stale_ids)
+        report.chunks_kept += len(ids) - embedded
+
+    # Refresh size/mtime of untouched files so the next scan skips hashing them
+    for name in plan["unchanged"]:
+        sources[name] = dict(files[name], chunks=sources[name].get("chunks", []))
+
+    report.chunks_kept += sum(len(sources[name].get("chunks", [])) for name in plan["unchanged"])
+    # Chunks of an adopted prebuilt index belong to no known source file
+    manifest["chunk_count"] = manifest.get("adopted_chunks", 0) + sum(len(source.get("chunks", [])) for source in sources.values())
+    if report.has_changes:
+        manifest["updated_at"] = utc_now()
+    report.seconds = time.perf_counter() - start
+    return report
+
+def watch_directory(interval: float = 30.0, callback=print):
+    """Poll the documents directory and sync whenever it changes."""
+    from .vector_store import sync_vectorstore
+
+    while True:
+        report = sync_vectorstore()
+        if report.has_changes:
+            callback(report.summary())
+        time.sleep(interval)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.ingestion",
+        description="Incrementally ingest the documents directory into the vector index."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sync", help="ingest new/changed documents and drop removed ones, then exit")
+    watch = sub.add_parser("watch", help="keep polling the documents directory")
+    watch.add_argument("--interval", type=float, default=30.0, help="seconds between scans")
+    args = parser.parse_args(argv)
+
+    if args.command == "watch":
+        try:
+            watch_directory(args.interval)
+        except KeyboardInterrupt:
+            return 0
+
+    from .vector_store import sync_vectorstore
+    print(sync_vectorstore().summary())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,511 @@
 # tools/llm_client.py
-from langchain_groq import ChatGroq
-
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any
+from typing import List
+from typing import Optional
+import httpx
 from dotenv import load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatResult
+from pydantic import PrivateAttr
 
 load_dotenv()
 
+LLM_MODEL_NAME = "openai/gpt-oss-120b"
+LLM_MAX_TOKENS = 2048
+# groq (default) or fake: canned answers with no network, for tests and load runs
+LLM_BACKEND = os.getenv("MEDIGENIUS_LLM_BACKEND", "groq")
+FAKE_LLM_LATENCY = float(os.getenv("MEDIGENIUS_FAKE_LLM_LATENCY", "0"))
+# Calls in flight per process, and per conversation
+LLM_CONCURRENCY = int(os.getenv("MEDIGENIUS_LLM_CONCURRENCY", "16"))
+LLM_SESSION_CONCURRENCY = int(os.getenv("MEDIGENIUS_LLM_SESSION_CONCURRENCY", "1"))
+# Requests per minute allowed to start; 0 leaves pacing to the provider's rate-limit headers
+LLM_RPM = float(os.getenv("MEDIGENIUS_LLM_RPM", "0"))
+LLM_BURST = int(os.getenv("MEDIGENIUS_LLM_BURST", "5"))
+LLM_TIMEOUT = float(os.getenv("MEDIGENIUS_LLM_TIMEOUT", "20"))
+LLM_DEADLINE = float(os.getenv("MEDIGENIUS_LLM_DEADLINE", "45"))
+LLM_RETRIES = int(os.getenv("MEDIGENIUS_LLM_RETRIES", "3"))
+RETRY_BASE_SECONDS = 0.5
+RETRY_CAP_SECONDS = 8.0
+POOL_CONNECTIONS = int(os.getenv("MEDIGENIUS_LLM_POOL", "20"))
+KEEPALIVE_SECONDS = 60.0
+
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+_session = contextvars.ContextVar("medigenius_llm_session", default=None)
+
+class LLMUnavailable(Exception):
+    """No LLM call could be completed before the deadline."""
+
+@contextmanager
+def llm_session(session_id: str):
+    """Attribute LLM calls made inside the block to one conversation."""
+    token = _session.set(session_id)
+    try:
+        yield
+    finally:
+        try:
+            _session.reset(token)
+        except ValueError:
+            # A streaming generator may be closed from a different context
+            pass
+
+def parse_duration(value) -> float:
+    """Seconds in a rate-limit header: `12`, `1.5`, `120ms`, `2m59.56s`."""
+    if value is None:
+        return 0.0
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        return sum(float(number) * _UNITS[unit] for number, unit in _DURATION.findall(value))
+
+def _header_count(headers, name: str):
+    """An integer rate-limit header, or None when it is missing or malformed."""
+    try:
+        return int(float(headers[name]))
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+
+class TokenBucket:
+    """Request pacing shared by every caller of one gateway.
+
+    Refills at `rate` requests per second up to `burst`; a rate of 0 only
+    enforces the pauses the provider asks for through its rate-limit headers
+    (an exhausted request or token quota, or a 429 `retry-after`).
+    """
+
+    def __init__(self, rate: float = LLM_RPM / 60, burst: int = LLM_BURST, min_tokens: int = LLM_MAX_TOKENS):
+        self.rate = rate
+        self.burst = burst
+        self.min_tokens = min_tokens
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float = None):
+        """Seconds to wait before the next request may start, or None if that is longer than `max_wait`."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self.blocked_until - now)
+            if self.rate > 0:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = max(wait, (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0)
+            if max_wait is not None and wait > max_wait:
+                return None
+            if self.rate > 0:
+                self.tokens -= 1
+            self.throttled_seconds += wait
+            return wait
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def observe(self, status_code: int, headers):
+        """Adapt to the `x-ratelimit-*` and `retry-after` headers of a response."""
+        if status_code == 429 and headers.get("retry-after"):
+            self.pause(parse_duration(headers["retry-after"]))
+        remaining = _header_count(headers, "x-ratelimit-remaining-requests")
+        if remaining is not None and remaining <= 0:
+            self.pause(parse_duration(headers.get("x-ratelimit-reset-requests")))
+        remaining_tokens = _header_count(headers, "x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None and remaining_tokens < self.min_tokens:
+            self.pause(parse_duration(headers.get("x-ratelimit-reset-tokens")))
+
+def pooled_clients(bucket: TokenBucket):
+    """Keep-alive httpx clients for the Groq SDK that report rate-limit headers to `bucket`."""
+    limits = httpx.Limits(max_connections=POOL_CONNECTIONS, max_keepalive_connections=POOL_CONNECTIONS,
+                          keepalive_expiry=KEEPALIVE_SECONDS)
+
+    def observe(response):
+        bucket.observe(response.status_code, response.headers)
+
+    async def aobserve(response):
+        bucket.observe(response.status_code, response.headers)
+
+    client = httpx.Client(limits=limits, timeout=LLM_TIMEOUT, event_hooks={"response": [observe]})
+    async_client = httpx.AsyncClient(limits=limits, timeout=LLM_TIMEOUT, event_hooks={"response": [aobserve]})
+    return client, async_client
+
+def is_retryable(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRY_STATUS
+    return (isinstance(exc, (httpx.TransportError, TimeoutError, ConnectionError))
+            or type(exc).__name__ in ("APIConnectionError", "APITimeoutError"))
+
+def retry_after(exc: BaseException) -> float:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    return parse_duration(headers.get("retry-after"))
+
+def backoff(attempt: int, exc: BaseException) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's `retry-after`."""
+    return max(retry_after(exc), random.uniform(0, min(RETRY_CAP_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt)))
+
+def prompt_key(messages, stop=None, **kwargs) -> str:
+    payload = json.dumps([[(m.type, m.content) for m in messages], stop, kwargs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _coalesced_copy(result: ChatResult) -> ChatResult:
+    # Followers share the leader's answer but spent no tokens of their own
+    result = result.model_copy(deep=True)
+    for generation in result.generations:
+        message = generation.message
+        if getattr(message, "usage_metadata", None):
+            message.usage_metadata = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        message.response_metadata = dict(message.response_metadata, coalesced=True, token_usage={})
+    return result
+
+class LLMGateway(BaseChatModel):
+    """Chat model wrapper that every LLM call goes through.
+
+    - caps calls in flight per process and per conversation (`llm_session`)
+    - paces requests with a `TokenBucket` fed by the provider's headers
+    - retries transient failures with jittered backoff inside one deadline
+    - runs identical concurrent prompts once and hands every caller the answer
+
+    Streaming is passed through chunk by chunk, so LangGraph's message
+    stream still sees every token; a stream is only retried before its
+    first chunk.
+    """
+
+    model: BaseChatModel
+    bucket: Any = None
+    max_concurrency: int = LLM_CONCURRENCY
+    session_concurrency: int = LLM_SESSION_CONCURRENCY
+    max_retries: int = LLM_RETRIES
+    deadline: float = LLM_DEADLINE
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _slots: Any = PrivateAttr(default=None)
+    _sessions: dict = PrivateAttr(default_factory=dict)
+    _inflight: dict = PrivateAttr(default_factory=dict)
+    _loop: Any = PrivateAttr(default=None)
+    _aslots: Any = PrivateAttr(default=None)
+    _asessions: dict = PrivateAttr(default_factory=dict)
+    _ainflight: dict = PrivateAttr(default_factory=dict)
+    _counts: dict = PrivateAttr(default_factory=lambda: {"calls": 0, "coalesced": 0, "retries": 0, "failures": 0, "in_flight": 0})
+
+    def model_post_init(self, __context):
+        super().model_post_init(__context)
+        if self.bucket is None:
+            self.bucket = TokenBucket()
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    @property
+    def _llm_type(self) -> str:
+        return f"gateway-{self.model._llm_type}"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return self.model._identifying_params
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counts)
+        stats["throttled_seconds"] = round(self.bucket.throttled_seconds, 3)
+        return stats
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self._counts[key] += amount
+
+    # Sync path (Flask, CLI)
+
+    @contextmanager
+    def _session_slot(self, expires: float):
+        session_id = _session.get()
+        if session_id is None:
+            yield
+            return
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, [threading.Semaphore(self.session_concurrency), 0])
+            entry[1] += 1
+        try:
+            if not entry[0].acquire(timeout=max(0.0, expires - time.monotonic())):
+                raise LLMUnavailable(f"conversation {session_id} already has {self.session_concurrency} LLM call(s) in flight")
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._sessions.pop(session_id, None)
+
+    @contextmanager
+    def _slot(self, expires: float):
+        if not self._slots.acquire(timeout=max(0.0, expires - time.monotonic())):
+            raise LLMUnavailable("every LLM slot stayed busy until the deadline")
+        self._count("in_flight")
+        try:
+            wait = self.bucket.reserve(max_wait=expires - time.monotonic())
+            if wait is None:
+                raise LLMUnavailable("rate limited past the deadline")
+            time.sleep(wait)
+            self._count("calls")
+            yield
+        finally:
+            self._count("in_flight", -1)
+            self._slots.release()
+
+    def _with_retries(self, call, expires: float):
+        attempt = 0
+        while True:
+            try:
+                with self._slot(expires):
+                    return call()
+            except LLMUnavailable:
+                self._count("failures")
+                raise
+            except Exception as e:
+                delay = backoff(attempt, e)
+                if attempt >= self.max_retries or not is_retryable(e) or time.monotonic() + delay >= expires:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                attempt += 1
+                time.sleep(delay)
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        key = prompt_key(messages, stop, **kwargs)
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            self._count("coalesced")
+            return _coalesced_copy(future.result())
+
+        expires = time.monotonic() + self.deadline
+        try:
+            with self._session_slot(expires):
+                result = self._with_retries(lambda: self.model._generate(messages, stop, run_manager, **kwargs), expires)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _stream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        expires = time.monotonic() + self.deadline
+        with self._session_slot(expires):
+            attempt = 0
+            while True:
+                started = False
+                try:
+                    with self._slot(expires):
+                        for chunk in self.model._stream(messages, stop, run_manager, **kwargs):
+                            started = True
+                            yield chunk
+                    return
+                except LLMUnavailable:
+                    self._count("failures")
+                    raise
+                except Exception as e:
+                    delay = backoff(attempt, e)
+                    if started or attempt >= self.max_retries or not is_retryable(e) or time.monotonic() + delay >= expires:
+                        self._count("failures")
+                        raise
+                    self._count("retries")
+                    attempt += 1
+                    time.sleep(delay)
+
+    # Async path (FastAPI); asyncio primitives belong to the loop that created them
+
+    def _async_state(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._aslots = asyncio.Semaphore(self.max_concurrency)
+            self._asessions = {}
+            self._ainflight = {}
+        return self._aslots
+
+    async def _aacquire(self, semaphore, expires: float, message: str):
+        acquire = asyncio.ensure_future(semaphore.acquire())
+        acquired = False
+        try:
+            await asyncio.wait({acquire}, timeout=max(0.0, expires - time.monotonic()))
+            acquired = acquire.done()
+        finally:
+            if not acquired:
+                # Timed out or cancelled: a permit granted in the meantime goes straight back
+                acquire.cancel()
+                acquire.add_done_callback(lambda task: task.cancelled() or semaphore.release())
+        if not acquired:
+            raise LLMUnavailable(message)
+
+    async def _acall(self, call, expires: float):
+        slots = self._async_state()
+        await self._aacquire(slots, expires, "every LLM slot stayed busy until the deadline")
+        self._count("in_flight")
+        try:
+            wait = self.bucket.reserve(max_wait=expires - time.monotonic())
+            if wait is None:
+                raise LLMUnavailable("rate limited past the deadline")
+            await asyncio.sleep(wait)
+            self._count("calls")
+            return await call()
+        finally:
+            self._count("in_flight", -1)
+            slots.release()
+
+    async def _awith_retries(self, call, expires: float):
+        attempt = 0
+        while True:
+            try:
+                return await self._acall(call, expires)
+            except LLMUnavailable:
+                self._count("failures")
+                raise
+            except Exception as e:
+                delay = backoff(attempt, e)
+                if attempt >= self.max_retries or not is_retryable(e) or time.monotonic() + delay >= expires:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _asession_call(self, call, expires: float):
+        session_id = _session.get()
+        if session_id is None:
+            return await call()
+        self._async_state()
+        entry = self._asessions.setdefault(session_id, [asyncio.Semaphore(self.session_concurrency), 0])
+        entry[1] += 1
+        try:
+            await self._aacquire(entry[0], expires, f"conversation {session_id} already has {self.session_concurrency} LLM call(s) in flight")
+            try:
+                return await call()
+            finally:
+                entry[0].release()
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._asessions.pop(session_id, None)
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self._async_state()
+        key = prompt_key(messages, stop, **kwargs)
+        future = self._ainflight.get(key)
+        if future is not None:
+            self._count("coalesced")
+            return _coalesced_copy(await asyncio.shield(future))
+
+        future = self._ainflight[key] = asyncio.get_running_loop().create_future()
+        expires = time.monotonic() + self.deadline
+        try:
+            result = await self._asession_call(
+                lambda: self._awith_retries(lambda: self.model._agenerate(messages, stop, run_manager, **kwargs), expires),
+                expires
+            )
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # Followers belong to other requests: they get an ordinary failure, not our cancellation
+            future.set_exception(LLMUnavailable("the shared call for this prompt was cancelled"))
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; don't let the loop warn about an unread exception
+            future.exception()
+            raise
+        finally:
+            if self._ainflight.get(key) is future:
+                del self._ainflight[key]
+
+    async def _astream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        expires = time.monotonic() + self.deadline
+        session_id = _session.get()
+        session = None
+        if session_id is not None:
+            self._async_state()
+            session = self._asessions.setdefault(session_id, [asyncio.Semaphore(self.session_concurrency), 0])
+            session[1] += 1
+        try:
+            if session is not None:
+                await self._aacquire(session[0], expires, f"conversation {session_id} already has {self.session_concurrency} LLM call(s) in flight")
+            try:
+                attempt = 0
+                while True:
+                    started = False
+                    slots = self._async_state()
+                    await self._aacquire(slots, expires, "every LLM slot stayed busy until the deadline")
+                    self._count("in_flight")
+                    try:
+                        wait = self.bucket.reserve(max_wait=expires - time.monotonic())
+                        if wait is None:
+                            raise LLMUnavailable("rate limited past the deadline")
+                        await asyncio.sleep(wait)
+                        self._count("calls")
+                        async for chunk in self.model._astream(messages, stop, run_manager, **kwargs):
+                            started = True
+                            yield chunk
+                        return
+                    except LLMUnavailable:
+                        self._count("failures")
+                        raise
+                    except Exception as e:
+                        delay = backoff(attempt, e)
+                        if started or attempt >= self.max_retries or not is_retryable(e) or time.monotonic() + delay >= expires:
+                            self._count("failures")
+                            raise
+                        self._count("retries")
+                        attempt += 1
+                    finally:
+                        self._count("in_flight", -1)
+                        slots.release()
+                    await asyncio.sleep(delay)
+            finally:
+                if session is not None:
+                    session[0].release()
+        finally:
+            if session is not None:
+                session[1] -= 1
+                if session[1] == 0:
+                    self._asessions.pop(session_id, None)
+
+def _backend(bucket: TokenBucket) -> BaseChatModel:
+    if LLM_BACKEND == "fake":
+        from .fake_llm import FakeChatModel
+        return FakeChatModel(latency=FAKE_LLM_LATENCY)
+
+    from langchain_groq import ChatGroq
+    client, async_client = pooled_clients(bucket)
+    # Retries belong to the gateway, which also honors the deadline and the bucket
+    return ChatGroq(model_name=LLM_MODEL_NAME, temperature=0.3, max_tokens=LLM_MAX_TOKENS, max_retries=0,
+                    timeout=LLM_TIMEOUT, http_client=client, http_async_client=async_client)
+
 _llm = None
 
 def get_llm():
     global _llm
     if _llm is None:
-        _llm = ChatGroq(
-            model_name="openai/gpt-oss-120b",
-            temperature=0.3,
-            max_tokens=2048
-        )
-    return _llm
\ No newline at end of file
+        bucket = TokenBucket()
+        _llm = LLMGateway(model=_backend(bucket), bucket=bucket)
+    return _llm
@@ -0,0 +1,200 @@
+# tools/onnx_embeddings.py
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+
+# Built once by `python -m tools.onnx_embeddings export`, e.g. at image build time
+ONNX_MODEL_DIR = Path(os.getenv("MEDIGENIUS_ONNX_MODEL_DIR", PROJECT_ROOT / "models" / "minilm-int8"))
+MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+ARTIFACT_MANIFEST = "artifact.json"
+REFERENCE_FILE = "reference.npz"
+# sentence-transformers truncates all-MiniLM-L6-v2 inputs at 256 word pieces
+MAX_SEQ_LENGTH = 256
+# Every reference sentence must keep at least this cosine to its float32 vector
+MIN_REFERENCE_COSINE = 0.99
+
+# Embedded by the float32 model at export time, so an artifact can be checked without torch
+REFERENCE_TEXTS = [
+    "What are the symptoms of dengue fever?",
+    "Dengue fever is a mosquito-borne viral infection that causes high fever, headache and joint pain.",
+    "How much metformin can I take for type 2 diabetes?",
+    "Type 2 diabetes is managed with diet, exercise and medicines such as metformin.",
+    "Hypertension rarely causes symptoms but raises the risk of stroke and heart attack.",
+    "Iron deficiency anemia leads to fatigue, pale skin and shortness of breath.",
+    "Is it safe to use an asthma inhaler during pregnancy?",
+    "Children with a fever above 39 degrees should see a doctor.",
+    "ibuprofen vs paracetamol for migraine",
+    "Chronic kidney disease is staged by the estimated glomerular filtration rate, and late stages may need "
+    "dialysis or a transplant; blood pressure control and avoiding nephrotoxic drugs slow its progression.",
+]
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+def mean_pool(hidden, mask) -> np.ndarray:
+    """sentence-transformers pooling for MiniLM: mean over real tokens, then L2-normalized."""
+    mask = np.asarray(mask, dtype=np.float32)[:, :, None]
+    summed = (np.asarray(hidden, dtype=np.float32) * mask).sum(axis=1)
+    pooled = summed / np.maximum(mask.sum(axis=1), 1e-9)
+    return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+def read_artifact(path) -> dict:
+    manifest_file = Path(path) / ARTIFACT_MANIFEST
+    if not manifest_file.exists():
+        raise FileNotFoundError(
+            f"No ONNX embedding artifact in {path}; build it with `python -m tools.onnx_embeddings export`"
+        )
+    with open(manifest_file, encoding="utf-8") as fh:
+        return json.load(fh)
+
+class OnnxEmbeddingModel:
+    """MiniLM as an int8 ONNX Runtime graph with a prebuilt tokenizer.
+
+    Drop-in for the `HuggingFaceEmbeddings` model inside EmbeddingService:
+    same pooling and normalization, no torch. Texts are sorted by length
+    before batching so each batch pads as little as possible.
+    """
+
+    def __init__(self, path=ONNX_MODEL_DIR, batch_size: int = 32, num_threads: int = 0):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        path = Path(path)
+        self.manifest = read_artifact(path)
+        self.model_name = self.manifest["model"]
+        self.batch_size = batch_size
+        self.tokenizer = Tokenizer.from_file(str(path / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(self.manifest.get("max_seq_length", MAX_SEQ_LENGTH))
+        self.tokenizer.enable_padding(pad_id=self.manifest["pad_id"], pad_token=self.manifest["pad_token"])
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(str(path / MODEL_FILE), options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+    def _encode(self, texts) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(texts))
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": np.array([e.ids for e in encodings], dtype=np.int64), "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        hidden = self.session.run(None, feeds)[0]
+        return mean_pool(hidden, mask)
+
+    def embed_array(self, texts) -> np.ndarray:
+        texts = list(texts)
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            batch = self._encode([texts[i] for i in rows])
+            if not vectors.shape[1]:
+                vectors = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            vectors[rows] = batch
+        return vectors
+
+    def embed_documents(self, texts) -> list:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text) -> list:
+        return self.embed_documents([text])[0]
+
+def reference_cosines(model, path=ONNX_MODEL_DIR) -> np.ndarray:
+    """Cosine of each reference sentence's vector from `model` to the one the float32 model produced."""
+    reference = np.load(Path(path) / REFERENCE_FILE)
+    vectors = model.embed_array([str(text) for text in reference["texts"]])
+    expected = reference["vectors"] / np.linalg.norm(reference["vectors"], axis=1, keepdims=True)
+    return np.sum(vectors * expected, axis=1)
+
+def export(output=ONNX_MODEL_DIR, model_name: str = None, max_seq_length: int = MAX_SEQ_LENGTH) -> dict:
+    """Export the embedding model to ONNX, quantize its weights to int8 and save the tokenizer next to it.
+
+    Build-time only: needs torch, transformers, onnx and onnxruntime. The
+    float32 vectors of REFERENCE_TEXTS are saved with the artifact, and the
+    export fails if the int8 model drifts below MIN_REFERENCE_COSINE.
+    """
+    import torch
+    from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+    from onnxruntime.quantization import QuantType
+    from onnxruntime.quantization import quantize_dynamic
+    from transformers import AutoModel
+    from transformers import AutoTokenizer
+    from .embeddings import EMBEDDING_MODEL_NAME
+
+    model_name = model_name or EMBEDDING_MODEL_NAME
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    sample = tokenizer(["a sample sentence"], return_tensors="pt")
+    float_file = output / "model.fp32.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            model, tuple(sample[name] for name in names), str(float_file),
+            input_names=names, output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in names + ["last_hidden_state"]},
+            opset_version=14
+        )
+    quantize_dynamic(str(float_file), str(output / MODEL_FILE), weight_type=QuantType.QInt8)
+    float_file.unlink()
+    tokenizer.backend_tokenizer.save(str(output / TOKENIZER_FILE))
+
+    # The same path the index was embedded with, so the tolerance is measured against it
+    reference = HuggingFaceEmbeddings(model_name=model_name).embed_documents(REFERENCE_TEXTS)
+    np.savez(output / REFERENCE_FILE, texts=np.array(REFERENCE_TEXTS), vectors=np.asarray(reference, dtype=np.float32))
+
+    manifest = {
+        "model": model_name,
+        "max_seq_length": max_seq_length,
+        "pad_id": tokenizer.pad_token_id,
+        "pad_token": tokenizer.pad_token,
+        "quantization": "dynamic int8 weights",
+        "exported_at": utc_now(),
+    }
+    with open(output / ARTIFACT_MANIFEST, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+
+    cosines = reference_cosines(OnnxEmbeddingModel(output), output)
+    manifest["min_reference_cosine"] = round(float(cosines.min()), 5)
+    with open(output / ARTIFACT_MANIFEST, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+    if cosines.min() < MIN_REFERENCE_COSINE:
+        raise RuntimeError(f"int8 vectors drifted from the float32 model (min cosine {cosines.min():.4f})")
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.onnx_embeddings",
+        description="Build or verify the int8 ONNX export of the embedding model."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("export", help="export and quantize the model (needs torch and transformers)")
+    build.add_argument("--output", default=str(ONNX_MODEL_DIR))
+    build.add_argument("--model", help="model to export (default: the index's embedding model)")
+    verify = sub.add_parser("verify", help="exit non-zero if the artifact drifted from the float32 vectors")
+    verify.add_argument("--path", default=str(ONNX_MODEL_DIR))
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        manifest = export(args.output, args.model)
+        print(f"Exported {manifest['model']} to {args.output} (min reference cosine {manifest['min_reference_cosine']})")
+        return 0
+
+    cosines = reference_cosines(OnnxEmbeddingModel(args.path), args.path)
+    print(f"min reference cosine {cosines.min():.5f}, mean {cosines.mean():.5f}")
+    return 0 if cosines.min() >= MIN_REFERENCE_COSINE else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
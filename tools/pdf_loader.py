@@ -1,15 +1,96 @@
 # tools/pdf_loader.py
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.document_loaders import TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
-def load_pdf_documents(file_path: str):
-    loader = PyPDFLoader(file_path)
-    docs = loader.load()
-    
-    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=512,
-        chunk_overlap=128,
-        separators=["\n\n", ". ", "\n", " "]
+# Chunking parameters are part of the index manifest: changing any of them
+# invalidates the persisted vector store and triggers a rebuild.
+CHUNK_SIZE = 512
+CHUNK_OVERLAP = 128
+SEPARATORS = ["\n\n", ". ", "\n", " "]
+
+# Streaming ingestion knobs: pages handed to a worker per task and chunks
+# handed to the embedder per batch. Peak memory is bounded by these, not by
+# the size of the PDF.
+PAGES_PER_TASK = 16
+CHUNK_BATCH_SIZE = 256
+INGEST_WORKERS = int(os.getenv("MEDIGENIUS_INGEST_WORKERS", os.cpu_count() or 1))
+
+_splitter = None
+
+def get_text_splitter():
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=SEPARATORS
     )
-    
-    return text_splitter.split_documents(docs)
\ No newline at end of file
+
+def _split_pages(pages):
+    # One splitter (and tiktoken encoder) per process, built on first use
+    global _splitter
+    if _splitter is None:
+        _splitter = get_text_splitter()
+    return _splitter.split_documents(pages)
+
+def _grouped(items, size):
+    items = iter(items)
+    while True:
+        group = list(islice(items, size))
+        if not group:
+            return
+        yield group
+
+def _rebatch(groups, batch_size):
+    batch = []
+    for group in groups:
+        batch.extend(group)
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+    if batch:
+        yield batch
+
+def _ordered_map(pool, fn, tasks, max_in_flight):
+    # Like pool.map, but only keeps `max_in_flight` tasks queued so pages are
+    # read from disk no faster than the workers can split them.
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, task))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def iter_pdf_pages(file_path: str):
+    return PyPDFLoader(file_path).lazy_load()
+
+def iter_pdf_chunk_batches(file_path: str, batch_size: int = CHUNK_BATCH_SIZE, workers: int = None):
+    """Yield lists of at most `batch_size` chunks, in page order.
+
+    Pages are parsed lazily and split in a process pool. Every page is split
+    independently, exactly like `split_documents` over the full page list, so
+    the chunk boundaries and metadata match `load_pdf_documents`.
+    """
+    workers = workers or INGEST_WORKERS
+    page_groups = _grouped(iter_pdf_pages(file_path), PAGES_PER_TASK)
+
+    if workers <= 1:
+        yield from _rebatch(map(_split_pages, page_groups), batch_size)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from _rebatch(_ordered_map(pool, _split_pages, page_groups, workers * 2), batch_size)
+
+def iter_text_chunk_batches(file_path: str, batch_size: int = CHUNK_BATCH_SIZE, workers: int = None):
+    yield from _rebatch([load_text_documents(file_path)], batch_size)
+
+def load_pdf_documents(file_path: str):
+    return [chunk for batch in iter_pdf_chunk_batches(file_path) for chunk in batch]
+
+def load_text_documents(file_path: str):
+    loader = TextLoader(file_path, encoding="utf-8")
+    return get_text_splitter().split_documents(loader.load())
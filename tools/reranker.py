@@ -0,0 +1,51 @@
+# tools/reranker.py
+import math
+import os
+
+# Empty disables reranking; e.g. "cross-encoder/ms-marco-MiniLM-L-6-v2" (~90 MB, CPU friendly)
+RERANKER_MODEL = os.getenv("MEDIGENIUS_RERANKER", "")
+# "auto" squashes the outputs with a sigmoid unless the model already applies one;
+# "sigmoid" and "none" force the choice
+RERANKER_ACTIVATION = os.getenv("MEDIGENIUS_RERANKER_ACTIVATION", "auto")
+
+def applies_sigmoid(model) -> bool:
+    """Whether the CrossEncoder's own activation already maps scores to 0-1."""
+    # sentence-transformers 4 names it activation_fn, earlier versions default_activation_function
+    activation = getattr(model, "activation_fn", None) or getattr(model, "default_activation_function", None)
+    return type(activation).__name__ == "Sigmoid"
+
+class CrossEncoderReranker:
+    """Scores (question, chunk) pairs with a small cross-encoder on the CPU.
+
+    Whether raw scores go through a sigmoid is decided once per model, so a
+    given pair scores the same whatever else is in the batch.
+    """
+
+    def __init__(self, model_name: str = RERANKER_MODEL, model=None, activation: str = RERANKER_ACTIVATION):
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(model_name, device="cpu")
+        self.model = model
+        if activation == "auto":
+            self.sigmoid = not applies_sigmoid(model)
+        else:
+            self.sigmoid = activation == "sigmoid"
+
+    def score(self, query: str, texts) -> list:
+        """Relevance of each text to `query` in 0-1, higher is better."""
+        if not texts:
+            return []
+        scores = [float(s) for s in self.model.predict([(query, text) for text in texts])]
+        if self.sigmoid:
+            # Logit checkpoints (e.g. ms-marco) must compare with the 0-1 routing threshold
+            scores = [1.0 / (1.0 + math.exp(-s)) for s in scores]
+        return scores
+
+_reranker = None
+
+def get_reranker():
+    """The shared reranker, or None when MEDIGENIUS_RERANKER is unset."""
+    global _reranker
+    if _reranker is None and RERANKER_MODEL:
+        _reranker = CrossEncoderReranker(RERANKER_MODEL)
+    return _reranker
@@ -0,0 +1,243 @@
+# tools/search_cache.py
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+
+SEARCH_CACHE_PATH = os.getenv("MEDIGENIUS_SEARCH_CACHE_PATH", str(PROJECT_ROOT / "search_cache.sqlite3"))
+SEARCH_CACHE_TTL = float(os.getenv("MEDIGENIUS_SEARCH_CACHE_TTL", str(7 * 24 * 3600)))
+# Directory of <source>.json fixtures ({query: content}); when set, nothing goes to the network
+OFFLINE_DIR = os.getenv("MEDIGENIUS_OFFLINE_DIR", "")
+BREAKER_FAILURES = int(os.getenv("MEDIGENIUS_BREAKER_FAILURES", "3"))
+BREAKER_RESET_SECONDS = float(os.getenv("MEDIGENIUS_BREAKER_RESET", "30"))
+
+_WORDS = re.compile(r"\w+")
+
+# Timed-out lookups can't be killed; they finish here without holding up the turn
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("MEDIGENIUS_SEARCH_THREADS", "8")), thread_name_prefix="search")
+
+class SearchUnavailable(Exception):
+    """The source timed out, failed, or is short-circuited by its breaker."""
+
+def normalize_query(query: str) -> str:
+    return " ".join(_WORDS.findall(query.lower()))
+
+class SearchCache:
+    """On-disk (SQLite, WAL) cache of search results keyed by source and normalized query."""
+
+    def __init__(self, path: str = SEARCH_CACHE_PATH, ttl: float = SEARCH_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "source TEXT NOT NULL, query TEXT NOT NULL, fetched_at REAL NOT NULL, content TEXT NOT NULL, "
+                "PRIMARY KEY (source, query))"
+            )
+
+    def _connect(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, source: str, query: str, max_age: float = None):
+        """Cached content, or None if missing or older than `max_age` (default: the TTL)."""
+        max_age = self.ttl if max_age is None else max_age
+        row = self._connect().execute(
+            "SELECT content FROM results WHERE source = ? AND query = ? AND fetched_at >= ?",
+            (source, query, time.time() - max_age)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, source: str, query: str, content: str):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO results (source, query, fetched_at, content) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(source, query) DO UPDATE SET fetched_at = excluded.fetched_at, content = excluded.content",
+                (source, query, time.time(), content)
+            )
+
+class CircuitBreaker:
+    """Opens after `failures` consecutive failures and lets one probe through every `reset_after` seconds."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_after: float = BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_after = reset_after
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open":
+                return False
+            if self.state == "half_open":
+                # Only one probe at a time; re-arm the timer until it reports back
+                self.opened_at = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failures:
+                self.opened_at = time.monotonic()
+
+class CachedSearch:
+    """Cache, timeout and circuit breaker around one search source.
+
+    `search` is any `str -> str` callable and `asearch` an optional async
+    equivalent used by `arun`. In offline mode results come from
+    `<offline_dir>/<name>.json` and then from the cache regardless of age,
+    and the search callable is never called.
+    """
+
+    def __init__(self, name: str, search, timeout: float, cache: SearchCache = None,
+                 breaker: CircuitBreaker = None, offline_dir: str = None, asearch=None):
+        self.name = name
+        self.search = search
+        self.asearch = asearch
+        self.timeout = timeout
+        self.cache = cache
+        self.breaker = breaker or CircuitBreaker()
+        self.offline_dir = OFFLINE_DIR if offline_dir is None else offline_dir
+        self._fixtures = None
+        self.hits = self.misses = self.timeouts = self.errors = self.short_circuits = 0
+
+    def _cache(self) -> SearchCache:
+        if self.cache is None:
+            self.cache = get_search_cache()
+        return self.cache
+
+    def _offline(self, key: str) -> str:
+        if self._fixtures is None:
+            path = Path(self.offline_dir) / f"{self.name}.json"
+            fixtures = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+            self._fixtures = {normalize_query(query): content for query, content in fixtures.items()}
+        if key in self._fixtures:
+            return self._fixtures[key]
+        cached = self._cache().get(self.name, key, max_age=float("inf"))
+        return cached or ""
+
+    def cached(self, query: str) -> str:
+        """Whatever the cache or offline fixtures hold for `query`, without going to the network."""
+        key = normalize_query(query)
+        if self.offline_dir:
+            return self._offline(key)
+        cached = self._cache().get(self.name, key)
+        if cached is None:
+            self.misses += 1
+            return ""
+        self.hits += 1
+        return cached
+
+    def _lookup(self, key: str):
+        """The cached content for `key`, or None after checking the breaker lets a lookup through."""
+        cached = self._cache().get(self.name, key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        if not self.breaker.allow():
+            self.short_circuits += 1
+            raise SearchUnavailable(f"{self.name} is temporarily disabled after repeated failures")
+        return None
+
+    def _timed_out(self, timeout: float) -> SearchUnavailable:
+        self.timeouts += 1
+        self.breaker.record_failure()
+        return SearchUnavailable(f"{self.name} did not answer within {timeout:g}s")
+
+    def _failed(self, e: Exception) -> SearchUnavailable:
+        self.errors += 1
+        self.breaker.record_failure()
+        return SearchUnavailable(f"{self.name} failed: {e}")
+
+    def _store(self, key: str, content: str) -> str:
+        self.breaker.record_success()
+        content = content or ""
+        self._cache().put(self.name, key, content)
+        return content
+
+    def run(self, query: str, timeout: float = None) -> str:
+        """Cached or fresh content for `query`; `timeout` can only shorten the source's own."""
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        key = normalize_query(query)
+        if self.offline_dir:
+            return self._offline(key)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        try:
+            content = _pool.submit(self.search, query).result(timeout=timeout)
+        except FutureTimeout:
+            raise self._timed_out(timeout) from None
+        except Exception as e:
+            raise self._failed(e) from e
+        return self._store(key, content)
+
+    async def arun(self, query: str) -> str:
+        """`run` for the event loop: `asearch` waits on the network without holding a thread.
+
+        Only the local cache reads and writes go to a worker thread. Without
+        `asearch` the blocking `search` runs on this module's search pool.
+        """
+        key = normalize_query(query)
+        if self.offline_dir:
+            return await asyncio.to_thread(self._offline, key)
+        cached = await asyncio.to_thread(self._lookup, key)
+        if cached is not None:
+            return cached
+        pending = self.asearch(query) if self.asearch else asyncio.wrap_future(_pool.submit(self.search, query))
+        try:
+            content = await asyncio.wait_for(pending, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(self.timeout) from None
+        except Exception as e:
+            raise self._failed(e) from e
+        return await asyncio.to_thread(self._store, key, content)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "short_circuits": self.short_circuits,
+            "breaker": self.breaker.state,
+            "offline": bool(self.offline_dir),
+        }
+
+_search_cache = None
+
+def get_search_cache():
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SearchCache()
+    return _search_cache
@@ -0,0 +1,168 @@
+# tools/semantic_cache.py
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
+
+CACHE_ENABLED = os.getenv("MEDIGENIUS_SEMANTIC_CACHE", "1") != "0"
+SIMILARITY_THRESHOLD = float(os.getenv("MEDIGENIUS_CACHE_THRESHOLD", "0.92"))
+MAX_ENTRIES = int(os.getenv("MEDIGENIUS_CACHE_MAX_ENTRIES", "2048"))
+TTL_SECONDS = float(os.getenv("MEDIGENIUS_CACHE_TTL", str(24 * 3600)))
+
+# Only answers grounded in the LLM or retrieved documents are worth replaying
+CACHEABLE_SOURCES = {"llm_knowledge", "retrieved_docs"}
+
+# Words that only make sense with the earlier turns in view
+_CONTEXT_WORDS = {
+    "it", "its", "this", "that", "these", "those", "they", "them", "their",
+    "he", "she", "him", "her", "his", "hers", "also", "same", "else", "more", "again",
+}
+_WORDS = re.compile(r"[a-z0-9']+")
+
+def normalize_question(question: str) -> str:
+    return " ".join(_WORDS.findall(question.lower()))
+
+def is_context_dependent(question: str, history) -> bool:
+    """True when the question refers back to earlier turns and must not be answered from the cache."""
+    # `history` holds typed turns ({"role", "content"}), ending with the current question
+    if not any(turn["content"] != question for turn in history or []):
+        return False
+    words = normalize_question(question).split()
+    if len(words) < 3:
+        return True
+    return bool(_CONTEXT_WORDS.intersection(words)) or words[0] in ("and", "but", "so", "what's", "how's")
+
+@dataclass
+class CacheEntry:
+    question: str
+    answer: str
+    source: str
+    namespace: str
+    created: float
+    hits: int = 0
+
+class SemanticCache:
+    """Nearest-neighbour answer cache over normalized question embeddings.
+
+    Vectors live in one preallocated matrix so a lookup is a single masked
+    matrix-vector product. Entries expire after `ttl` seconds and the least
+    recently used one is evicted when the cache is full. `namespace` separates
+    answers produced under different corpora, models or sources; a namespace
+    is forgotten once none of its entries is left.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, max_entries: int = MAX_ENTRIES,
+                 ttl: float = TTL_SECONDS):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._matrix = None
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._namespace_ids = np.full(max_entries, -1, dtype=np.int32)
+        self._created = np.zeros(max_entries, dtype=np.float64)
+        self._namespaces = {}  # namespace -> [id, live entries]
+        self._next_namespace_id = 0
+        self._entries = OrderedDict()  # slot -> CacheEntry, least recently used first
+        self._free = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.lookups = self.hits = self.skips = self.stores = self.evictions = 0
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _namespace_id(self, namespace: str) -> int:
+        if namespace not in self._namespaces:
+            self._namespaces[namespace] = [self._next_namespace_id, 0]
+            self._next_namespace_id += 1
+        return self._namespaces[namespace][0]
+
+    def _release(self, slot: int):
+        entry = self._entries.pop(slot, None)
+        self._valid[slot] = False
+        self._namespace_ids[slot] = -1
+        self._free.append(slot)
+        if entry is not None:
+            usage = self._namespaces[entry.namespace]
+            usage[1] -= 1
+            if not usage[1]:
+                # Old corpus versions would otherwise pile up here forever
+                del self._namespaces[entry.namespace]
+
+    def lookup(self, vector, *namespaces):
+        """Return the best live entry at or above the threshold in any of `namespaces`, or None."""
+        query = self._unit(vector)
+        with self._lock:
+            self.lookups += 1
+            ids = [self._namespaces[name][0] for name in namespaces if name in self._namespaces]
+            if self._matrix is None or not ids:
+                return None
+            mask = self._valid & np.isin(self._namespace_ids, ids)
+            if not mask.any():
+                return None
+            scores = np.where(mask, self._matrix @ query, -1.0)
+            # Expired matches are dropped so a live entry further down can still answer
+            expired = np.flatnonzero((scores >= self.threshold) & (self._created < time.time() - self.ttl))
+            for slot in expired:
+                self._release(int(slot))
+            self.evictions += len(expired)
+            scores[expired] = -1.0
+            slot = int(np.argmax(scores))
+            if scores[slot] < self.threshold:
+                return None
+            entry = self._entries[slot]
+            entry.hits += 1
+            self._entries.move_to_end(slot)
+            self.hits += 1
+            return entry
+
+    def store(self, vector, question: str, answer: str, source: str, namespace: str):
+        vector = self._unit(vector)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            if not self._free:
+                oldest = next(iter(self._entries))
+                self._release(oldest)
+                self.evictions += 1
+            slot = self._free.pop()
+            self._matrix[slot] = vector
+            self._valid[slot] = True
+            self._namespace_ids[slot] = self._namespace_id(namespace)
+            self._namespaces[namespace][1] += 1
+            entry = self._entries[slot] = CacheEntry(question, answer, source, namespace, time.time())
+            self._created[slot] = entry.created
+            self.stores += 1
+
+    def record_skip(self):
+        with self._lock:
+            self.skips += 1
+
+    def clear(self):
+        with self._lock:
+            for slot in list(self._entries):
+                self._release(slot)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "skipped_context_dependent": self.skips,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+_cache = None
+
+def get_semantic_cache():
+    global _cache
+    if _cache is None:
+        _cache = SemanticCache()
+    return _cache
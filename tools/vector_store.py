@@ -1,9 +1,41 @@
 # tools/vector_store.py
+import asyncio
+import hashlib
+import json
+import logging
 import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface.embeddings import HuggingFaceEmbeddings
-from .pdf_loader import load_pdf_documents
+from typing import Any
+import numpy as np
+from langchain_core.vectorstores import VectorStoreRetriever
+from .bm25_index import BM25Index
+from .bm25_index import INDEX_FILENAME
+from .doc_store import document_id
+from .doc_store import get_document_store
+from .embeddings import EMBEDDING_BACKEND
+from .embeddings import EMBEDDING_MODEL_NAME
+from .embeddings import get_embeddings
+from .embeddings import normalize_text
+from .embeddings import use_document_backend
+from .flat_index import FlatIndex
+from .flat_index import FlatVectorStore
+from .flat_index import export_flat_index
+from .index_manager import expected_manifest
+from .index_manager import manifest_mismatches
+from .index_manager import manifest_path
+from .index_manager import new_manifest
+from .index_manager import read_manifest
+from .index_manager import write_manifest
+from .ingestion import scan_directory
+from .ingestion import stale_reasons
+from .ingestion import sync_directory
+from .reranker import get_reranker
+
+logger = logging.getLogger(__name__)
 
 # Get the absolute path to the project root (assuming this file is in medical_ai_assistant/tools/)
 PROJECT_ROOT = Path(__file__).parent.parent.resolve()
@@ -11,34 +43,435 @@ PROJECT_ROOT = Path(__file__).parent.parent.resolve()
 # Path configurations for sibling directories
 DATA_DIR = PROJECT_ROOT / "data"
 VECTOR_DB_DIR = PROJECT_ROOT / "medical_db"
-PDF_PATH = DATA_DIR / "medical_book.pdf"
+DOCS_DIR = Path(os.getenv("MEDIGENIUS_DOCS_DIR", DATA_DIR))
+
+COLLECTION_METADATA = {"hnsw:space": "cosine"}
+RETRIEVAL_K = 3
+
+# "chroma" serves queries from the Chroma collection; "flat" from a memory-mapped
+# NumPy export of it, so serving workers never load Chroma while the index is current
+VECTOR_BACKEND = os.getenv("MEDIGENIUS_VECTOR_BACKEND", "chroma")
+FLAT_INDEX_DIR = VECTOR_DB_DIR / "flat"
+
+# "hybrid" fuses BM25 keyword search with vector search; "vector" is cosine only
+RETRIEVER_MODE = os.getenv("MEDIGENIUS_RETRIEVER", "hybrid")
+# Hits taken from each ranking before fusion (and reranking)
+HYBRID_CANDIDATES = int(os.getenv("MEDIGENIUS_HYBRID_CANDIDATES", "10"))
+RRF_K = 60
+
+# Top-k results kept per index version and normalized query; 0 turns the cache off
+RETRIEVAL_CACHE_SIZE = int(os.getenv("MEDIGENIUS_RETRIEVAL_CACHE_SIZE", "2048"))
+RETRIEVAL_CACHE_PATH = os.getenv("MEDIGENIUS_RETRIEVAL_CACHE_PATH")  # optional on-disk tier
 
-# Initialize embeddings and vectorstore
-_embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
 _vectorstore = None
+_corpus_version = None
+_manifest_version = None  # (manifest mtime, version) until an index is loaded
+_bm25_index = None
 
-def initialize_vectorstore():
-    global _vectorstore
-    if _vectorstore is None:
-        # Ensure directories exist
-        os.makedirs(DATA_DIR, exist_ok=True)
-        os.makedirs(VECTOR_DB_DIR, exist_ok=True)
-        
-        if not PDF_PATH.exists():
-            raise FileNotFoundError(f"PDF file not found at {PDF_PATH}")
-        
-        # Load and process documents
-        doc_splits = load_pdf_documents(str(PDF_PATH))
-        
-        _vectorstore = Chroma.from_documents(
-            documents=doc_splits,
-            embedding=_embeddings,
-            persist_directory=str(VECTOR_DB_DIR),
-            collection_metadata={"hnsw:space": "cosine"}
-        )
+def _open_vectorstore():
+    # chromadb is slow to import; only pay for it when the index is opened
+    from langchain_community.vectorstores import Chroma
+
+    return Chroma(
+        persist_directory=str(VECTOR_DB_DIR),
+        embedding_function=get_embeddings(),
+        collection_metadata=COLLECTION_METADATA
+    )
+
+def sync_vectorstore(rebuild: bool = False):
+    """Load the persisted index and ingest whatever changed in DOCS_DIR.
+
+    A full rebuild only happens when forced or when the chunking parameters or
+    embedding model differ from the manifest, and only if DOCS_DIR has
+    documents to rebuild from; a collection shipped without its manifest or
+    documents is adopted as it is. Otherwise only new or changed documents
+    are embedded.
+    """
+    global _vectorstore, _corpus_version, _bm25_index
+    os.makedirs(DOCS_DIR, exist_ok=True)
+    os.makedirs(VECTOR_DB_DIR, exist_ok=True)
+
+    manifest = read_manifest(VECTOR_DB_DIR)
+    # A prebuilt index may be shipped without its source documents: only prune
+    # removed files, or rebuild at all, when the documents directory is populated.
+    has_documents = bool(scan_directory(DOCS_DIR, (manifest or {}).get("sources")))
+    if rebuild or manifest_mismatches(manifest, expected_manifest(EMBEDDING_MODEL_NAME)):
+        if has_documents:
+            # Drop the stale collection first, otherwise old chunks linger next to the new ones
+            _open_vectorstore().delete_collection()
+            manifest = new_manifest(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND)
+        else:
+            manifest = adopt_vectorstore(_open_vectorstore())
+
+    vectorstore = _open_vectorstore()
+    if not has_documents and not manifest.get("chunk_count"):
+        raise FileNotFoundError(f"No documents found in {DOCS_DIR} and no prebuilt index in {VECTOR_DB_DIR}")
+
+    # Indexes from before the backend was recorded were all embedded with torch
+    use_document_backend(manifest.setdefault("embedding_backend", "torch"))
+    report = sync_directory(vectorstore, DOCS_DIR, manifest, prune=has_documents)
+    write_manifest(VECTOR_DB_DIR, manifest)
+
+    _vectorstore = vectorstore
+    _corpus_version = corpus_version(manifest)
+    if RETRIEVER_MODE == "hybrid":
+        _bm25_index = sync_bm25_index(vectorstore, _corpus_version)
+    if VECTOR_BACKEND == "flat":
+        index = FlatIndex.open(FLAT_INDEX_DIR, _corpus_version)
+        if index is None:
+            index = export_flat_index(vectorstore, FLAT_INDEX_DIR, _corpus_version)
+        _vectorstore = FlatVectorStore(index, get_embeddings())
+    return report
+
+def adopt_vectorstore(vectorstore) -> dict:
+    """A manifest for a collection shipped without one; there is nothing to rebuild it from."""
+    # Shipped collections are built with the default torch backend
+    manifest = new_manifest(EMBEDDING_MODEL_NAME)
+    manifest["adopted_chunks"] = manifest["chunk_count"] = len(vectorstore.get(include=[])["ids"])
+    if manifest["chunk_count"]:
+        logger.warning("Adopting the prebuilt index in %s (%d chunks) without its documents",
+                       VECTOR_DB_DIR, manifest["chunk_count"])
+    return manifest
+
+def open_flat_vectorstore() -> bool:
+    """Serve from the flat index without touching Chroma; False if it needs a sync first."""
+    global _vectorstore, _corpus_version, _bm25_index
+    manifest = read_manifest(VECTOR_DB_DIR)
+    if stale_reasons(manifest, DOCS_DIR, expected_manifest(EMBEDDING_MODEL_NAME)):
+        return False
+    version = corpus_version(manifest)
+    index = FlatIndex.open(FLAT_INDEX_DIR, version)
+    if index is None:
+        return False
+    if RETRIEVER_MODE == "hybrid":
+        _bm25_index = sync_bm25_index(index, version)
+    _vectorstore = FlatVectorStore(index, get_embeddings())
+    _corpus_version = version
+    return True
+
+def sync_bm25_index(vectorstore, version: str) -> BM25Index:
+    """Load the BM25 index saved for `version`, rebuilding it from the stored chunks if stale.
+
+    `vectorstore` is anything with Chroma's `get`, including a `FlatIndex`.
+    """
+    path = VECTOR_DB_DIR / INDEX_FILENAME
+    index = BM25Index.load(path, version)
+    if index is None:
+        # Built from the vector store itself so both indexes cover exactly the same chunks
+        data = vectorstore.get(include=["documents"])
+        index = BM25Index.build(data["ids"], data["documents"], version)
+        index.save(path)
+    return index
+
+def corpus_version(manifest: dict) -> str:
+    """Short fingerprint of the indexed corpus; changes whenever any chunk does."""
+    digest = hashlib.sha1(manifest.get("embedding_model", "").encode("utf-8"))
+    for name, source in sorted(manifest.get("sources", {}).items()):
+        digest.update(f"{name}:{source.get('sha256')}".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+def get_corpus_version() -> str:
+    """Version of the index being served, else of the one on disk; never loads or syncs anything.
+
+    Read on every turn by the semantic cache, so the manifest is only
+    re-parsed when its mtime changes.
+    """
+    global _manifest_version
+    if _corpus_version is not None:
+        return _corpus_version
+    try:
+        mtime = manifest_path(VECTOR_DB_DIR).stat().st_mtime
+    except OSError:
+        return "unindexed"
+    if _manifest_version is None or _manifest_version[0] != mtime:
+        manifest = read_manifest(VECTOR_DB_DIR)
+        _manifest_version = (mtime, corpus_version(manifest) if manifest else "unindexed")
+    return _manifest_version[1]
+
+def initialize_vectorstore(rebuild: bool = False):
+    if _vectorstore is None or rebuild:
+        if rebuild or VECTOR_BACKEND != "flat" or not open_flat_vectorstore():
+            sync_vectorstore(rebuild=rebuild)
     return _vectorstore
 
+def _attach_scores(docs_and_scores):
+    for doc, score in docs_and_scores:
+        doc.metadata["score"] = score
+    return docs_and_scores
+
+class RetrievalCache:
+    """Thread-safe LRU of top-k results (chunk IDs and scores) with an optional SQLite tier.
+
+    Keys include the corpus version, and the first lookup under a new version
+    drops everything cached for older ones. Each entry remembers how long its
+    search took, so hits add up the latency they saved. The Documents
+    themselves stay in the document store.
+    """
+
+    def __init__(self, max_size: int = RETRIEVAL_CACHE_SIZE, path: str = None):
+        self.max_size = max_size
+        self.version = None
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS retrievals (key TEXT PRIMARY KEY, version TEXT, hits TEXT, seconds REAL)"
+            )
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def key(version: str, query: str, keywords: str, k: int) -> str:
+        text = f"{version}\0{k}\0{normalize_text(query)}\0{normalize_text(keywords or query)}"
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _use_version(self, version: str):
+        # Called with the lock held
+        if version == self.version:
+            return
+        if self.version is not None:
+            self.invalidations += 1
+        self._items.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM retrievals WHERE version != ?", (version,))
+        self.version = version
+
+    def get(self, version: str, key: str):
+        """`([(chunk ID, score)], search seconds)`, or None."""
+        with self._lock:
+            self._use_version(version)
+            entry = self._items.get(key)
+            if entry is not None:
+                self._items.move_to_end(key)
+                return entry
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT hits, seconds FROM retrievals WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        entry = ([tuple(hit) for hit in json.loads(row[0])], row[1])
+        self._remember(key, entry)
+        return entry
+
+    def put(self, version: str, key: str, hits, seconds: float):
+        with self._lock:
+            self._use_version(version)
+        self._remember(key, (hits, seconds))
+        if self._db is not None:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO retrievals (key, version, hits, seconds) VALUES (?, ?, ?, ?)",
+                    (key, version, json.dumps(hits), seconds)
+                )
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._items[key] = entry
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def record(self, hit: bool, saved: float = 0.0):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.saved_seconds += max(saved, 0.0)
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "size": len(self._items),
+            "lookups": lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "saved_ms": round(self.saved_seconds * 1000, 1),
+            "avg_saved_ms": round(self.saved_seconds * 1000 / self.hits, 2) if self.hits else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._items)
+
+_retrieval_cache = None
+_retrieval_cache_lock = threading.Lock()
+
+def get_retrieval_cache() -> RetrievalCache:
+    global _retrieval_cache
+    if _retrieval_cache is None:
+        with _retrieval_cache_lock:
+            if _retrieval_cache is None:
+                _retrieval_cache = RetrievalCache(path=RETRIEVAL_CACHE_PATH)
+    return _retrieval_cache
+
+class ScoredRetriever(VectorStoreRetriever):
+    """Top-k retriever that can also return cosine relevance scores (0-1, higher is closer).
+
+    `keywords` is the bare question without conversation context; vector-only
+    retrieval ignores it. With a `cache`, repeated queries against the same
+    index `version` skip the embedding and the search.
+    """
+
+    cache: Any = None
+    version: str = ""
+
+    def _search(self, query: str, keywords: str = None):
+        return self.vectorstore.similarity_search_with_relevance_scores(query, k=self.search_kwargs.get("k", RETRIEVAL_K))
+
+    async def _asearch(self, query: str, keywords: str = None):
+        return await self.vectorstore.asimilarity_search_with_relevance_scores(query, k=self.search_kwargs.get("k", RETRIEVAL_K))
+
+    def _resolve(self, hits):
+        """[(Document, score)] for cached hits, or None if any chunk can no longer be found."""
+        from langchain_core.documents import Document
+
+        store = get_document_store()
+        docs = {chunk_id: store.get(chunk_id) for chunk_id, _ in hits}
+        # The on-disk tier outlives the process: index chunks can be read back by ID,
+        # but web-style content hashes only resolve from the document store
+        missing = [chunk_id for chunk_id, doc in docs.items() if doc is None and not chunk_id.startswith("sha1:")]
+        if missing:
+            data = self.vectorstore.get(ids=missing, include=["documents", "metadatas"])
+            for chunk_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"]):
+                doc = Document(page_content=text, metadata=dict(metadata or {}), id=chunk_id)
+                store.put(doc)
+                docs[chunk_id] = doc
+        if any(doc is None for doc in docs.values()):
+            return None
+        return [(docs[chunk_id], score) for chunk_id, score in hits]
+
+    def _lookup(self, query: str, keywords: str = None):
+        """(cache key, cached results or None); the key is None without a cache."""
+        if self.cache is None:
+            return None, None
+        start = time.perf_counter()
+        key = self.cache.key(self.version, query, keywords, self.search_kwargs.get("k", RETRIEVAL_K))
+        entry = self.cache.get(self.version, key)
+        results = self._resolve(entry[0]) if entry is not None else None
+        if results is None:
+            self.cache.record(hit=False)
+            return key, None
+        self.cache.record(hit=True, saved=entry[1] - (time.perf_counter() - start))
+        return key, _attach_scores(results)
+
+    def _store(self, key: str, results, seconds: float):
+        if key is None:
+            return _attach_scores(results)
+        store = get_document_store()
+        for doc, _ in results:
+            store.put(doc)
+        self.cache.put(self.version, key, [(document_id(doc), score) for doc, score in results], seconds)
+        return _attach_scores(results)
+
+    def search_with_scores(self, query: str, keywords: str = None):
+        key, cached = self._lookup(query, keywords)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        results = self._search(query, keywords)
+        return self._store(key, results, time.perf_counter() - start)
+
+    async def asearch_with_scores(self, query: str, keywords: str = None):
+        key, cached = self._lookup(query, keywords)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        results = await self._asearch(query, keywords)
+        return self._store(key, results, time.perf_counter() - start)
+
+def reciprocal_rank_fusion(rankings, k: int = RRF_K) -> list:
+    """[(key, fused score)] best first, from several rankings of keys (best first)."""
+    scores = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+def _cosine(a, b) -> float:
+    a, b = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(a @ b) / norm if norm else 0.0
+
+class HybridRetriever(ScoredRetriever):
+    """Fuses BM25 keyword hits with vector hits by reciprocal rank.
+
+    BM25 sees only `keywords`, so drug names and rare terms in the question
+    are not diluted by the conversation context that goes into the embedded
+    `query`. Scores stay cosine relevance (or cross-encoder relevance when a
+    reranker is configured), so routing thresholds keep their meaning.
+    """
+
+    bm25: Any = None
+    reranker: Any = None
+    candidates: int = HYBRID_CANDIDATES
+
+    def _keyword_documents(self, query: str, hits) -> dict:
+        """Chunk text -> Document for BM25 hits, scored by cosine against the query."""
+        if not hits:
+            return {}
+        from langchain_core.documents import Document
+
+        data = self.vectorstore.get(ids=[chunk_id for chunk_id, _ in hits], include=["documents", "metadatas", "embeddings"])
+        query_vector = self.vectorstore.embeddings.embed_query(query)
+        rows = {
+            chunk_id: (text, metadata, embedding)
+            for chunk_id, text, metadata, embedding in zip(data["ids"], data["documents"], data["metadatas"], data["embeddings"])
+        }
+        docs = {}
+        for chunk_id, bm25_score in hits:
+            if chunk_id not in rows:
+                continue
+            text, metadata, embedding = rows[chunk_id]
+            doc = Document(page_content=text, metadata=dict(metadata or {}), id=chunk_id)
+            doc.metadata["vector_score"] = _cosine(query_vector, embedding)
+            doc.metadata["bm25_score"] = bm25_score
+            docs.setdefault(text, doc)
+        return docs
+
+    def _search(self, query: str, keywords: str = None):
+        keywords = keywords or query
+        vector_hits = self.vectorstore.similarity_search_with_relevance_scores(query, k=self.candidates)
+        keyword_hits = self.bm25.search(keywords, self.candidates)
+
+        docs = {}
+        for doc, score in vector_hits:
+            doc.metadata["vector_score"] = score
+            docs.setdefault(doc.page_content, doc)
+        keyword_docs = self._keyword_documents(query, keyword_hits)
+        for text, doc in keyword_docs.items():
+            if text in docs:
+                docs[text].metadata["bm25_score"] = doc.metadata["bm25_score"]
+            else:
+                docs[text] = doc
+
+        fused = reciprocal_rank_fusion([[doc.page_content for doc, _ in vector_hits], list(keyword_docs)])
+        ranked = []
+        for text, rrf_score in fused[:self.candidates]:
+            docs[text].metadata["rrf_score"] = rrf_score
+            ranked.append((docs[text], docs[text].metadata["vector_score"]))
+
+        if self.reranker is not None:
+            scores = self.reranker.score(keywords, [doc.page_content for doc, _ in ranked])
+            ranked = sorted(((doc, score) for (doc, _), score in zip(ranked, scores)), key=lambda item: item[1], reverse=True)
+        return ranked[:self.search_kwargs.get("k", RETRIEVAL_K)]
+
+    async def _asearch(self, query: str, keywords: str = None):
+        return await asyncio.to_thread(self._search, query, keywords)
+
 def get_retriever():
     if _vectorstore is None:
         initialize_vectorstore()
-    return _vectorstore.as_retriever(search_kwargs={'k': 3})
\ No newline at end of file
+    cache = get_retrieval_cache() if RETRIEVAL_CACHE_SIZE > 0 else None
+    if _bm25_index is not None:
+        return HybridRetriever(
+            vectorstore=_vectorstore, bm25=_bm25_index, reranker=get_reranker(), search_kwargs={'k': RETRIEVAL_K},
+            cache=cache, version=_corpus_version
+        )
+    return ScoredRetriever(vectorstore=_vectorstore, search_kwargs={'k': RETRIEVAL_K}, cache=cache, version=_corpus_version)
@@ -0,0 +1,98 @@
+# tools/web_search.py
+import asyncio
+import html
+import re
+import weakref
+from abc import ABC
+from abc import abstractmethod
+import httpx
+
+USER_AGENT = "MediGenius/1.0"
+WIKI_API = "https://en.wikipedia.org/w/api.php"
+DDG_HTML = "https://html.duckduckgo.com/html/"
+
+_SNIPPET = re.compile(r'<a[^>]*class="result__snippet"[^>]*>(.*?)</a>', re.S)
+_TAG = re.compile(r"<[^>]+>")
+
+class WebSearch(ABC):
+    """A `str -> str` web lookup with a blocking `run` and a non-blocking `arun`.
+
+    Subclasses describe the lookup once in `_steps`, a generator that yields
+    `(method, url, kwargs)` requests and receives each `httpx.Response`, so
+    both entry points share it. The async client is kept per event loop.
+    """
+
+    def __init__(self, timeout: float = 8.0, transport=None, async_transport=None):
+        options = {"timeout": timeout, "headers": {"User-Agent": USER_AGENT}, "follow_redirects": True}
+        self._options = options
+        self._async_transport = async_transport
+        self._client = httpx.Client(transport=transport, **options)
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    @abstractmethod
+    def _steps(self, query: str):
+        """Yield the requests of one lookup and return its text."""
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = httpx.AsyncClient(transport=self._async_transport, **self._options)
+        return client
+
+    def run(self, query: str) -> str:
+        steps = self._steps(query)
+        try:
+            method, url, kwargs = next(steps)
+            while True:
+                response = self._client.request(method, url, **kwargs).raise_for_status()
+                method, url, kwargs = steps.send(response)
+        except StopIteration as done:
+            return done.value
+
+    async def arun(self, query: str) -> str:
+        client = self._async_client()
+        steps = self._steps(query)
+        try:
+            method, url, kwargs = next(steps)
+            while True:
+                response = (await client.request(method, url, **kwargs)).raise_for_status()
+                method, url, kwargs = steps.send(response)
+        except StopIteration as done:
+            return done.value
+
+class WikipediaSearch(WebSearch):
+    """Intro summaries of the top articles, formatted like langchain's WikipediaAPIWrapper."""
+
+    def __init__(self, top_k_results: int = 2, doc_content_chars_max: int = 2000, **kwargs):
+        super().__init__(**kwargs)
+        self.top_k_results = top_k_results
+        self.doc_content_chars_max = doc_content_chars_max
+
+    def _steps(self, query: str):
+        found = yield "GET", WIKI_API, {"params": {
+            "action": "query", "list": "search", "srsearch": query[:300],
+            "srlimit": self.top_k_results, "format": "json",
+        }}
+        titles = [hit["title"] for hit in found.json().get("query", {}).get("search", [])]
+        if not titles:
+            return ""
+        pages = yield "GET", WIKI_API, {"params": {
+            "action": "query", "prop": "extracts", "exintro": 1, "explaintext": 1, "redirects": 1,
+            "titles": "|".join(titles), "format": "json",
+        }}
+        extracts = {page.get("title"): page.get("extract", "") for page in pages.json().get("query", {}).get("pages", {}).values()}
+        summaries = [f"Page: {title}\nSummary: {extracts[title]}" for title in titles if extracts.get(title)]
+        return "\n\n".join(summaries)[:self.doc_content_chars_max]
+
+class DuckDuckGoSearch(WebSearch):
+    """Result snippets from DuckDuckGo's HTML endpoint, joined like langchain's DuckDuckGoSearchRun."""
+
+    def __init__(self, max_results: int = 4, **kwargs):
+        super().__init__(**kwargs)
+        self.max_results = max_results
+
+    def _steps(self, query: str):
+        page = yield "POST", DDG_HTML, {"data": {"q": query}}
+        snippets = [html.unescape(_TAG.sub("", snippet)).strip() for snippet in _SNIPPET.findall(page.text)]
+        return " ".join(snippet for snippet in snippets[:self.max_results] if snippet)